@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Benchmarks of the `spa_sequencer.shot` package.
+
+Each benchmark generates its data from the generator parameters, then returns the
+duration of the measured operation only.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+import bpy
+
+from spa_sequencer.shot.core import (
+    adjust_shot_duration,
+    delete_scene,
+    duplicate_scene,
+    rename_scene,
+)
+
+from generators import GeneratorParams, generate_edit, generate_shot_scene
+
+
+class Timer:
+    """Elapsed time measured by `timer`."""
+
+    elapsed: float = 0.0
+
+
+@contextmanager
+def timer():
+    """Measure the duration of the wrapped code block."""
+    result = Timer()
+    start = time.perf_counter()
+    yield result
+    result.elapsed = time.perf_counter() - start
+
+
+def new_edit_scene() -> bpy.types.Scene:
+    """Start from the default file and return its scene, used as edit scene."""
+    bpy.ops.wm.read_homefile(app_template="")
+    scene = bpy.context.scene
+    scene.sequence_editor_create()
+    return scene
+
+
+def bench_duplicate_scene(params: GeneratorParams) -> float:
+    """Duplicate a shot scene containing rigs and many objects."""
+    new_edit_scene()
+    scene = generate_shot_scene("SH0010", params)
+    with timer() as t:
+        duplicate_scene(scene, "SH0020")
+    return t.elapsed
+
+
+def bench_delete_scene(params: GeneratorParams) -> float:
+    """Delete a shot scene of the edit, purging its orphan datablocks."""
+    strips = generate_edit(new_edit_scene(), params)
+    scene = strips[len(strips) // 2].scene
+    with timer() as t:
+        delete_scene(scene, purge_orphan_datablocks=True)
+    return t.elapsed
+
+
+def bench_rename_scene(params: GeneratorParams) -> float:
+    """Rename a shot scene of the edit and its datablocks."""
+    strips = generate_edit(new_edit_scene(), params)
+    scene = strips[len(strips) // 2].scene
+    with timer() as t:
+        rename_scene(scene, "SH9990")
+    return t.elapsed
+
+
+def bench_chronological_numbering(params: GeneratorParams) -> float:
+    """Renumber all the shots of the edit, renaming their scenes."""
+    edit_scene = new_edit_scene()
+    strips = generate_edit(edit_scene, params)
+    # Reverse the chronological order so that every shot gets renamed.
+    for strip in strips:
+        strip.channel = 2
+    frame_start = edit_scene.frame_start
+    for strip in reversed(strips):
+        strip.frame_start = frame_start
+        strip.channel = 1
+        frame_start = strip.frame_final_end
+
+    with bpy.context.temp_override(scene=edit_scene):
+        with timer() as t:
+            bpy.ops.sequencer.shot_chronological_numbering(rename_scenes="ALL")
+    return t.elapsed
+
+
+def bench_adjust_shot_duration(params: GeneratorParams) -> float:
+    """Extend the first shot of a long channel, rippling all the following ones."""
+    strips = generate_edit(new_edit_scene(), params)
+    with timer() as t:
+        adjust_shot_duration(strips[0], 10)
+    return t.elapsed
+
+
+BENCHMARKS: tuple[Callable[[GeneratorParams], float], ...] = (
+    bench_duplicate_scene,
+    bench_delete_scene,
+    bench_rename_scene,
+    bench_chronological_numbering,
+    bench_adjust_shot_duration,
+)
@@ -0,0 +1,182 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Synthetic production-like data generators, driven by parameters.
+"""
+
+from typing import NamedTuple
+
+import bpy
+
+
+class GeneratorParams(NamedTuple):
+    """Parameters of the synthetic shot scenes."""
+
+    # Number of shots in the edit.
+    shots: int = 500
+    # Duration of each shot, in frames.
+    shot_duration: int = 48
+    # Number of animated mesh objects per shot.
+    objects: int = 20
+    # Resolution of the grid used as mesh data of each object.
+    mesh_resolution: int = 8
+    # Number of rigged characters per shot.
+    rigs: int = 2
+    # Number of bones of each rig.
+    bones: int = 32
+    # Number of keyframes of each animation curve.
+    keyframes: int = 24
+
+
+def create_grid_mesh(name: str, resolution: int) -> bpy.types.Mesh:
+    """Create a grid mesh of `resolution` x `resolution` vertices."""
+    vertices = [(x, y, 0) for y in range(resolution) for x in range(resolution)]
+    faces = [
+        (
+            y * resolution + x,
+            y * resolution + x + 1,
+            (y + 1) * resolution + x + 1,
+            (y + 1) * resolution + x,
+        )
+        for y in range(resolution - 1)
+        for x in range(resolution - 1)
+    ]
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices, [], faces)
+    return mesh
+
+
+def animate(datablock: bpy.types.ID, data_path: str, keyframes: int, index: int = 0):
+    """Insert `keyframes` keyframes on `datablock`'s property at `data_path`."""
+    if not datablock.animation_data:
+        datablock.animation_data_create()
+    if not datablock.animation_data.action:
+        datablock.animation_data.action = bpy.data.actions.new(datablock.name)
+    fcurve = datablock.animation_data.action.fcurves.new(data_path, index=index)
+    fcurve.keyframe_points.add(keyframes)
+    for idx, keyframe in enumerate(fcurve.keyframe_points):
+        keyframe.co = (idx * 2 + 1, idx % 3)
+
+
+def create_rig(
+    scene: bpy.types.Scene,
+    name: str,
+    params: GeneratorParams,
+) -> bpy.types.Object:
+    """
+    Create a rigged character in `scene`: an animated armature of `params.bones`
+    bones deforming a mesh, with a constraint and a driver.
+
+    :param scene: The scene to create the rig in.
+    :param name: The name of the rig.
+    :param params: The generator parameters.
+    :return: The armature object.
+    """
+    armature = bpy.data.objects.new(name, bpy.data.armatures.new(name))
+    scene.collection.objects.link(armature)
+
+    # Edit bones can only be created in edit mode.
+    view_layer = scene.view_layers[0]
+    view_layer.objects.active = armature
+    with bpy.context.temp_override(
+        scene=scene, view_layer=view_layer, active_object=armature
+    ):
+        bpy.ops.object.mode_set(mode="EDIT")
+        parent = None
+        for idx in range(params.bones):
+            bone = armature.data.edit_bones.new(f"Bone.{idx:03}")
+            bone.head = (0, 0, idx)
+            bone.tail = (0, 0, idx + 1)
+            bone.parent = parent
+            parent = bone
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+    for bone in armature.pose.bones:
+        animate(armature, f'pose.bones["{bone.name}"].rotation_quaternion', 4)
+
+    body = bpy.data.objects.new(
+        f"{name}.body", create_grid_mesh(f"{name}.body", params.mesh_resolution)
+    )
+    scene.collection.objects.link(body)
+    body.parent = armature
+    body.modifiers.new("Armature", "ARMATURE").object = armature
+    for bone in armature.data.bones:
+        body.vertex_groups.new(name=bone.name)
+
+    constraint = body.constraints.new("COPY_ROTATION")
+    constraint.target = armature
+    constraint.subtarget = armature.data.bones[-1].name
+
+    driver = body.driver_add("location", 2).driver
+    var = driver.variables.new()
+    var.targets[0].id = armature
+    var.targets[0].data_path = "location.z"
+    driver.expression = var.name
+
+    return armature
+
+
+def generate_shot_scene(name: str, params: GeneratorParams) -> bpy.types.Scene:
+    """
+    Create a shot scene named `name` containing a camera, `params.rigs` rigs and
+    `params.objects` animated mesh objects, organized in collections.
+
+    :param name: The name of the scene.
+    :param params: The generator parameters.
+    :return: The shot scene.
+    """
+    scene = bpy.data.scenes.new(name)
+    scene.frame_end = scene.frame_start + params.shot_duration - 1
+
+    camera = bpy.data.objects.new(f"{name}.camera", bpy.data.cameras.new(name))
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    animate(camera, "location", params.keyframes)
+
+    characters = bpy.data.collections.new(f"{name}.characters")
+    scene.collection.children.link(characters)
+    for idx in range(params.rigs):
+        rig = create_rig(scene, f"{name}.rig.{idx:02}", params)
+        for obj in [rig, *rig.children]:
+            characters.objects.link(obj)
+            scene.collection.objects.unlink(obj)
+
+    props = bpy.data.collections.new(f"{name}.props")
+    scene.collection.children.link(props)
+    for idx in range(params.objects):
+        obj = bpy.data.objects.new(
+            f"{name}.prop.{idx:03}",
+            create_grid_mesh(f"{name}.prop.{idx:03}", params.mesh_resolution),
+        )
+        props.objects.link(obj)
+        animate(obj, "location", params.keyframes)
+
+    return scene
+
+
+def generate_edit(
+    edit_scene: bpy.types.Scene, params: GeneratorParams
+) -> list[bpy.types.SceneSequence]:
+    """
+    Fill `edit_scene` with `params.shots` consecutive shots on the first channel.
+
+    :param edit_scene: The edit scene.
+    :param params: The generator parameters.
+    :return: The shot strips, in chronological order.
+    """
+    if not edit_scene.sequence_editor:
+        edit_scene.sequence_editor_create()
+
+    strips = []
+    frame_start = edit_scene.frame_start
+    for idx in range(params.shots):
+        scene = generate_shot_scene(f"SH{(idx + 1) * 10:04}", params)
+        strip = edit_scene.sequence_editor.sequences.new_scene(
+            scene.name, scene, channel=1, frame_start=frame_start
+        )
+        frame_start = strip.frame_final_end
+        strips.append(strip)
+
+    edit_scene.frame_end = frame_start - 1
+    return strips
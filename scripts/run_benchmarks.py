@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+
+import bpy
+
+
+BENCHMARKS_FOLDER = "benchmarks"
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    from generators import GeneratorParams
+
+    parser = argparse.ArgumentParser(description="Run the add-on benchmarks")
+    parser.add_argument(
+        "--output", default="benchmarks.json", help="Path of the JSON results file"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of runs of each benchmark"
+    )
+    parser.add_argument(
+        "-k", dest="filter", default="", help="Only run benchmarks matching this name"
+    )
+    # Generator parameters
+    for name, default in GeneratorParams._field_defaults.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    """Run benchmarks and write their timings in a JSON file."""
+    import addon_utils
+
+    # Benchmark the add-on from this repository.
+    sys.path[:0] = [os.getcwd(), BENCHMARKS_FOLDER]
+    addon = addon_utils.enable("spa_sequencer", default_set=True)
+    from bench_shot import BENCHMARKS
+    from generators import GeneratorParams
+
+    args = parse_args(argv)
+    params = GeneratorParams(
+        **{name: getattr(args, name) for name in GeneratorParams._fields}
+    )
+
+    results = {}
+    for benchmark in BENCHMARKS:
+        name = benchmark.__name__.removeprefix("bench_")
+        if args.filter not in name:
+            continue
+        timings = [benchmark(params) for _ in range(args.repeat)]
+        results[name] = {
+            "timings": timings,
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.mean(timings),
+        }
+        print(f"{name}: {results[name]['median']:.4f}s (median of {args.repeat})")
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "addon_version": ".".join(str(v) for v in addon.bl_info["version"]),
+        "blender_version": bpy.app.version_string,
+        "params": params._asdict(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {os.path.abspath(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    script_args = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    sys.exit(main(script_args))
@@ -6,8 +6,8 @@ import re
 import bpy
 
 
-from spa_sequencer.shot.naming import ShotNaming, ShotPrefix
-from spa_sequencer.shot.core import slip_shot_content
+from spa_sequencer.shot.naming import ShotNamesRegistry, ShotNaming, ShotPrefix
+from spa_sequencer.shot.core import batch_strip_reload, slip_shot_content
 from spa_sequencer.utils import register_classes, unregister_classes
 
 from spa_sequencer.editorial.core import gather_strips_groups_by_regex
@@ -86,6 +86,11 @@ class SEQUENCER_OT_edit_conform_shots_from_panels(bpy.types.Operator):
         return context.window_manager.invoke_props_dialog(self)
 
     def execute(self, context: bpy.types.Context):
+        # Reload the created strips all at once.
+        with batch_strip_reload():
+            return self.conform(context)
+
+    def conform(self, context: bpy.types.Context):
         if self.shot_scene == "NONE":
             self.report({"ERROR"}, "No valid shot Scene")
             return {"CANCELLED"}
@@ -122,9 +127,6 @@ class SEQUENCER_OT_edit_conform_shots_from_panels(bpy.types.Operator):
             # Assign active camera of the scene.
             shot_strip.scene_camera = shot_scene.camera
 
-        # Trigger a sequencer update.
-        bpy.ops.sequencer.reload()
-
         self.report(
             {"INFO"},
             f"Created {len(strips_groups)} shots from {len(ref_strips)} panels",
@@ -203,10 +205,17 @@ class SEQUENCER_OT_edit_conform_shots_from_editorial(bpy.types.Operator):
         return context.window_manager.invoke_props_dialog(self)
 
     def execute(self, context: bpy.types.Context):
+        # Reload the created strips all at once.
+        with batch_strip_reload():
+            return self.conform(context)
+
+    def conform(self, context: bpy.types.Context):
         seq_editor = context.scene.sequence_editor
         regex = re.compile(self.shot_id_regex)
 
         shot_naming = ShotNaming()
+        # Registry of used shot names, to get next shot names efficiently.
+        shot_names = ShotNamesRegistry.from_sequences(seq_editor, shot_naming)
 
         for strip in seq_editor.sequences:
             if self.ref_channel != 0 and strip.channel != self.ref_channel:
@@ -247,13 +256,14 @@ class SEQUENCER_OT_edit_conform_shots_from_editorial(bpy.types.Operator):
                 shot_number = int(res.group(1))
                 shot_name = shot_naming.build_shot_name(shot_number)
             else:
-                shot_name = shot_naming.next_shot_name_from_sequences(seq_editor)
+                shot_name = shot_names.next_name()
 
             # Create a new scene strip using extracted information.
             shot_strip = seq_editor.sequences.new_scene(
                 shot_name, scene, self.target_channel, strip.frame_final_start
             )
             shot_strip.scene_camera = camera
+            shot_names.add(shot_strip.name)
             # Adjust timing.
             shot_strip.frame_final_duration = strip.frame_final_duration
             shot_strip.frame_final_start = strip.frame_final_start
@@ -19,8 +19,80 @@ class SPASequencerAddonPreferences(bpy.types.AddonPreferences):
         default="TEMPLATE_SHOT",
     )
 
+    def use_incremental_autosave_update(self, context):
+        # Incremental autosave replaces Blender's autosave of the whole file:
+        # disable it meanwhile, and restore its original state afterwards.
+        filepaths = context.preferences.filepaths
+        if self.use_incremental_autosave:
+            self.use_auto_save_temporary_files = filepaths.use_auto_save_temporary_files
+            filepaths.use_auto_save_temporary_files = False
+        else:
+            filepaths.use_auto_save_temporary_files = self.use_auto_save_temporary_files
+
+    # State of Blender's autosave before enabling incremental autosave.
+    use_auto_save_temporary_files: bpy.props.BoolProperty(
+        default=True,
+        options={"HIDDEN"},
+    )
+
+    use_incremental_autosave: bpy.props.BoolProperty(
+        name="Incremental Autosave",
+        description=(
+            "Replace Blender's autosave by an autosave of modified shot scenes only, "
+            "written in sidecar files next to the edit file"
+        ),
+        default=False,
+        update=use_incremental_autosave_update,
+    )
+
+    incremental_autosave_interval: bpy.props.IntProperty(
+        name="Autosave Interval (s)",
+        description="Time between two incremental autosaves",
+        default=120,
+        min=10,
+    )
+
+    render_workers: bpy.props.IntProperty(
+        name="Render Workers",
+        description=(
+            "Number of background Blender processes used by parallel batch render, "
+            "each loading the whole file (0: as many as CPU cores and available "
+            "memory allow)"
+        ),
+        default=2,
+        min=0,
+    )
+
+    use_render_workers_cpu_affinity: bpy.props.BoolProperty(
+        name="Pin Workers to CPU Cores",
+        description=(
+            "Bind each render worker to a distinct subset of CPU cores, and limit its "
+            "number of threads accordingly (Linux only)"
+        ),
+        default=False,
+    )
+
+    render_chunk_duration: bpy.props.FloatProperty(
+        name="Chunk Duration",
+        description=(
+            "Target duration (in seconds of footage) of the frame chunks long strips "
+            "are split into, to be rendered by several workers (0: no split)"
+        ),
+        default=10.0,
+        min=0.0,
+        unit="TIME_ABSOLUTE",
+    )
+
     def draw(self, context):
         self.layout.prop(self, "shot_template_prefix")
+        self.layout.prop(self, "use_incremental_autosave")
+        row = self.layout.row()
+        row.active = self.use_incremental_autosave
+        row.prop(self, "incremental_autosave_interval")
+        col = self.layout.column(heading="Parallel Batch Render")
+        col.prop(self, "render_workers")
+        col.prop(self, "use_render_workers_cpu_affinity")
+        col.prop(self, "render_chunk_duration")
 
 
 def get_addon_prefs() -> SPASequencerAddonPreferences:
@@ -4,6 +4,7 @@
 from spa_sequencer.render import (
     props,
     ops,
+    parallel,
     ui,
 )
 
@@ -15,6 +16,7 @@ def register():
 
 
 def unregister():
+    parallel.unregister()
     props.unregister()
     ops.unregister()
     ui.unregister()
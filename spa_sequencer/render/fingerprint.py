@@ -0,0 +1,270 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Fingerprints of strip render inputs.
+
+A fingerprint hashes what contributes to a strip render: the content of the shot
+scene's datablocks, the rendered frame range and camera, the batch render options
+and the scene output settings. It is written in a sidecar file next to the rendered
+media, along with the rendered frame range, so that renders of unchanged strips can
+be skipped and trimmed strips only render their new frames.
+"""
+
+import hashlib
+import json
+import os
+from typing import NamedTuple, Optional
+
+import bpy
+import numpy as np
+
+from spa_sequencer.render.media import FrameRange
+from spa_sequencer.render.props import BatchRenderOptions
+from spa_sequencer.shot.core import SCENE_SETTINGS_STRUCTS
+from spa_sequencer.shot.dedup import (
+    DATABLOCK_HASHERS,
+    ID_IGNORED_PROPERTIES,
+    hash_buffer,
+    hash_node_tree,
+    hash_properties,
+)
+from spa_sequencer.shot.memory import walk_scene_memory_datablocks
+
+
+# Version of the fingerprint computation, to invalidate existing fingerprints.
+FINGERPRINT_VERSION = 4
+
+# Extension of the sidecar file storing a render's fingerprint.
+FINGERPRINT_FILE_EXTENSION = ".fingerprint"
+
+# Batch render options affecting the rendered media (frame handles only affect the
+# rendered frame range).
+RENDER_OPTIONS_PROPERTIES = (
+    "media_type",
+    "renderer",
+    "render_engine",
+    "resolution",
+)
+
+# Scene render settings overridden by the render task, hashed from render options.
+# NOTE: Output format settings are also initialized by Blender when the render task
+#       changes the file format, and would change with each render.
+RENDER_IGNORED_PROPERTIES = {
+    "filepath",
+    "engine",
+    "resolution_percentage",
+    "use_sequencer",
+    "image_settings",
+    "ffmpeg",
+}
+
+# Datablock properties that do not contribute to its content, including runtime
+# state (e.g. `is_runtime_data`, `is_evaluated`).
+DATABLOCK_IGNORED_PROPERTIES = ID_IGNORED_PROPERTIES | {
+    prop.identifier for prop in bpy.types.ID.bl_rna.properties
+}
+
+# Grease pencil stroke points properties: (foreach_get key, components, dtype).
+GPENCIL_POINT_BUFFERS = (
+    ("co", 3, np.float32),
+    ("pressure", 1, np.float32),
+    ("strength", 1, np.float32),
+    ("vertex_color", 4, np.float32),
+)
+
+# Grease pencil properties hashed from buffers (see `hash_gpencil`).
+GPENCIL_IGNORED_PROPERTIES = DATABLOCK_IGNORED_PROPERTIES | {"layers"}
+
+# Grease pencil layer properties that do not affect the render, or hashed from
+# buffers.
+GPENCIL_LAYER_IGNORED_PROPERTIES = {"select", "lock", "lock_frame", "frames"}
+
+
+# Node properties pointing to the datablocks a node uses.
+NODE_DATABLOCK_PROPERTIES = ("node_tree", "image", "texture")
+
+
+class RenderFingerprint(NamedTuple):
+    """The fingerprint of a rendered media."""
+
+    # Hash of the render inputs, frame range excluded.
+    content: str
+    # The rendered frame range.
+    frame_range: FrameRange
+
+
+def get_file_signature(filepath: str) -> Optional[tuple[int, int]]:
+    """Get the modification time and size of `filepath`, if it exists."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def hash_gpencil(hasher, gpencil: bpy.types.GreasePencil):
+    """Feed `hasher` with `gpencil`'s layers and strokes."""
+    for layer in gpencil.layers:
+        hasher.update(f"layer:{layer.info};".encode())
+        hash_properties(
+            hasher, layer, {}, GPENCIL_LAYER_IGNORED_PROPERTIES, nested=True
+        )
+        for frame in layer.frames:
+            hasher.update(f"frame:{frame.frame_number};".encode())
+            for stroke in frame.strokes:
+                hasher.update(f"stroke:{stroke.material_index};".encode())
+                for key, components, dtype in GPENCIL_POINT_BUFFERS:
+                    hash_buffer(hasher, stroke.points, key, components, dtype)
+
+
+def get_used_datablocks(datablock: bpy.types.ID) -> list[bpy.types.ID]:
+    """
+    Get the datablocks `datablock` uses that are not part of the scene content
+    (see `walk_scene_memory_datablocks`): materials of object material slots,
+    datablocks used by object modifiers and constraints (e.g. geometry nodes groups
+    or textures), and node groups, images and textures used by node trees.
+
+    :param datablock: The datablock to consider.
+    :return: The used datablocks, possibly with duplicates.
+    """
+    used = []
+    if isinstance(datablock, bpy.types.Object):
+        used += [slot.material for slot in datablock.material_slots if slot.material]
+        for item in (*datablock.modifiers, *datablock.constraints):
+            used += [
+                value
+                for prop in item.bl_rna.properties
+                if prop.type == "POINTER"
+                and isinstance(value := getattr(item, prop.identifier), bpy.types.ID)
+            ]
+    node_tree = (
+        datablock
+        if isinstance(datablock, bpy.types.NodeTree)
+        else getattr(datablock, "node_tree", None)
+    )
+    if node_tree:
+        used += [
+            value
+            for node in node_tree.nodes
+            for attr in NODE_DATABLOCK_PROPERTIES
+            if isinstance(value := getattr(node, attr, None), bpy.types.ID)
+        ]
+    if isinstance(image := getattr(datablock, "image", None), bpy.types.Image):
+        used.append(image)
+    return used
+
+
+def walk_used_datablocks(datablocks: list[bpy.types.ID]) -> list[bpy.types.ID]:
+    """
+    Get `datablocks` as well as the datablocks they use, recursively (see
+    `get_used_datablocks`).
+
+    :param datablocks: The datablocks to consider.
+    :return: The datablocks, without duplicates.
+    """
+    walked = dict.fromkeys(datablocks)
+    pending = list(walked)
+    while pending:
+        for used in get_used_datablocks(pending.pop(0)):
+            if used not in walked:
+                walked[used] = None
+                pending.append(used)
+    return list(walked)
+
+
+def hash_datablock(hasher, datablock: bpy.types.ID):
+    """Feed `hasher` with the content of `datablock`."""
+    hasher.update(f"{datablock.id_type}:{datablock.name_full};".encode())
+    if hash_func := DATABLOCK_HASHERS.get(datablock.id_type):
+        hasher.update(hash_func(datablock, {}))
+        return
+
+    if isinstance(datablock, bpy.types.GreasePencil):
+        hash_properties(
+            hasher, datablock, {}, GPENCIL_IGNORED_PROPERTIES, nested=True
+        )
+    else:
+        hash_properties(
+            hasher, datablock, {}, DATABLOCK_IGNORED_PROPERTIES, nested=True
+        )
+    if isinstance(datablock, bpy.types.Object):
+        for item in (*datablock.modifiers, *datablock.constraints):
+            hasher.update(f"{item.name}:{item.type};".encode())
+            hash_properties(hasher, item, {}, nested=True)
+    elif isinstance(datablock, bpy.types.GreasePencil):
+        hash_gpencil(hasher, datablock)
+    elif isinstance(datablock, bpy.types.Image):
+        filepath = bpy.path.abspath(datablock.filepath, library=datablock.library)
+        hasher.update(f"file:{get_file_signature(filepath)};".encode())
+    elif isinstance(datablock, bpy.types.World) and datablock.node_tree:
+        hash_node_tree(hasher, datablock.node_tree, {})
+    elif isinstance(datablock, bpy.types.NodeTree):
+        hash_node_tree(hasher, datablock, {})
+
+
+def compute_render_fingerprint(
+    scene: bpy.types.Scene,
+    camera: Optional[bpy.types.Object],
+    render_options: BatchRenderOptions,
+) -> str:
+    """
+    Compute the fingerprint of the render of `scene`, frame range excluded.
+
+    :param scene: The rendered scene.
+    :param camera: The camera used for the render.
+    :param render_options: The batch render options.
+    :return: The fingerprint, as an hexadecimal string.
+    """
+    hasher = hashlib.blake2b()
+    hasher.update(f"version:{FINGERPRINT_VERSION};".encode())
+    hasher.update(f"camera:{camera.name_full if camera else None};".encode())
+    for prop in RENDER_OPTIONS_PROPERTIES:
+        hasher.update(f"{prop}={getattr(render_options, prop)!r};".encode())
+
+    # Output settings.
+    for attr in SCENE_SETTINGS_STRUCTS:
+        ignored = RENDER_IGNORED_PROPERTIES if attr == "render" else frozenset()
+        hash_properties(hasher, getattr(scene, attr), {}, ignored, nested=True)
+    if cycles := getattr(scene, "cycles", None):
+        hash_properties(hasher, cycles, {}, nested=True)
+
+    # Scene content, and the datablocks it uses.
+    datablocks = walk_scene_memory_datablocks(scene)
+    if scene.world:
+        datablocks.append(scene.world)
+    for datablock in walk_used_datablocks(datablocks):
+        hash_datablock(hasher, datablock)
+
+    return hasher.hexdigest()
+
+
+def get_fingerprint_filepath(filepath: str) -> str:
+    """Get the fingerprint sidecar file of the media rendered at `filepath`."""
+    return f"{bpy.path.abspath(filepath)}{FINGERPRINT_FILE_EXTENSION}"
+
+
+def read_render_fingerprint(filepath: str) -> Optional[RenderFingerprint]:
+    """
+    Read the fingerprint of the media rendered at `filepath`.
+
+    :param filepath: The rendered media filepath, without extension.
+    :return: The fingerprint, or None if there is none.
+    """
+    try:
+        with open(get_fingerprint_filepath(filepath)) as f:
+            data = json.load(f)
+        return RenderFingerprint(data["content"], tuple(data["frame_range"]))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_render_fingerprint(filepath: str, fingerprint: RenderFingerprint):
+    """
+    Write the `fingerprint` of the media rendered at `filepath`.
+
+    :param filepath: The rendered media filepath, without extension.
+    :param fingerprint: The fingerprint to write.
+    """
+    with open(get_fingerprint_filepath(filepath), "w") as f:
+        json.dump(fingerprint._asdict(), f)
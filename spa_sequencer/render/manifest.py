@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Batch render manifest, to resume interrupted batch renders.
+
+The manifest lists the tasks of a batch render with their parameters and status. It
+is written next to the rendered media before starting to render, updated as tasks
+progress, and removed once the batch render has succeeded. If Blender crashes, the
+manifest is left behind and the batch render can be resumed from it: strips whose
+output media has been rendered from the same inputs are not rendered again, and
+interrupted image sequences are completed with their missing or incomplete images.
+Other tasks (output strips, sound strips...) only affected the crashed session and
+are run again.
+"""
+
+import json
+import os
+from typing import Any, Optional
+
+import bpy
+
+from spa_sequencer.render.parallel import ParallelStripsRenderTask
+from spa_sequencer.render.props import BatchRenderOptions
+from spa_sequencer.render.tasks import BaseTask, StripRenderTask
+
+
+# Version of the manifest format, to ignore incompatible manifests.
+MANIFEST_VERSION = 1
+
+# Suffix of manifest files, after the edit scene name.
+MANIFEST_FILE_SUFFIX = ".render_manifest.json"
+
+
+def get_task_id(task: BaseTask) -> str:
+    """Get the identifier of `task` in the manifest."""
+    return f"{type(task).__name__}:{task.name}"
+
+
+def get_task_parameters(
+    task: BaseTask, render_options: BatchRenderOptions
+) -> dict[str, Any]:
+    """Get the parameters of `task` to write in the manifest."""
+    if not isinstance(task, StripRenderTask):
+        return {}
+    return {
+        "scene": task.scene.name,
+        "output_filepath": bpy.path.abspath(
+            task.output_filepath or task.resolve_output_filepath(render_options)
+        ),
+        "frame_range": task.get_frame_range(render_options),
+        "fingerprint": task.fingerprint,
+    }
+
+
+class BatchRenderManifest:
+    """The manifest of a batch render's tasks."""
+
+    def __init__(
+        self,
+        filepath: str,
+        tasks: list[BaseTask],
+        render_options: BatchRenderOptions,
+    ):
+        """
+        :param filepath: The manifest filepath.
+        :param tasks: The tasks of the batch render, tracked until it ends.
+        :param render_options: The batch render options.
+        """
+        self.filepath = filepath
+        self.render_options = render_options
+        # Tasks with the task running them: strips rendered in parallel are listed
+        # individually, with the status of the parallel render task.
+        self.tasks: list[tuple[BaseTask, BaseTask]] = []
+        for task in tasks:
+            if isinstance(task, ParallelStripsRenderTask):
+                self.tasks.extend((strip_task, task) for strip_task in task.strip_tasks)
+            else:
+                self.tasks.append((task, task))
+
+    def write(self):
+        """Write the manifest with the current state of the tasks."""
+        data = {
+            "version": MANIFEST_VERSION,
+            "filepath": bpy.data.filepath,
+            "tasks": [
+                {
+                    "id": get_task_id(task),
+                    "type": type(task).__name__,
+                    "name": task.name,
+                    "status": runner.status.name,
+                    "parameters": get_task_parameters(task, self.render_options),
+                }
+                for task, runner in self.tasks
+            ],
+        }
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        # Write in a temporary file first, not to leave a corrupted manifest behind
+        # if interrupted while writing.
+        tmp_filepath = f"{self.filepath}.tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_filepath, self.filepath)
+
+    def remove(self):
+        """Remove the manifest file, if any."""
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+
+def read_manifest(filepath: str) -> Optional[dict[str, dict[str, Any]]]:
+    """
+    Read the tasks of the batch render manifest at `filepath`.
+
+    :param filepath: The manifest filepath.
+    :return: The tasks by identifier, or None if there is no compatible manifest.
+    """
+    try:
+        with open(filepath) as f:
+            data = json.load(f)
+        if data["version"] != MANIFEST_VERSION:
+            return None
+        return {task["id"]: task for task in data["tasks"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def resume_tasks(entries: dict[str, dict[str, Any]], tasks: list[BaseTask]):
+    """
+    Setup strip render `tasks` to resume the render of their manifest `entries`.
+
+    :param entries: The manifest tasks by identifier (see `read_manifest`).
+    :param tasks: The tasks of the batch render to resume.
+    """
+    for task in tasks:
+        if not isinstance(task, StripRenderTask):
+            continue
+        if entry := entries.get(get_task_id(task)):
+            task.resume_fingerprint = entry["parameters"].get("fingerprint", "")
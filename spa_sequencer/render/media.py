@@ -0,0 +1,314 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Rendered media utilities: frame ranges arithmetic and movies assembly.
+
+Movies are assembled by stream copy with ffmpeg's concat demuxer when the ffmpeg
+and ffprobe executables are available, and their segments can be concatenated
+without re-encoding. Otherwise, they are rendered again through the sequencer.
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Callable, NamedTuple, Optional
+
+import bpy
+
+from spa_sequencer.shot.core import copy_struct_properties
+
+log = logging.getLogger(__name__)
+
+
+FrameRange = tuple[int, int]
+
+# End of image marker of JPEG files.
+JPEG_EOI_MARKER = b"\xff\xd9"
+
+# Render settings defining a movie's format, besides its encoding.
+MOVIE_RENDER_PROPERTIES = (
+    "resolution_x",
+    "resolution_y",
+    "resolution_percentage",
+    "pixel_aspect_x",
+    "pixel_aspect_y",
+    "fps",
+    "fps_base",
+)
+
+
+# Stream properties that must match to concatenate movies by stream copy.
+MOVIE_STREAM_ENTRIES = (
+    "codec_type",
+    "codec_name",
+    "profile",
+    "width",
+    "height",
+    "pix_fmt",
+    "r_frame_rate",
+    "time_base",
+    "sample_rate",
+    "channels",
+)
+
+
+class MovieProbe(NamedTuple):
+    """The streams of a movie file, as reported by ffprobe."""
+
+    # The encoding of the movie's streams (see MOVIE_STREAM_ENTRIES).
+    encoding: tuple
+    # The number of frames of the movie's video stream.
+    frame_count: int
+
+
+class MovieSegment(NamedTuple):
+    """A range of frames within a movie file."""
+
+    # The movie filepath.
+    filepath: str
+    # The index of the first frame to use in the movie.
+    frame_offset: int
+    # The number of frames to use.
+    frame_count: int
+
+
+def get_missing_ranges(
+    previous_range: FrameRange, frame_range: FrameRange
+) -> Optional[list[FrameRange]]:
+    """
+    Get the frames of `frame_range` that are not part of `previous_range`.
+
+    :param previous_range: The frame range already available.
+    :param frame_range: The frame range required.
+    :return: The missing ranges (at most one before and one after `previous_range`)
+        or None if the ranges do not overlap.
+    """
+    start, end = frame_range
+    previous_start, previous_end = previous_range
+    if previous_start > end or previous_end < start:
+        return None
+    ranges = []
+    if start < previous_start:
+        ranges.append((start, previous_start - 1))
+    if end > previous_end:
+        ranges.append((previous_end + 1, end))
+    return ranges
+
+
+def is_image_complete(filepath: str) -> bool:
+    """
+    Whether the image file at `filepath` exists and has been completely written,
+    e.g. has not been truncated by a crash while writing it.
+
+    :param filepath: The absolute image filepath.
+    :return: Whether the image is complete.
+    """
+    try:
+        size = os.path.getsize(filepath)
+        if not size:
+            return False
+        if os.path.splitext(filepath)[1].lower() in {".jpg", ".jpeg"}:
+            with open(filepath, "rb") as f:
+                f.seek(-len(JPEG_EOI_MARKER), os.SEEK_END)
+                return f.read() == JPEG_EOI_MARKER
+    except OSError:
+        return False
+    return True
+
+
+def get_missing_image_ranges(
+    frame_range: FrameRange, get_filepath: Callable[[int], str]
+) -> list[FrameRange]:
+    """
+    Get the frame ranges of an image sequence whose images are missing or
+    incomplete (see `is_image_complete`).
+
+    :param frame_range: The frame range of the image sequence.
+    :param get_filepath: Get the absolute image filepath of a frame.
+    :return: The missing frame ranges, in order.
+    """
+    ranges = []
+    for frame in range(frame_range[0], frame_range[1] + 1):
+        if is_image_complete(get_filepath(frame)):
+            continue
+        if ranges and ranges[-1][1] == frame - 1:
+            ranges[-1] = (ranges[-1][0], frame)
+        else:
+            ranges.append((frame, frame))
+    return ranges
+
+
+def split_frame_range(frame_range: FrameRange, max_size: int) -> list[FrameRange]:
+    """
+    Split `frame_range` in chunks of at most `max_size` frames, of even sizes.
+
+    :param frame_range: The frame range to split.
+    :param max_size: The maximum number of frames of a chunk.
+    :return: The chunks, in order.
+    """
+    start, end = frame_range
+    count = end - start + 1
+    chunks_count = -(-count // max(max_size, 1))
+    chunks = []
+    for idx in range(chunks_count):
+        chunk_start = start + idx * count // chunks_count
+        chunk_end = start + (idx + 1) * count // chunks_count - 1
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def probe_movie(filepath: str) -> Optional[MovieProbe]:
+    """
+    Probe the streams of the movie at `filepath` with ffprobe.
+
+    :param filepath: The movie filepath.
+    :return: The movie's streams, or None if ffprobe is not available or failed.
+    """
+    if not (ffprobe := shutil.which("ffprobe")):
+        return None
+    args = [
+        ffprobe,
+        "-v",
+        "error",
+        "-count_packets",
+        "-show_entries",
+        f"stream={','.join(MOVIE_STREAM_ENTRIES)},nb_read_packets",
+        "-of",
+        "json",
+        filepath,
+    ]
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, check=True)
+        streams = json.loads(result.stdout)["streams"]
+        frame_count = next(
+            int(stream["nb_read_packets"])
+            for stream in streams
+            if stream.get("codec_type") == "video"
+        )
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+        return None
+    except StopIteration:
+        # The file has no video stream.
+        return None
+    encoding = tuple(
+        tuple(stream.get(entry) for entry in MOVIE_STREAM_ENTRIES) for stream in streams
+    )
+    return MovieProbe(encoding, frame_count)
+
+
+def concatenate_movies_stream_copy(segments: list[MovieSegment], filepath: str) -> bool:
+    """
+    Write the concatenation of movie `segments` in `filepath` without re-encoding,
+    using ffmpeg's concat demuxer. All streams, including audio, are kept.
+    This requires whole movies sharing the same encoding, since stream copy can
+    only cut movies on keyframes.
+
+    :param segments: The movie segments, in order.
+    :param filepath: The output movie filepath.
+    :return: Whether the movies could be concatenated.
+    """
+    if not (ffmpeg := shutil.which("ffmpeg")):
+        return False
+    probes = [probe_movie(segment.filepath) for segment in segments]
+    if any(
+        probe is None
+        or probe.encoding != probes[0].encoding
+        or segment.frame_offset
+        or segment.frame_count != probe.frame_count
+        for segment, probe in zip(segments, probes)
+    ):
+        return False
+
+    with tempfile.TemporaryDirectory(prefix="concatenate_movies_") as tmp_dir:
+        list_filepath = os.path.join(tmp_dir, "segments.txt")
+        with open(list_filepath, "w") as f:
+            for segment in segments:
+                path = os.path.abspath(segment.filepath).replace("'", "'\\''")
+                f.write(f"file '{path}'\n")
+        args = [
+            ffmpeg,
+            "-v",
+            "error",
+            "-y",
+            *("-f", "concat", "-safe", "0", "-i", list_filepath),
+            *("-map", "0", "-c", "copy"),
+            filepath,
+        ]
+        result = subprocess.run(args, capture_output=True, text=True)
+    if result.returncode:
+        log.warning("Movies stream copy failed, rendering them: %s", result.stderr)
+        return False
+    return True
+
+
+def concatenate_movies(
+    segments: list[MovieSegment], filepath: str, settings_scene: bpy.types.Scene
+):
+    """
+    Write the concatenation of movie `segments` in `filepath`, by stream copy if
+    possible (see `concatenate_movies_stream_copy`), otherwise using the sequencer.
+
+    :param segments: The movie segments, in order.
+    :param filepath: The output movie filepath.
+    :param settings_scene: The scene to use the render settings (resolution, frame
+        rate and encoding) of, when rendering the movie.
+    """
+    if concatenate_movies_stream_copy(segments, filepath):
+        return
+
+    scene = bpy.data.scenes.new("CONCATENATE_MOVIES")
+    try:
+        src, dst = settings_scene.render, scene.render
+        for attr in MOVIE_RENDER_PROPERTIES:
+            setattr(dst, attr, getattr(src, attr))
+        dst.image_settings.file_format = src.image_settings.file_format
+        copy_struct_properties(src.ffmpeg, dst.ffmpeg)
+        scene.render.use_sequencer = True
+        scene.render.filepath = filepath
+        # Segments are already display referred: don't apply a view transform again.
+        scene.view_settings.view_transform = "Standard"
+        sed = scene.sequence_editor_create()
+
+        # Movies encoding audio have their sound added, as sound strips.
+        with_audio = dst.ffmpeg.audio_codec != "NONE"
+
+        frame = 1
+        for idx, segment in enumerate(segments):
+            # Alternate channels as movies overlap each other until they are trimmed.
+            strips = [
+                sed.sequences.new_movie(
+                    name=f"segment_{idx}",
+                    filepath=segment.filepath,
+                    channel=1 + idx % 2,
+                    frame_start=frame - segment.frame_offset,
+                )
+            ]
+            if with_audio:
+                try:
+                    strips.append(
+                        sed.sequences.new_sound(
+                            name=f"segment_{idx}_sound",
+                            filepath=segment.filepath,
+                            channel=3 + idx % 2,
+                            frame_start=frame - segment.frame_offset,
+                        )
+                    )
+                except RuntimeError as e:
+                    log.warning("Sound of %s not concatenated: %s", segment.filepath, e)
+            for strip in strips:
+                strip.frame_offset_start = segment.frame_offset
+                strip.frame_offset_end = (
+                    strip.frame_duration - segment.frame_offset - segment.frame_count
+                )
+            frame += segment.frame_count
+
+        scene.frame_start = 1
+        scene.frame_end = frame - 1
+        with bpy.context.temp_override(scene=scene):
+            bpy.ops.render.render("EXEC_DEFAULT", animation=True)
+    finally:
+        bpy.data.scenes.remove(scene)
@@ -2,11 +2,21 @@
 # Copyright (C) 2023, The SPA Studios. All rights reserved.
 
 import functools
+import os
 from typing import Optional
 import traceback
 
 import bpy
 
+from spa_sequencer.render.manifest import (
+    MANIFEST_FILE_SUFFIX,
+    BatchRenderManifest,
+    read_manifest,
+    resume_tasks,
+)
+from spa_sequencer.render.parallel import ParallelStripsRenderTask
+from spa_sequencer.render.scheduler import get_dependent_tasks, get_ready_task
+from spa_sequencer.render.stats import BatchRenderStats
 from spa_sequencer.render.tasks import (
     BaseRenderTask,
     BaseTask,
@@ -34,6 +44,58 @@ def close_window(window: bpy.types.Window):
         bpy.ops.wm.window_close("INVOKE_DEFAULT")
 
 
+class ModalWakeUp:
+    """
+    Wake a modal operator up as soon as a render completes, instead of waiting for
+    its next periodic timer event: `render_complete` schedules an application timer
+    adding a short interval event timer to the operator's window, which keeps on
+    firing until put back to sleep (e.g. until the next render has started).
+    """
+
+    # Interval of the wake up timer events, in seconds.
+    INTERVAL = 0.01
+
+    def __init__(
+        self, window_manager: bpy.types.WindowManager, window: bpy.types.Window
+    ):
+        self.window_manager = window_manager
+        self.window = window
+        self.timer: Optional[bpy.types.Timer] = None
+        self.handlers_registered = False
+
+    def on_render_complete(self, *args):
+        """Callback for `render_complete` handler."""
+        # Render handlers are not the place to add event timers: defer it.
+        if not bpy.app.timers.is_registered(self.wake):
+            bpy.app.timers.register(self.wake, first_interval=0)
+
+    def wake(self):
+        """Start sending timer events to the operator."""
+        if not self.timer and self.handlers_registered:
+            self.timer = self.window_manager.event_timer_add(
+                self.INTERVAL, window=self.window
+            )
+
+    def sleep(self):
+        """Stop sending timer events to the operator."""
+        if self.timer:
+            self.window_manager.event_timer_remove(self.timer)
+            self.timer = None
+
+    def register(self):
+        bpy.app.handlers.render_complete.append(self.on_render_complete)
+        self.handlers_registered = True
+
+    def unregister(self):
+        if not self.handlers_registered:
+            return
+        bpy.app.handlers.render_complete.remove(self.on_render_complete)
+        self.handlers_registered = False
+        if bpy.app.timers.is_registered(self.wake):
+            bpy.app.timers.unregister(self.wake)
+        self.sleep()
+
+
 class SEQUENCER_OT_batch_render(bpy.types.Operator):
     bl_idname = "sequencer.batch_render"
     bl_label = "Sequencer Batch Render"
@@ -42,6 +104,16 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
 
     RENDER_WINDOW_WIDTH = 1080
 
+    resume: bpy.props.BoolProperty(
+        name="Resume",
+        description=(
+            "Resume the interrupted batch render of this scene from its manifest, "
+            "skipping strips already rendered"
+        ),
+        default=False,
+        options={"SKIP_SAVE"},
+    )
+
     def __init__(self):
         self.tasks: list[BaseTask] = []
         self.active_task: Optional[BaseTask] = None
@@ -50,11 +122,22 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         self.output_sound_strips: list[bpy.types.SoundSequence] = []
 
         self.cancelled: bool = False
+        # Tasks which did not finish, with the reason why.
+        self.failed_tasks: list[tuple[BaseTask, str]] = []
+
+        # Render timings of the tasks.
+        self.stats: BatchRenderStats = BatchRenderStats()
+        # Render timings report filepath, without extension (no report if empty).
+        self.report_filepath: str = ""
+        # Manifest of the tasks, to resume the batch render if interrupted.
+        self.manifest: Optional[BatchRenderManifest] = None
 
         # The temporary render view window
         self.render_window: Optional[bpy.types.Window] = None
         # An event timer used to trigger automatic updates when rendering
         self.render_event_timer: Optional[bpy.types.Timer] = None
+        # Wakes the modal loop up to move on to the next task when a render ends.
+        self.wake_up: Optional[ModalWakeUp] = None
 
         # Global overrides made for rendering
         self.global_overrides: ValueOverrides = ValueOverrides()
@@ -92,8 +175,11 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         ]
 
         # Create render tasks
-        for seq in sorted(seqs, key=lambda x: x.frame_final_start):
-            self.tasks.append(StripRenderTask(strip=seq, is_modal=render_op_invoke))
+        strip_tasks = [
+            StripRenderTask(strip=seq, is_modal=render_op_invoke)
+            for seq in sorted(seqs, key=lambda x: x.frame_final_start)
+        ]
+        self.tasks.extend(strip_tasks)
 
         # Early return if output scene is not set.
         if not (output_scene := self.render_options.output_scene):
@@ -134,13 +220,37 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
             output_scene.sequence_editor_create()
 
         if self.tasks:
-            if self.render_options.output_scene:
-                self.tasks.append(FitResolutionToContentTask(scene=output_scene))
+            # Output scene content is made of strip renders' output media.
+            self.tasks.append(
+                FitResolutionToContentTask(
+                    scene=output_scene, dependencies=list(strip_tasks)
+                )
+            )
+            # Output scene render needs all its content (media, sounds...).
             if self.render_options.render_output_scene:
                 self.tasks.append(
-                    SequenceRenderTask(scene=output_scene, is_modal=render_op_invoke)
+                    SequenceRenderTask(
+                        scene=output_scene,
+                        is_modal=render_op_invoke,
+                        dependencies=list(self.tasks),
+                    )
                 )
 
+    def get_output_directory(self) -> str:
+        """Get the common directory of rendered media, where batch render files
+        (report, manifest) are written."""
+        directories = [
+            os.path.dirname(
+                bpy.path.abspath(
+                    task.output_filepath
+                    or task.resolve_output_filepath(self.render_options)
+                )
+            )
+            for task in self.tasks
+            if isinstance(task, StripRenderTask)
+        ]
+        return os.path.commonpath(directories) if directories else ""
+
     def render_view_update(self):
         """Ensure render view displays the entire image."""
         # Render window only has one Image Editor area.
@@ -166,6 +276,10 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
             return {"CANCELLED"}
 
         self.render_props.status = "RUNNING"
+        self.wake_up = ModalWakeUp(
+            context.window_manager, self.render_window or context.window
+        )
+        self.wake_up.register()
         # Start the modal loop.
         context.window_manager.modal_handler_add(self)
         return {"RUNNING_MODAL"}
@@ -179,10 +293,43 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
             self.render_props.status = "CANCELLED"
             return False
 
+        output_directory = self.get_output_directory()
+        manifest_filepath = (
+            os.path.join(output_directory, f"{self.scene.name}{MANIFEST_FILE_SUFFIX}")
+            if output_directory
+            else ""
+        )
+        if self.resume:
+            if (entries := read_manifest(manifest_filepath)) is None:
+                self.report(
+                    {"WARNING"},
+                    f"No interrupted batch render to resume in {context.scene.name}",
+                )
+                self.render_props.status = "CANCELLED"
+                return False
+            resume_tasks(entries, self.tasks)
+
         # Disable synchronization while rendering to avoid issues with
         # conflicting frame change callbacks behaviors.
         self.global_overrides.set(get_sync_settings(), "enabled", False)
 
+        if self.render_options.write_report and output_directory:
+            self.report_filepath = os.path.join(
+                output_directory, f"{self.scene.name}.render_report"
+            )
+
+        if (
+            self.render_options.use_parallel_render
+            and self.render_options.renderer == "INTERNAL"
+        ):
+            self.setup_parallel_render()
+
+        if manifest_filepath:
+            self.manifest = BatchRenderManifest(
+                manifest_filepath, self.tasks, self.render_options
+            )
+            self.manifest.write()
+
         if any(
             isinstance(task, (SequenceRenderTask, StripRenderTask))
             for task in self.tasks
@@ -197,9 +344,45 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
                 task.viewport_window = self.render_viewport_window
                 task.output_channel_offset = self.output_channel_offset
 
+        # Without render window, use a timer on the current window to monitor
+        # asynchronous tasks without any user events.
+        if self.options.is_invoke and not self.render_event_timer:
+            self.render_event_timer = context.window_manager.event_timer_add(
+                0.5, window=context.window
+            )
+
         self.render_props.task_count = len(self.tasks)
+        self.stats.start(
+            sum(task.get_frame_count(self.render_options) for task in self.tasks)
+        )
+        self.stats.update_runtime_props(self.render_props)
         return True
 
+    def setup_parallel_render(self):
+        """Group strip render tasks to render them in parallel in background
+        processes."""
+        strip_tasks = [t for t in self.tasks if isinstance(t, StripRenderTask)]
+        if not strip_tasks:
+            return
+
+        for task in strip_tasks:
+            task.output_channel_offset = self.output_channel_offset
+        parallel_task = ParallelStripsRenderTask(
+            strip_tasks=strip_tasks, is_modal=self.options.is_invoke, stats=self.stats
+        )
+        # Parallel render task replaces the strip render tasks, in the same order
+        # and as a dependency of other tasks.
+        index = next(i for i, t in enumerate(self.tasks) if t is strip_tasks[0])
+        self.tasks = [t for t in self.tasks if not isinstance(t, StripRenderTask)]
+        self.tasks.insert(index, parallel_task)
+        for task in self.tasks:
+            if any(isinstance(dep, StripRenderTask) for dep in task.dependencies):
+                task.dependencies = [
+                    dep
+                    for dep in task.dependencies
+                    if not isinstance(dep, StripRenderTask)
+                ] + [parallel_task]
+
     def setup_render_window(self, context: bpy.types.Context):
         """
         Setup render window and any required change in the UI for this operator to run.
@@ -272,24 +455,25 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
 
         # Add a periodical timer event to ensure modal operator is evaluated
         # without any user events.
-        # The chosen interval of 0.5 seconds is a good trade-off to get feedback without
-        # perceiving waiting time in between 2 tasks or at the end of the process.
+        # Tasks are chained on render completion (see `ModalWakeUp`): this timer
+        # is a fallback and only needs to be frequent enough to give feedback.
         self.render_event_timer = context.window_manager.event_timer_add(
             0.5, window=self.render_window
         )
 
     def close_render_window(self, context: bpy.types.Context):
         """Close the render view and restore any UI changes made for rendering."""
+        # Remove event timer
+        if self.render_event_timer:
+            context.window_manager.event_timer_remove(self.render_event_timer)
+            self.render_event_timer = None
+
         if not self.render_window:
             return
 
         # Restore changes mades to the area
         self.space_overrides.revert()
 
-        # Remove event timer
-        context.window_manager.event_timer_remove(self.render_event_timer)
-        self.render_event_timer = None
-
         # Delay closing of render window to the next event loop (using a small interval of .1)
         # for report message to be displayed and operator to finish correctly.
         bpy.app.timers.register(
@@ -303,16 +487,39 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         report_level = "INFO"
 
         try:
-            # Consume task and evalute its status.
-            self.consume_task_async(context)
-            if self.active_task:
-                # Task has been cancelled, cancel batch render.
+            # Background processes are cancelled from the main window.
+            if event.type == "ESC" and isinstance(
+                self.active_task, ParallelStripsRenderTask
+            ):
+                raise RenderCancelled()
+            # Consume tasks and evaluate their status.
+            while True:
+                try:
+                    self.consume_task_async(context)
+                except Exception:
+                    # Task failures only affect the tasks depending on it.
+                    if self.fail_active_task(traceback.format_exc()):
+                        continue
+                    raise
+                if not self.active_task:
+                    break
+                # Task has been cancelled by the user, cancel batch render.
                 if self.active_task.status == TaskStatus.CANCELLED:
                     raise RenderCancelled()
-                # Task has finished, clear it.
+                # Task has finished: clear it and move on to the next one right away.
                 if self.active_task.status == TaskStatus.FINISHED:
                     self.clear_active_task()
+                    continue
                 # Otherwise, keep running modally.
+                break
+            self.update_progress(context)
+            if self.active_task:
+                # A task that failed to start is retried on next wake up event,
+                # a running one wakes the operator up when its render completes.
+                if self.active_task.status == TaskStatus.PENDING:
+                    self.wake_up.wake()
+                else:
+                    self.wake_up.sleep()
                 return {"RUNNING_MODAL"}
         except RenderCancelled:
             message = "Batch render cancelled by user."
@@ -326,6 +533,14 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         # Batch rendering has finished, cleanup remaining tasks if any.
         self.cleanup()
 
+        if status == "FINISHED" and self.failed_tasks:
+            message = self.get_failed_tasks_report()
+            report_level = "ERROR"
+            status = "CANCELLED"
+        # Nothing left to resume.
+        if status == "FINISHED" and self.manifest:
+            self.manifest.remove()
+
         # Report operator result based on status
         self.report({report_level}, message)
         # Close render window
@@ -336,6 +551,15 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
 
         return {status}
 
+    def update_progress(self, context: bpy.types.Context):
+        """Update the batch render progress and redraw the sequencer's sidebars
+        displaying it."""
+        self.stats.update_runtime_props(self.render_props)
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == "SEQUENCE_EDITOR":
+                    area.tag_redraw()
+
     def consume_task_async(self, context: bpy.types.Context):
         """Asynchronously consume next task in queue."""
 
@@ -353,6 +577,7 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
 
         # Active task is still running.
         elif self.active_task.status == TaskStatus.RUNNING:
+            self.active_task.update(context)
             if isinstance(self.active_task, BaseRenderTask):
                 # Ensure the entire rendered image is visible in the render window.
                 self.render_view_update()
@@ -370,11 +595,39 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         self.setup_next_task(context)
         # Run the task.
         self.start_active_task(context)
+        # Task has been cancelled by the user, cancel batch render.
+        if self.active_task.status == TaskStatus.CANCELLED:
+            raise RenderCancelled()
         # Trigger task's post-run process.
-        self.active_task.post_run(context, self.render_options)
+        if self.active_task.status == TaskStatus.FINISHED:
+            self.active_task.post_run(context, self.render_options)
         # Clear active task.
         self.clear_active_task()
 
+    def fail_active_task(self, error: str) -> bool:
+        """
+        Mark the active task as failed with `error` and clear it, so that only the
+        tasks depending on it are skipped.
+
+        :param error: The error message.
+        :return: Whether there was an active task.
+        """
+        if not self.active_task:
+            return False
+        self.active_task.status = TaskStatus.FAILED
+        self.failed_tasks.append((self.active_task, error))
+        self.clear_active_task()
+        return True
+
+    def get_failed_tasks_report(self) -> str:
+        """Get the report message of the tasks which did not finish."""
+        lines = [
+            f"Batch render finished with {len(self.failed_tasks)} task(s) not done:"
+        ]
+        for task, reason in self.failed_tasks:
+            lines.append(f" - {task.name} ({task.status.name.lower()}): {reason}")
+        return "\n".join(lines)
+
     def execute(self, context: bpy.types.Context):
         # If operator has been invoked, it should have ran modally.
         if self.options.is_invoke:
@@ -395,7 +648,14 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         while self.tasks:
             try:
                 self.consume_task_sync(context)
+            except RenderCancelled:
+                self.report({"WARNING"}, "Batch render cancelled by user.")
+                self.cancel(context)
+                return {"CANCELLED"}
             except Exception as e:
+                # Task failures only affect the tasks depending on it.
+                if self.fail_active_task(traceback.format_exc()):
+                    continue
                 self.report(
                     {"ERROR"}, f"Batch Render failed. \n{traceback.format_exc()}"
                 )
@@ -403,13 +663,20 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
                 return {"CANCELLED"}
 
         self.cleanup()
+        if self.failed_tasks:
+            self.render_props.status = "CANCELLED"
+            self.report({"ERROR"}, self.get_failed_tasks_report())
+            return {"CANCELLED"}
+        if self.manifest:
+            self.manifest.remove()
         self.render_props.status = "FINISHED"
         self.report({"INFO"}, "Batch render done!")
         return {"FINISHED"}
 
     def setup_next_task(self, context):
         """
-        Setup the context for the next task in the tasks list.
+        Setup the context for the next task in the tasks list whose dependencies
+        have finished.
         After this call:
           - this task won't be in the tasks list anymore.
           - `self.active_task` will be set to this task.
@@ -417,9 +684,22 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         if self.active_task or not self.tasks:
             return
 
-        self.active_task = self.tasks.pop(0)
-
+        if not (task := get_ready_task(self.tasks)):
+            raise RuntimeError("Batch render tasks have circular dependencies")
+        self.tasks = [t for t in self.tasks if t is not task]
+        self.active_task = task
+
+        scene = getattr(task, "scene", None)
+        self.stats.start_task(
+            task.name,
+            type(task).__name__,
+            task.get_frame_count(self.render_options),
+            scene.name if scene else "",
+        )
         self.active_task.setup(context, self.render_options)
+        # Task parameters (e.g. render fingerprints) are known once setup.
+        if self.manifest:
+            self.manifest.write()
 
     def start_active_task(self, context):
         """Start the active task."""
@@ -438,18 +718,40 @@ class SEQUENCER_OT_batch_render(bpy.types.Operator):
         """Unassign and clear active task by restoring overriden values."""
         if not self.active_task:
             return
-        self.active_task.teardown()
+        task = self.active_task
+        self.stats.end_task(task.status.name)
+        task.teardown()
         # Unassign active task
         self.active_task = None
         # Decrease global task count.
         self.render_props.task_count -= 1
 
+        if task.status == TaskStatus.FAILED:
+            self.skip_dependent_tasks(task)
+        if self.manifest:
+            self.manifest.write()
+
+    def skip_dependent_tasks(self, task: BaseTask):
+        """Skip the tasks depending on `task`, which failed."""
+        for dependent in get_dependent_tasks(self.tasks, task):
+            dependent.status = TaskStatus.SKIPPED
+            self.failed_tasks.append((dependent, f"depends on {task.name}"))
+            self.tasks = [t for t in self.tasks if t is not dependent]
+            self.render_props.task_count -= 1
+
     def cleanup(self):
         """Clear all tasks, unregister app handlers and reset any override applied
         to the scene."""
         self.clear_tasks()
         # Revert global overrides
         self.global_overrides.revert()
+        if self.wake_up:
+            self.wake_up.unregister()
+
+        self.stats.stop()
+        self.stats.update_runtime_props(self.render_props)
+        if self.report_filepath:
+            self.stats.write_report(self.report_filepath)
 
 
 classes = (SEQUENCER_OT_batch_render,)
@@ -0,0 +1,613 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Parallel batch render.
+
+Strip render tasks are dispatched to a pool of long-lived background Blender
+processes (workers). Each worker loads the file to render once and then takes render
+jobs over a line-based JSON protocol on its standard input, reporting back on its
+standard output. Workers are kept warm between batch renders and only reload when
+the file to render changes. Post-render steps (callbacks, output strips...) still
+happen in the main instance, once all jobs are done.
+
+This module can also be used as a background mode entry point, rendering edit
+scenes with a pool of workers:
+
+    blender -b edit.blend --python parallel.py -- --scene EDIT --workers 8
+
+Interrupted batch renders can be resumed with `--resume` (see `render.manifest`).
+"""
+
+import argparse
+import collections
+import functools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple, Optional
+
+import bpy
+
+from spa_sequencer.preferences import get_addon_prefs
+from spa_sequencer.render.media import FrameRange, split_frame_range
+from spa_sequencer.render.props import BatchRenderOptions
+from spa_sequencer.render.stats import BatchRenderStats, TaskStats
+from spa_sequencer.render.tasks import BaseTask, StripRenderTask, TaskStatus
+from spa_sequencer.sync.core import get_sync_settings
+from spa_sequencer.utils import get_background_blender_args
+
+
+# Prefix of the lines printed by workers to send events to the main instance.
+WORKER_EVENT_PREFIX = "BATCH_RENDER_WORKER:"
+
+# Number of worker output lines kept for error reporting.
+WORKER_OUTPUT_MAX_LINES = 50
+
+# Interval between two workers status checks when waiting for them, in seconds.
+WORKER_POLL_INTERVAL = 0.05
+
+# Time given to workers to quit before killing them, in seconds.
+WORKER_QUIT_TIMEOUT = 5.0
+
+
+class RenderJob(NamedTuple):
+    """A strip render job sent to a worker."""
+
+    # The name of the strip to render.
+    strip: str
+    # The absolute output media filepath, without extension.
+    filepath: str
+    # The scene frame range to render.
+    frame_range: FrameRange
+
+    @property
+    def frame_count(self) -> int:
+        return self.frame_range[1] - self.frame_range[0] + 1
+
+
+class FileSignature(NamedTuple):
+    """Identifies the state of a file on disk."""
+
+    filepath: str
+    mtime: int
+    size: int
+
+    @classmethod
+    def from_file(cls, filepath: str) -> "FileSignature":
+        stat = os.stat(filepath)
+        return cls(os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+
+
+def get_available_cpus() -> list[int]:
+    """Get the CPU cores available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def get_workers_cpu_sets(workers: int) -> list[set[int]]:
+    """
+    Split available CPU cores into `workers` contiguous subsets.
+    If there are more workers than cores, cores are shared.
+
+    :param workers: The number of workers.
+    :return: The CPU cores of each worker.
+    """
+    cpus = get_available_cpus()
+    size = max(len(cpus) // workers, 1)
+    return [
+        set(cpus[idx * size : (idx + 1) * size]) or {cpus[idx % len(cpus)]}
+        for idx in range(workers)
+    ]
+
+
+def get_chunk_size(scene: bpy.types.Scene) -> int:
+    """Get the maximum number of frames of the chunks `scene`'s renders are split
+    into, or 0 if they should not be split."""
+    duration = get_addon_prefs().render_chunk_duration
+    if not duration:
+        return 0
+    return max(round(duration * scene.render.fps / scene.render.fps_base), 1)
+
+
+def get_available_memory() -> Optional[int]:
+    """Get the available physical memory in bytes, if supported."""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def get_process_memory() -> Optional[int]:
+    """Get the peak physical memory used by this process in bytes, if supported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Expressed in bytes on macOS, in kilobytes elsewhere.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def get_auto_workers_count() -> int:
+    """
+    Get the number of workers fitting in available CPU cores and memory, each
+    worker being expected to use as much memory as this process.
+    """
+    workers = len(get_available_cpus())
+    available_memory = get_available_memory()
+    process_memory = get_process_memory()
+    if available_memory is not None and process_memory:
+        workers = min(workers, available_memory // process_memory)
+    return workers
+
+
+def get_workers_count(job_count: int) -> int:
+    """Get the number of workers to use to render `job_count` jobs."""
+    workers = get_addon_prefs().render_workers or get_auto_workers_count()
+    return max(min(workers, job_count), 1)
+
+
+def send_worker_event(event: str, **data: Any):
+    """Send an event to the main instance, from a worker."""
+    print(f"{WORKER_EVENT_PREFIX}{json.dumps({'event': event, **data})}", flush=True)
+
+
+class RenderWorker:
+    """
+    A long-lived background Blender process rendering jobs sent on its standard
+    input.
+    """
+
+    def __init__(self, filepath: str, cpu_set: Optional[set[int]] = None):
+        """
+        :param filepath: The file to load at startup.
+        :param cpu_set: The CPU cores to bind the worker to, if supported.
+        """
+        self.cpu_set = cpu_set
+        self.signature = FileSignature.from_file(filepath)
+        # Whether the file is loaded and the worker waiting for jobs.
+        self.ready = False
+        # The job being rendered.
+        self.job: Optional[RenderJob] = None
+        # The render timings of the jobs done, not collected yet.
+        self.jobs_stats: collections.deque[TaskStats] = collections.deque()
+        # The failed jobs with their error, not collected yet.
+        self.failed_jobs: collections.deque[tuple[RenderJob, str]] = (
+            collections.deque()
+        )
+        self.output: collections.deque[str] = collections.deque(
+            maxlen=WORKER_OUTPUT_MAX_LINES
+        )
+
+        blender_args = []
+        preexec_fn = None
+        if cpu_set:
+            blender_args = ["--threads", str(len(cpu_set))]
+            if hasattr(os, "sched_setaffinity"):
+                preexec_fn = functools.partial(os.sched_setaffinity, 0, cpu_set)
+        args = get_background_blender_args(
+            filepath,
+            "from spa_sequencer.render.parallel import main; main()",
+            ["--worker"],
+            blender_args,
+        )
+        self.process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            preexec_fn=preexec_fn,
+        )
+        # Read worker's output in a thread to never block the main instance.
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        for line in self.process.stdout:
+            # Events might be appended to a partial line from Blender's own output.
+            if (idx := line.find(WORKER_EVENT_PREFIX)) == -1:
+                self.output.append(line)
+                continue
+            try:
+                message = json.loads(line[idx + len(WORKER_EVENT_PREFIX) :])
+            except ValueError:
+                # Event interleaved with another output, keep it for error reporting.
+                self.output.append(line)
+                continue
+            if message["event"] == "ready":
+                self.ready = True
+            elif message["event"] == "failed" and self.job:
+                self.failed_jobs.append((self.job, message["error"]))
+                self.job = None
+            elif message["event"] == "done":
+                self.jobs_stats.append(TaskStats.from_dict(message["stats"]))
+                self.job = None
+
+    def _send(self, command: str, **data: Any):
+        self.process.stdin.write(json.dumps({"command": command, **data}) + "\n")
+        self.process.stdin.flush()
+
+    @property
+    def is_running(self) -> bool:
+        return self.process.poll() is None
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the worker is running and its events are still received."""
+        return self.is_running and self._reader.is_alive()
+
+    @property
+    def is_idle(self) -> bool:
+        return self.is_alive and self.ready and not self.job
+
+    def is_outdated(self, filepath: str) -> bool:
+        """Whether `filepath` differs from the file loaded by the worker."""
+        return FileSignature.from_file(filepath) != self.signature
+
+    def load(self, filepath: str):
+        """Load `filepath` in the worker."""
+        self.signature = FileSignature.from_file(filepath)
+        self.ready = False
+        self._send("load", filepath=filepath)
+
+    def render(self, scene: str, job: RenderJob):
+        """Render `job` from `scene` in the worker."""
+        self.job = job
+        self._send("render", scene=scene, job=job)
+
+    def stop(self):
+        """Ask the worker to quit, killing it if it does not."""
+        if self.is_running:
+            try:
+                self._send("quit")
+                self.process.wait(WORKER_QUIT_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+    def kill(self):
+        """Stop the worker immediately if still running."""
+        if self.is_running:
+            self.process.kill()
+        self.process.wait()
+        self._reader.join()
+
+
+class RenderWorkerPool:
+    """The pool of render workers, kept warm between batch renders."""
+
+    def __init__(self):
+        self.workers: list[RenderWorker] = []
+
+    def acquire(
+        self, filepath: str, cpu_sets: list[Optional[set[int]]]
+    ) -> list[RenderWorker]:
+        """
+        Get one worker per CPU set, with `filepath` loaded.
+        Running workers are reused and only reload `filepath` if it has changed.
+
+        :param filepath: The file to render.
+        :param cpu_sets: The CPU cores of each worker.
+        :return: The workers.
+        """
+        # Workers still rendering a job (e.g. from a cancelled render) are not reused.
+        available = [w for w in self.workers if w.is_alive and not w.job]
+        for worker in self.workers:
+            if worker not in available:
+                worker.kill()
+
+        workers = []
+        for cpu_set in cpu_sets:
+            worker = next((w for w in available if w.cpu_set == cpu_set), None)
+            if worker:
+                available.remove(worker)
+                if worker.is_outdated(filepath):
+                    worker.load(filepath)
+            else:
+                worker = RenderWorker(filepath, cpu_set)
+            workers.append(worker)
+
+        # Stop workers that are not needed anymore.
+        for worker in available:
+            worker.stop()
+        self.workers = workers
+        return workers
+
+    def shutdown(self):
+        """Stop all the workers."""
+        for worker in self.workers:
+            worker.stop()
+        self.workers.clear()
+
+
+_render_worker_pool = RenderWorkerPool()
+
+
+def get_render_worker_pool() -> RenderWorkerPool:
+    """Return the RenderWorkerPool instance."""
+    return _render_worker_pool
+
+
+@dataclass
+class ParallelStripsRenderTask(BaseTask):
+    """Render strip tasks in parallel, using the pool of render workers."""
+
+    # The strip render tasks to run in parallel.
+    strip_tasks: list[StripRenderTask] = field(default_factory=list)
+    # Whether the task runs asynchronously.
+    is_modal: bool = True
+    # The workers rendering the jobs.
+    workers: list[RenderWorker] = field(default_factory=list)
+    # The jobs not yet sent to workers.
+    pending_jobs: collections.deque[RenderJob] = field(
+        default_factory=collections.deque
+    )
+    # The number of jobs to render.
+    jobs_count: int = 0
+    # Name of the scene the strips belong to.
+    scene_name: str = ""
+    # Directory holding the file snapshot.
+    tmp_dir: str = ""
+    # The batch render timings to add the jobs timings to.
+    stats: Optional[BatchRenderStats] = None
+    # The error of the strips whose render failed, by strip name.
+    failed_strips: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def done_jobs_count(self) -> int:
+        running = sum(1 for worker in self.workers if worker.job)
+        return self.jobs_count - len(self.pending_jobs) - running
+
+    def get_frame_count(self, render_options: BatchRenderOptions) -> int:
+        return sum(task.get_frame_count(render_options) for task in self.strip_tasks)
+
+    def setup(self, context: bpy.types.Context, render_options: BatchRenderOptions):
+        self.tmp_dir = tempfile.mkdtemp(prefix="batch_render_")
+        for task in self.strip_tasks:
+            task.fingerprint = task.compute_fingerprint(render_options)
+
+    def get_render_filepath(self) -> str:
+        """Get the file workers should render, saving a snapshot of the current
+        state if it has unsaved changes."""
+        if bpy.data.filepath and not bpy.data.is_dirty:
+            return bpy.data.filepath
+        snapshot = os.path.join(self.tmp_dir, "snapshot.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=snapshot, copy=True, relative_remap=True)
+        return snapshot
+
+    def run(self, context: bpy.types.Context, render_options: BatchRenderOptions):
+        jobs = []
+        for task in self.strip_tasks:
+            task.plan = task.plan_render(render_options, task.fingerprint)
+            if task.plan.is_up_to_date(render_options):
+                continue
+            # Split long frame ranges in chunks, to render them on several workers.
+            chunk_size = get_chunk_size(task.scene)
+            task.chunk_ranges = [
+                chunk
+                for frame_range in task.plan.render_ranges
+                for chunk in (
+                    split_frame_range(frame_range, chunk_size)
+                    if chunk_size
+                    else [frame_range]
+                )
+            ]
+            # Resolve output paths in the main instance, as relative paths and file
+            # name variables would be resolved from the snapshot in workers.
+            filepath = bpy.path.abspath(task.resolve_output_filepath(render_options))
+            jobs.extend(
+                RenderJob(task.strip.name, filepath, chunk)
+                for chunk in task.chunk_ranges
+            )
+        self.jobs_count = len(jobs)
+        if not jobs:
+            self.status = TaskStatus.FINISHED
+            return
+
+        filepath = self.get_render_filepath()
+        # Longest jobs are dispatched first to balance workers load.
+        self.pending_jobs.extend(sorted(jobs, key=lambda job: -job.frame_count))
+        self.scene_name = self.strip_tasks[0].strip.id_data.name
+
+        workers = get_workers_count(len(jobs))
+        cpu_sets = (
+            get_workers_cpu_sets(workers)
+            if get_addon_prefs().use_render_workers_cpu_affinity
+            else [None] * workers
+        )
+        self.workers = get_render_worker_pool().acquire(filepath, cpu_sets)
+
+        self.status = TaskStatus.RUNNING
+        self.update(context)
+        if not self.is_modal:
+            while self.status == TaskStatus.RUNNING:
+                time.sleep(WORKER_POLL_INTERVAL)
+                self.update(context)
+
+    def fail_job(self, job: RenderJob, error: str):
+        """Mark the strip of `job` as failed with `error`, and drop its other jobs."""
+        self.failed_strips.setdefault(job.strip, error)
+        self.pending_jobs = collections.deque(
+            pending for pending in self.pending_jobs if pending.strip != job.strip
+        )
+
+    def update(self, context: bpy.types.Context):
+        for worker in list(self.workers):
+            while worker.jobs_stats:
+                job_stats = worker.jobs_stats.popleft()
+                if self.stats:
+                    self.stats.add_task(job_stats)
+            while worker.failed_jobs:
+                job, error = worker.failed_jobs.popleft()
+                self.fail_job(job, f"Render worker failed:\n{error}")
+            if not worker.is_alive:
+                # Other workers take over the remaining jobs.
+                if worker.job:
+                    self.fail_job(
+                        worker.job,
+                        "Render worker stopped unexpectedly:\n"
+                        f"{''.join(worker.output)}",
+                    )
+                    worker.job = None
+                worker.kill()
+                self.workers.remove(worker)
+                continue
+            if worker.is_idle and self.pending_jobs:
+                worker.render(self.scene_name, self.pending_jobs.popleft())
+
+        if not self.workers:
+            while self.pending_jobs:
+                self.fail_job(self.pending_jobs[0], "No render worker left")
+
+        # Strips that finished are post-processed even if others failed.
+        if not self.pending_jobs and all(worker.is_idle for worker in self.workers):
+            self.status = TaskStatus.FINISHED
+
+    def post_run(self, context: bpy.types.Context, render_options: BatchRenderOptions):
+        # Strip tasks' post run steps expect their output settings to be applied,
+        # from the fingerprint and render plan computed before rendering.
+        for task in self.strip_tasks:
+            if task.strip.name in self.failed_strips:
+                continue
+            task.setup_output_settings(render_options)
+            try:
+                task.post_run(context, render_options)
+            finally:
+                task.teardown()
+
+        if self.failed_strips:
+            raise RuntimeError(
+                f"{len(self.failed_strips)} strip render(s) failed:\n"
+                + "\n".join(
+                    f"{strip}: {error}" for strip, error in self.failed_strips.items()
+                )
+            )
+
+    def teardown(self):
+        super().teardown()
+        # Rendering can't be interrupted: busy workers are stopped, others are kept.
+        for worker in self.workers:
+            if worker.job:
+                worker.kill()
+        self.workers.clear()
+        if self.tmp_dir:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def run_worker():
+    """Process commands sent by the main instance, until asked to quit."""
+
+    def setup_file():
+        # Timeline synchronization would interfere with strips rendering.
+        get_sync_settings().enabled = False
+        send_worker_event("ready")
+
+    setup_file()
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request["command"] == "quit":
+            break
+        if request["command"] == "load":
+            bpy.ops.wm.open_mainfile(filepath=request["filepath"])
+            setup_file()
+            continue
+
+        scene = bpy.data.scenes[request["scene"]]
+        strip, filepath, frame_range = request["job"]
+        job = RenderJob(strip, filepath, tuple(frame_range))
+        task = StripRenderTask(
+            strip=scene.sequence_editor.sequences_all[job.strip],
+            is_modal=False,
+            output_filepath=job.filepath,
+            chunk_ranges=[job.frame_range],
+        )
+        stats = BatchRenderStats()
+        stats.start(job.frame_count)
+        job_stats = stats.start_task(
+            job.strip, type(job).__name__, job.frame_count, task.scene.name
+        )
+        try:
+            task.setup(bpy.context, scene.batch_render_options)
+            task.run(bpy.context, scene.batch_render_options)
+        except Exception:
+            send_worker_event("failed", error=traceback.format_exc())
+        else:
+            stats.end_task(task.status.name)
+            send_worker_event("done", stats=job_stats.to_dict())
+        finally:
+            stats.stop()
+            task.teardown()
+
+
+def main():
+    """Background mode entry point."""
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Batch render edit scenes")
+    parser.add_argument(
+        "--scene",
+        action="append",
+        default=[],
+        help="An edit scene to render, can be repeated (default: active scene)",
+    )
+    parser.add_argument("--workers", type=int, help="The number of render workers")
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't save the file after rendering"
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Skip strips whose existing output has been rendered from the same inputs",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume interrupted batch renders from their manifest",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    import addon_utils
+
+    # Render options and workers preferences are stored in add-on's properties.
+    addon_utils.enable("spa_sequencer", default_set=True)
+
+    if args.worker:
+        run_worker()
+        return
+
+    if args.workers is not None:
+        get_addon_prefs().render_workers = args.workers
+    try:
+        # Edit scenes are rendered one after the other by the same workers.
+        for scene in [bpy.data.scenes[name] for name in args.scene] or [
+            bpy.context.scene
+        ]:
+            scene.batch_render_options.use_parallel_render = True
+            if args.skip_unchanged:
+                scene.batch_render_options.skip_unchanged = True
+            with bpy.context.temp_override(scene=scene):
+                if bpy.ops.sequencer.batch_render(resume=args.resume) != {"FINISHED"}:
+                    sys.exit(f"Batch render of {scene.name} failed")
+    finally:
+        get_render_worker_pool().shutdown()
+
+    if not args.no_save:
+        bpy.ops.wm.save_mainfile()
+
+
+def unregister():
+    get_render_worker_pool().shutdown()
+
+
+if __name__ == "__main__":
+    main()
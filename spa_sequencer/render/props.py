@@ -124,6 +124,37 @@ class BatchRenderOptions(bpy.types.PropertyGroup):
         options=set(),
     )
 
+    use_parallel_render: bpy.props.BoolProperty(
+        name="Parallel Render",
+        description=(
+            "Render strips in a pool of background Blender processes working on a "
+            "snapshot of the current file (see add-on preferences)"
+        ),
+        default=False,
+        options=set(),
+    )
+
+    skip_unchanged: bpy.props.BoolProperty(
+        name="Skip Unchanged",
+        description=(
+            "Skip the render of strips whose existing output has been rendered from "
+            "the same scene content and settings, only rendering frames added by "
+            "trim changes"
+        ),
+        default=False,
+        options=set(),
+    )
+
+    write_report: bpy.props.BoolProperty(
+        name="Write Report",
+        description=(
+            "Write the render timings of each task and frame in JSON and CSV files "
+            "next to the rendered media"
+        ),
+        default=False,
+        options=set(),
+    )
+
     selection_only: bpy.props.BoolProperty(
         name="Selection Only",
         description="Only render selected scene strips",
@@ -167,6 +198,36 @@ class BatchRenderRuntimeProps(bpy.types.PropertyGroup):
         default=0,
     )
 
+    frame_count: bpy.props.IntProperty(
+        name="Frame Count",
+        description="Estimated number of frames to render",
+        default=0,
+    )
+
+    frames_done: bpy.props.IntProperty(
+        name="Frames Done",
+        description="Number of frames rendered",
+        default=0,
+    )
+
+    frames_per_second: bpy.props.FloatProperty(
+        name="Frames per Second",
+        description="Average number of frames rendered per second",
+        default=0.0,
+    )
+
+    eta: bpy.props.FloatProperty(
+        name="ETA",
+        description="Estimated time left to render, in seconds (negative if unknown)",
+        default=-1.0,
+    )
+
+    render_stats: bpy.props.StringProperty(
+        name="Render Stats",
+        description="Latest status of the render engine",
+        default="",
+    )
+
 
 classes = (
     BatchRenderOptions,
@@ -0,0 +1,53 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Batch render tasks scheduling.
+
+Tasks declare the tasks they depend on (see `BaseTask.dependencies`), forming a
+dependency graph. A task is run as soon as all its dependencies have finished,
+following the tasks order otherwise. When a task fails, only the tasks depending on
+it are skipped. A task cancelled by the user cancels the whole batch render.
+"""
+
+from typing import Optional
+
+from spa_sequencer.render.tasks import BaseTask, TaskStatus
+
+
+def is_task_ready(task: BaseTask) -> bool:
+    """Whether all the dependencies of `task` have finished."""
+    return all(dep.status == TaskStatus.FINISHED for dep in task.dependencies)
+
+
+def get_ready_task(tasks: list[BaseTask]) -> Optional[BaseTask]:
+    """
+    Get the first task of `tasks` that can be run.
+
+    :param tasks: The tasks left to run, in order.
+    :return: The task, or None if no task is ready.
+    """
+    return next((task for task in tasks if is_task_ready(task)), None)
+
+
+def get_dependent_tasks(tasks: list[BaseTask], task: BaseTask) -> list[BaseTask]:
+    """
+    Get the tasks of `tasks` depending on `task`, directly or not.
+
+    :param tasks: The tasks to consider, in order.
+    :param task: The task to get the dependent tasks of.
+    :return: The dependent tasks, in order.
+    """
+    dependents = {id(task)}
+    # Iterate until no new dependent task is found, as tasks are not necessarily
+    # ordered after their dependencies.
+    found = True
+    while found:
+        found = False
+        for other in tasks:
+            if id(other) in dependents:
+                continue
+            if any(id(dep) in dependents for dep in other.dependencies):
+                dependents.add(id(other))
+                found = True
+    return [other for other in tasks if id(other) in dependents and other is not task]
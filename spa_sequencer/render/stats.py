@@ -0,0 +1,270 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Batch render telemetry.
+
+Render timings are captured with render handlers: `render_pre` and `render_post`
+time each rendered frame, `render_stats` keeps the latest status line of the render
+engine and `render_complete` records when a task's render ends. They give the
+frame rate and ETA displayed while rendering, and a JSON/CSV report written next to
+the rendered media to plan render times and spot costly shots. The report also
+measures the idle gaps between the end of a task's render and the start of the
+next one.
+"""
+
+import csv
+import dataclasses
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple, Optional
+
+import bpy
+
+
+class FrameStats(NamedTuple):
+    """The render timing of a frame."""
+
+    # The scene frame number.
+    frame: int
+    # The render duration, in seconds.
+    duration: float
+
+
+@dataclass
+class TaskStats:
+    """The render timings of a batch render task."""
+
+    # The name of the task (e.g. the rendered strip).
+    name: str
+    # The type of the task.
+    type: str
+    # The name of the scene rendered by the task, if any.
+    scene: str = ""
+    # The number of frames the task was expected to render, at most.
+    expected_frame_count: int = 0
+    # Start and end times of the task, as timestamps.
+    start_time: float = 0.0
+    end_time: Optional[float] = None
+    # The times the first render of the task started and the last one completed,
+    # as timestamps.
+    render_start_time: Optional[float] = None
+    render_end_time: Optional[float] = None
+    # The time between the end of the previous task's render and the start of this
+    # task's render, in seconds.
+    gap: Optional[float] = None
+    # The final status of the task.
+    status: str = ""
+    # The rendered frames.
+    frames: list[FrameStats] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def frames_duration(self) -> float:
+        """The time spent rendering frames."""
+        return sum(frame.duration for frame in self.frames)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TaskStats":
+        frames = [FrameStats(*frame) for frame in data["frames"]]
+        return cls(**{**data, "frames": frames})
+
+
+class BatchRenderStats:
+    """Collect the render timings of a batch render's tasks."""
+
+    def __init__(self):
+        self.tasks: list[TaskStats] = []
+        # The number of frames expected to be rendered, refined as tasks end.
+        self.frame_count = 0
+        self.start_time = 0.0
+        self.end_time: Optional[float] = None
+        # The task being run, whose scene renders are timed.
+        self.active_task: Optional[TaskStats] = None
+        # The latest status line of the render engine.
+        self.message = ""
+        self._frame_start_time: Optional[float] = None
+        self._active_task_frames_done = 0
+        self._render_end_time: Optional[float] = None
+        self.handlers_registered = False
+
+    def start(self, frame_count: int):
+        """
+        Start collecting render timings.
+
+        :param frame_count: The number of frames expected to be rendered.
+        """
+        self.frame_count = frame_count
+        self.start_time = time.time()
+        self.register_render_handlers()
+
+    def stop(self):
+        """Stop collecting render timings."""
+        self.end_time = time.time()
+        self.unregister_render_handlers()
+
+    def start_task(
+        self, name: str, task_type: str, frame_count: int, scene: str = ""
+    ) -> TaskStats:
+        """
+        Start timing a task.
+
+        :param name: The name of the task.
+        :param task_type: The type of the task.
+        :param frame_count: The number of frames the task is expected to render.
+        :param scene: The name of the scene whose renders are timed, if any.
+        :return: The task timings.
+        """
+        self.active_task = TaskStats(
+            name, task_type, scene, frame_count, start_time=time.time()
+        )
+        self.tasks.append(self.active_task)
+        self._active_task_frames_done = self.frames_done
+        return self.active_task
+
+    def end_task(self, status: str):
+        """End timing the active task, with its final `status`."""
+        if not (task := self.active_task):
+            return
+        task.end_time = time.time()
+        task.status = status
+        # Refine the expected frame count with the frames actually rendered.
+        rendered = self.frames_done - self._active_task_frames_done
+        self.frame_count -= task.expected_frame_count - rendered
+        self.active_task = None
+        self._frame_start_time = None
+
+    def add_task(self, task: TaskStats):
+        """Add the timings of a task run elsewhere, e.g. by a render worker."""
+        self.tasks.append(task)
+
+    @property
+    def frames_done(self) -> int:
+        return sum(len(task.frames) for task in self.tasks)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def gaps_duration(self) -> float:
+        """The total time spent between tasks' renders."""
+        return sum(task.gap for task in self.tasks if task.gap is not None)
+
+    @property
+    def frames_per_second(self) -> float:
+        duration = self.duration
+        return self.frames_done / duration if duration > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """The estimated time left to render the remaining frames, in seconds, or
+        None if no frame has been rendered yet."""
+        if not (fps := self.frames_per_second):
+            return None
+        return max(self.frame_count - self.frames_done, 0) / fps
+
+    def is_timed_scene(self, scene: Optional[bpy.types.Scene]) -> bool:
+        return bool(
+            self.active_task and scene and scene.name == self.active_task.scene
+        )
+
+    def on_render_pre(self, scene: bpy.types.Scene, *args):
+        """Callback for `render_pre` handler."""
+        if not self.is_timed_scene(scene):
+            return
+        self._frame_start_time = time.time()
+        task = self.active_task
+        if task.render_start_time is None:
+            task.render_start_time = self._frame_start_time
+            if self._render_end_time is not None:
+                task.gap = task.render_start_time - self._render_end_time
+
+    def on_render_post(self, scene: bpy.types.Scene, *args):
+        """Callback for `render_post` handler."""
+        if self._frame_start_time is None or not self.is_timed_scene(scene):
+            return
+        duration = time.time() - self._frame_start_time
+        self.active_task.frames.append(FrameStats(scene.frame_current, duration))
+        self._frame_start_time = None
+
+    def on_render_stats(self, message: str, *args):
+        """Callback for `render_stats` handler."""
+        self.message = message
+
+    def on_render_complete(self, scene: bpy.types.Scene, *args):
+        """Callback for `render_complete` handler."""
+        if self.is_timed_scene(scene):
+            self.active_task.render_end_time = self._render_end_time = time.time()
+
+    def register_render_handlers(self):
+        """Register render handlers callbacks."""
+        if self.handlers_registered:
+            return
+        bpy.app.handlers.render_pre.append(self.on_render_pre)
+        bpy.app.handlers.render_post.append(self.on_render_post)
+        bpy.app.handlers.render_stats.append(self.on_render_stats)
+        bpy.app.handlers.render_complete.append(self.on_render_complete)
+        self.handlers_registered = True
+
+    def unregister_render_handlers(self):
+        """Unregister render handlers callbacks."""
+        if not self.handlers_registered:
+            return
+        bpy.app.handlers.render_pre.remove(self.on_render_pre)
+        bpy.app.handlers.render_post.remove(self.on_render_post)
+        bpy.app.handlers.render_stats.remove(self.on_render_stats)
+        bpy.app.handlers.render_complete.remove(self.on_render_complete)
+        self.handlers_registered = False
+
+    def update_runtime_props(self, props: bpy.types.PropertyGroup):
+        """Update batch render runtime properties (see `BatchRenderRuntimeProps`)."""
+        props.frame_count = self.frame_count
+        props.frames_done = self.frames_done
+        props.frames_per_second = self.frames_per_second
+        props.eta = -1.0 if (eta := self.eta) is None else eta
+        props.render_stats = self.message
+
+    def write_report(self, filepath: str):
+        """
+        Write the render timings report, as a JSON summary with per task details
+        and a CSV file of per frame timings.
+
+        :param filepath: The report filepath, without extension.
+        """
+        summary = {
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": self.duration,
+            "frame_count": self.frames_done,
+            "frames_per_second": self.frames_per_second,
+            "gaps_duration": self.gaps_duration,
+            "tasks": [
+                {
+                    **task.to_dict(),
+                    "duration": task.duration,
+                    "frames_duration": task.frames_duration,
+                }
+                for task in self.tasks
+            ],
+        }
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(f"{filepath}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+        with open(f"{filepath}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("task", "type", "scene", "frame", "duration"))
+            for task in self.tasks:
+                for frame in task.frames:
+                    writer.writerow(
+                        (task.name, task.type, task.scene, frame.frame, frame.duration)
+                    )
@@ -5,8 +5,21 @@ from dataclasses import dataclass, field
 from enum import Enum, auto
 import math
 import os
-from typing import Any, Callable, Optional
+from typing import Any, Callable, NamedTuple, Optional
 import bpy
+from spa_sequencer.render.fingerprint import (
+    RenderFingerprint,
+    compute_render_fingerprint,
+    read_render_fingerprint,
+    write_render_fingerprint,
+)
+from spa_sequencer.render.media import (
+    FrameRange,
+    MovieSegment,
+    concatenate_movies,
+    get_missing_image_ranges,
+    get_missing_ranges,
+)
 from spa_sequencer.render.props import MEDIA_TYPES_FORMATS, BatchRenderOptions
 from spa_sequencer.sync.core import get_sync_settings
 
@@ -41,9 +54,9 @@ class ValueOverrides:
         setattr(obj, attr, value)
 
     def revert(self):
-        """Revert all registered overrides."""
-        for obj, attrs in self._overrides.items():
-            for key, value in attrs:
+        """Revert all registered overrides, in reverse order."""
+        for obj, attrs in reversed(self._overrides.items()):
+            for key, value in reversed(attrs):
                 setattr(obj, key, value)
         self._overrides.clear()
 
@@ -53,6 +66,10 @@ class TaskStatus(Enum):
     RUNNING = auto()
     FINISHED = auto()
     CANCELLED = auto()
+    # The task raised an error.
+    FAILED = auto()
+    # The task was not run as one of its dependencies did not finish.
+    SKIPPED = auto()
 
 
 @dataclass
@@ -65,6 +82,20 @@ class BaseTask:
     # Value overrides associated to this task.
     overrides: ValueOverrides = field(default_factory=ValueOverrides)
 
+    # The tasks that must have finished before running this task.
+    dependencies: list["BaseTask"] = field(
+        default_factory=list, repr=False, compare=False
+    )
+
+    @property
+    def name(self) -> str:
+        """The name of the task, for reporting."""
+        return type(self).__name__
+
+    def get_frame_count(self, render_options: BatchRenderOptions) -> int:
+        """Get the number of frames the task is expected to render, at most."""
+        return 0
+
     def setup(self, context: bpy.types.Context, render_options: BatchRenderOptions):
         """Setup the task."""
         pass
@@ -73,6 +104,10 @@ class BaseTask:
         """Start the task and update its status."""
         pass
 
+    def update(self, context: bpy.types.Context):
+        """Called periodically while the task is running asynchronously."""
+        pass
+
     def post_run(self, context: bpy.types.Context, render_options: BatchRenderOptions):
         """Called after run completed successfully."""
         pass
@@ -141,6 +176,27 @@ StripRenderTask callback:
 StripRenderTaskCallback = Callable[[bpy.types.SceneSequence, str], str]
 
 
+class RenderPlan(NamedTuple):
+    """The frames to render for a strip, given its existing output media."""
+
+    # The scene frame range of the strip's output media.
+    frame_range: FrameRange
+    # The frame ranges to render.
+    render_ranges: list[FrameRange]
+    # The frame range of the existing output media to reuse, if any.
+    previous_range: Optional[FrameRange] = None
+
+    def is_up_to_date(self, render_options: BatchRenderOptions) -> bool:
+        """Whether the existing output media can be used as is."""
+        if self.render_ranges:
+            return False
+        # Movies must also be trimmed to the new frame range.
+        return (
+            render_options.media_type == "IMAGES"
+            or self.previous_range == self.frame_range
+        )
+
+
 @dataclass
 class StripRenderTask(BaseRenderTask):
     """Strip render task."""
@@ -153,28 +209,146 @@ class StripRenderTask(BaseRenderTask):
     viewport_window: Optional[bpy.types.Window] = None
     # Output channel offset in output scene.
     output_channel_offset: int = 0
+    # Output media filepath, without extension (resolved from render options if empty).
+    output_filepath: str = ""
+    # Fingerprint of the render inputs, computed on setup.
+    fingerprint: str = ""
+    # Fingerprint of the inputs of an interrupted render of the strip to resume
+    # (see `render.manifest`).
+    resume_fingerprint: str = ""
+    # Frames to render given the existing output media, computed on setup.
+    plan: Optional[RenderPlan] = None
+    # Frame ranges to render in place of the planned ones, e.g. chunks of the
+    # planned ranges rendered by parallel render workers.
+    chunk_ranges: Optional[list[FrameRange]] = None
+    # Frame ranges left to render.
+    render_ranges: list[FrameRange] = field(default_factory=list)
+    # Render output filepath, as set in scene's render settings.
+    render_filepath: str = ""
 
     @property
     def scene(self) -> bpy.types.Scene:
         """Get the internal strip's scene."""
         return self.strip.scene
 
-    def setup(self, context: bpy.types.Context, render_options: BatchRenderOptions):
-        super().setup(context, render_options)
+    @property
+    def name(self) -> str:
+        return self.strip.name
 
-        strip = self.strip
-        scene = self.scene
+    def get_frame_count(self, render_options: BatchRenderOptions) -> int:
+        frame_start, frame_end = self.get_frame_range(render_options)
+        return frame_end - frame_start + 1
 
-        # Override scene's internal range to match strip's range.
-        frame_start = remap_frame_value(strip.frame_final_start, strip)
-        frame_end = frame_start + strip.frame_final_duration - 1
+    def get_frame_range(self, render_options: BatchRenderOptions) -> FrameRange:
+        """Get the scene frame range to render, including handles."""
+        frame_start = remap_frame_value(self.strip.frame_final_start, self.strip)
+        frame_end = frame_start + self.strip.frame_final_duration - 1
         # Apply frame handles to range.
         if render_options.media_type == "MOVIE":
             frame_start -= render_options.frames_handles
             frame_end += render_options.frames_handles
+        return frame_start, frame_end
+
+    def compute_fingerprint(self, render_options: BatchRenderOptions) -> str:
+        """Compute the fingerprint of the render inputs (see `render.fingerprint`).
+        Scene settings are expected not to be overridden by this task yet."""
+        return compute_render_fingerprint(
+            self.scene,
+            self.strip.scene_camera or self.scene.camera,
+            render_options,
+        )
+
+    @staticmethod
+    def has_output_media(
+        filepath: str, frame_range: FrameRange, render_options: BatchRenderOptions
+    ) -> bool:
+        """Whether the media rendered at `filepath` (without extension) exists."""
+        _, file_ext = MEDIA_TYPES_FORMATS[render_options.media_type]
+        if render_options.media_type == "MOVIE":
+            return os.path.exists(f"{filepath}.{file_ext}")
+        return all(
+            os.path.exists(f"{filepath}.{frame:04d}.{file_ext}")
+            for frame in range(frame_range[0], frame_range[1] + 1)
+        )
+
+    def plan_render(
+        self, render_options: BatchRenderOptions, fingerprint: str = ""
+    ) -> RenderPlan:
+        """
+        Plan the frames to render, reusing the existing output media if it has been
+        rendered from the same inputs (see `BatchRenderOptions.skip_unchanged`), or
+        the images of an interrupted render to resume (see `resume_fingerprint`).
 
-        # Set render engine.
+        :param render_options: The batch render options.
+        :param fingerprint: The fingerprint of the render inputs, computed if empty.
+        :return: The render plan.
+        """
+        frame_range = self.get_frame_range(render_options)
+        full_render = RenderPlan(frame_range, [frame_range])
+        if not render_options.skip_unchanged and not self.resume_fingerprint:
+            return full_render
+
+        filepath = bpy.path.abspath(
+            self.output_filepath or self.resolve_output_filepath(render_options)
+        )
+        fingerprint = fingerprint or self.compute_fingerprint(render_options)
+        previous = read_render_fingerprint(filepath)
+        if (
+            previous
+            and previous.content == fingerprint
+            and self.has_output_media(filepath, previous.frame_range, render_options)
+        ):
+            missing_ranges = get_missing_ranges(previous.frame_range, frame_range)
+            if missing_ranges is not None:
+                return RenderPlan(frame_range, missing_ranges, previous.frame_range)
+
+        # Interrupted images render: only render missing or incomplete images.
+        # Interrupted movies can't be completed.
+        if (
+            self.resume_fingerprint == fingerprint
+            and render_options.media_type == "IMAGES"
+        ):
+            _, file_ext = MEDIA_TYPES_FORMATS["IMAGES"]
+            return RenderPlan(
+                frame_range,
+                get_missing_image_ranges(
+                    frame_range, lambda frame: f"{filepath}.{frame:04d}.{file_ext}"
+                ),
+            )
+        return full_render
+
+    def is_output_up_to_date(self, render_options: BatchRenderOptions) -> bool:
+        """Whether the existing output media can be used as is."""
+        return self.plan_render(render_options).is_up_to_date(render_options)
+
+    def setup(self, context: bpy.types.Context, render_options: BatchRenderOptions):
+        super().setup(context, render_options)
+
+        scene = self.scene
+
+        self.fingerprint = self.compute_fingerprint(render_options)
+        self.plan = self.plan_render(render_options, self.fingerprint)
+        self.render_ranges = list(self.get_render_ranges())
+
+        # Set render engine, rendering the scene rather than its sequencer.
         self.overrides.set(scene.render, "engine", render_options.render_engine)
+        self.overrides.set(scene.render, "use_sequencer", False)
+
+        self.setup_output_settings(render_options)
+
+    def setup_output_settings(self, render_options: BatchRenderOptions):
+        """
+        Override the scene settings defining the strip's output media (frame range,
+        camera, resolution, format and filepath), which post run steps also rely on.
+        The render plan is expected to be set.
+
+        :param render_options: The batch render options.
+        """
+        strip = self.strip
+        scene = self.scene
+
+        # Override scene's internal range to match strip's range.
+        frame_start, frame_end = self.plan.frame_range
 
         # Update both range (internal render) and preview range (viewport render)
         self.overrides.set(scene, "frame_start", frame_start)
@@ -199,19 +373,13 @@ class StripRenderTask(BaseRenderTask):
         self.overrides.set(scene.render, "resolution_x", r_width)
         self.overrides.set(scene.render, "resolution_y", r_height)
         self.overrides.set(scene.render, "resolution_percentage", 100)
-        self.overrides.set(scene.render, "use_sequencer", False)
 
         if strip.scene_camera:
             self.overrides.set(scene, "camera", strip.scene_camera)
 
-        # Resolve output media filepath based on configured pattern
-        variables = {
-            "strip": strip.name,
-            "scene": scene.name,
-            "filename": bpy.path.display_name_from_filepath(bpy.data.filepath),
-        }
-        filepath = render_options.filepath_pattern.format(**variables)
-        filepath = self.conform_render_path(filepath)
+        filepath = self.output_filepath or self.resolve_output_filepath(
+            render_options
+        )
 
         # Override render settings based on media type
         file_format, file_ext = MEDIA_TYPES_FORMATS[render_options.media_type]
@@ -220,9 +388,10 @@ class StripRenderTask(BaseRenderTask):
             # Filepath: add separator between resolved name and auto frame number suffix
             filepath += "."
             # Setup render settings
+            # NOTE: Set color mode first, as changing the file format may change it.
+            self.overrides.set(render.image_settings, "color_mode", "RGB")
             self.overrides.set(render.image_settings, "file_format", file_format)
             self.overrides.set(render.image_settings, "quality", 100)
-            self.overrides.set(render.image_settings, "color_mode", "RGB")
         else:
             # Filepath: add extension to avoid auto frame range suffix
             filepath += f".{file_ext}"
@@ -232,8 +401,88 @@ class StripRenderTask(BaseRenderTask):
             self.overrides.set(render.ffmpeg, "constant_rate_factor", "PERC_LOSSLESS")
         # Setup final filepath
         self.overrides.set(scene.render, "filepath", filepath)
+        self.render_filepath = filepath
+
+    def set_frame_range(self, frame_range: FrameRange):
+        """Set both range (internal render) and preview range (viewport render) of
+        the scene, without registering overrides."""
+        scene = self.scene
+        scene.frame_start, scene.frame_end = frame_range
+        scene.frame_preview_start, scene.frame_preview_end = frame_range
+
+    def get_segment_filepath(self, frame_range: FrameRange) -> str:
+        """Get the movie filepath of the partial render of `frame_range`."""
+        filepath, ext = os.path.splitext(self.render_filepath)
+        return f"{filepath}.frames_{frame_range[0]}-{frame_range[1]}{ext}"
+
+    def get_render_ranges(self) -> list[FrameRange]:
+        """Get the frame ranges to render: the planned ones, unless chunks are set."""
+        if self.chunk_ranges is None:
+            return self.plan.render_ranges
+        return self.chunk_ranges
+
+    @property
+    def is_partial_render(self) -> bool:
+        """Whether the output media is rendered in several parts to assemble."""
+        return self.get_render_ranges() != [self.plan.frame_range]
+
+    def splice_movie(self):
+        """Assemble the movie from the newly rendered segments, completed with the
+        frames of the existing movie still in use."""
+        filepath = bpy.path.abspath(self.render_filepath)
+
+        # Segments by start frame.
+        segments = {
+            start: MovieSegment(
+                bpy.path.abspath(self.get_segment_filepath((start, end))),
+                0,
+                end - start + 1,
+            )
+            for start, end in self.get_render_ranges()
+        }
+        if self.plan.previous_range:
+            frame_start, frame_end = self.plan.frame_range
+            previous_start, previous_end = self.plan.previous_range
+            reused_start = max(frame_start, previous_start)
+            reused_end = min(frame_end, previous_end)
+            segments[reused_start] = MovieSegment(
+                filepath, reused_start - previous_start, reused_end - reused_start + 1
+            )
+
+        base, ext = os.path.splitext(filepath)
+        spliced_filepath = f"{base}.spliced{ext}"
+        concatenate_movies(
+            [segments[start] for start in sorted(segments)],
+            spliced_filepath,
+            self.scene,
+        )
+        os.replace(spliced_filepath, filepath)
+        for start, end in self.get_render_ranges():
+            os.remove(bpy.path.abspath(self.get_segment_filepath((start, end))))
+
+    def resolve_output_filepath(self, render_options: BatchRenderOptions) -> str:
+        """Resolve output media filepath, without extension, based on configured
+        pattern."""
+        variables = {
+            "strip": self.strip.name,
+            "scene": self.scene.name,
+            "filename": bpy.path.display_name_from_filepath(bpy.data.filepath),
+        }
+        filepath = render_options.filepath_pattern.format(**variables)
+        return self.conform_render_path(filepath)
+
+    def on_render_completed(self, *args):
+        # Move on to the next frame range to render, if any.
+        if self.render_ranges:
+            self.render_ranges.pop(0)
+        self.status = TaskStatus.PENDING if self.render_ranges else TaskStatus.FINISHED
 
     def run(self, context: bpy.types.Context, render_options: BatchRenderOptions):
+        # Existing output has been rendered from the same inputs.
+        if not self.render_ranges:
+            self.status = TaskStatus.FINISHED
+            return
+
         # Ensures functions dependant on current strip/sync are updated during render 
         get_sync_settings().last_master_strip = self.strip.name
 
@@ -255,21 +504,52 @@ class StripRenderTask(BaseRenderTask):
         else:
             render_op = bpy.ops.render.render
 
-        # Start rendering the target scene. Use a context override for this to
-        # work both in interactive and background mode.
-        with context.temp_override(**overrides):
-            res = render_op(self.render_op_exec_context, animation=True)
-
-        # Calling a render operator right after the previous task finishes may fail due
-        # to the ordering of events and how they are dealt with in Blender core.
-        # Therefore, we only consider the task as started if operator call returned the
-        # proper status (RUNNING_MODAL).
-        # See `modal` function to see how this function is used.
+        while self.render_ranges:
+            render_ranges_count = len(self.render_ranges)
+            # Partial render: render frame ranges one by one, as separate movies.
+            if self.is_partial_render:
+                self.set_frame_range(self.render_ranges[0])
+                if render_options.media_type == "MOVIE":
+                    self.scene.render.filepath = self.get_segment_filepath(
+                        self.render_ranges[0]
+                    )
+
+            # Start rendering the target scene. Use a context override for this to
+            # work both in interactive and background mode.
+            with context.temp_override(**overrides):
+                res = render_op(self.render_op_exec_context, animation=True)
+
+            # Calling a render operator right after the previous task finishes may
+            # fail due to the ordering of events and how they are dealt with in
+            # Blender core. Therefore, we only consider the task as started if
+            # operator call returned the proper status (RUNNING_MODAL).
+            # See `modal` function to see how this function is used.
+            if res == {"RUNNING_MODAL"}:
+                self.status = TaskStatus.RUNNING
+                return
 
-        if res == {"RUNNING_MODAL"}:
-            self.status = TaskStatus.RUNNING
+            # Blocking render: render next frame range, if this one completed.
+            if (
+                self.status != TaskStatus.PENDING
+                or len(self.render_ranges) == render_ranges_count
+            ):
+                return
 
     def post_run(self, context: bpy.types.Context, render_options: BatchRenderOptions):
+        if not self.plan.is_up_to_date(render_options):
+            if self.is_partial_render:
+                # Restore strip's frame range and final filepath after partial render.
+                self.set_frame_range(self.plan.frame_range)
+                self.scene.render.filepath = self.render_filepath
+                if render_options.media_type == "MOVIE":
+                    # Movies assembly is rendered: stop tracking render events.
+                    self.unregister_app_handlers()
+                    self.splice_movie()
+            write_render_fingerprint(
+                self.output_filepath or self.resolve_output_filepath(render_options),
+                RenderFingerprint(self.fingerprint, self.plan.frame_range),
+            )
+
         if callback := render_options.tasks_callbacks.get(self.__class__.__name__, []):
             # TODO: check callback compatibility
             new_filepath = callback(self.strip, self.scene.render.filepath)
@@ -304,16 +584,22 @@ class StripRenderTask(BaseRenderTask):
         strips: list[tuple[bpy.types.SceneSequence, int, int]] = []
 
         if media_type == "IMAGES":
-            for idx in range(scene_strip.frame_final_duration):
-                frame_number = scene_strip.scene.frame_start + idx
-                img_path = scene_strip.scene.render.frame_path(frame=frame_number)
-                strip = sed.sequences.new_image(
-                    name=os.path.basename(bpy.path.abspath(img_path)),
-                    filepath=img_path,
-                    channel=scene_strip.channel + channel_offset,
-                    frame_start=scene_strip.frame_final_start + idx,
+            # Single image sequence strip, with one element per rendered frame.
+            frame_start = scene_strip.scene.frame_start
+            frame_end = frame_start + scene_strip.frame_final_duration - 1
+            render = scene_strip.scene.render
+            img_path = render.frame_path(frame=frame_start)
+            strip = sed.sequences.new_image(
+                name=os.path.basename(bpy.path.abspath(img_path)),
+                filepath=img_path,
+                channel=scene_strip.channel + channel_offset,
+                frame_start=scene_strip.frame_final_start,
+            )
+            for frame_number in range(frame_start + 1, frame_end + 1):
+                strip.elements.append(
+                    os.path.basename(render.frame_path(frame=frame_number))
                 )
-                strips.append((strip, frame_number, frame_number))
+            strips.append((strip, frame_start, frame_end))
 
         elif media_type == "MOVIE":
             filepath = scene_strip.scene.render.filepath
@@ -522,6 +808,10 @@ class FitResolutionToContentTask(BaseTask):
 class SequenceRenderTask(BaseRenderTask):
     scene: Optional[bpy.types.Scene] = None
 
+    @property
+    def name(self) -> str:
+        return self.scene.name if self.scene else super().name
+
     def setup(self, context: bpy.types.Context, render_options: BatchRenderOptions):
         if not self.scene:
             return
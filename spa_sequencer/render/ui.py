@@ -23,6 +23,9 @@ class SEQUENCER_PT_batch_render(bpy.types.Panel):
 
         self.layout.prop(options, "filepath_pattern")
         self.layout.prop(options, "selection_only")
+        self.layout.prop(options, "use_parallel_render")
+        self.layout.prop(options, "skip_unchanged")
+        self.layout.prop(options, "write_report")
         box = self.layout.box()
         box.prop(options, "output_scene")
         if options.output_scene:
@@ -32,7 +35,23 @@ class SEQUENCER_PT_batch_render(bpy.types.Panel):
             col.prop(options, "render_output_scene")
             if options.render_output_scene:
                 col.prop(options, "output_render_filepath_pattern")
-        self.layout.operator("sequencer.batch_render")
+        row = self.layout.row(align=True)
+        row.operator("sequencer.batch_render")
+        row.operator("sequencer.batch_render", text="Resume").resume = True
+
+        props = context.window_manager.batch_render
+        if props.status == "RUNNING":
+            self.draw_progress(props)
+
+    def draw_progress(self, props: bpy.types.PropertyGroup):
+        """Draw the progress of the running batch render."""
+        col = self.layout.box().column(align=True)
+        col.label(text=f"Frames: {props.frames_done} / {props.frame_count}")
+        col.label(text=f"Speed: {props.frames_per_second:.2f} fps")
+        eta = bpy.utils.smpte_from_seconds(props.eta) if props.eta >= 0 else "-"
+        col.label(text=f"ETA: {eta}")
+        if props.render_stats:
+            col.label(text=props.render_stats)
 
 
 classes = (SEQUENCER_PT_batch_render,)
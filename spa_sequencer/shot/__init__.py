@@ -2,7 +2,10 @@
 # Copyright (C) 2023, The SPA Studios. All rights reserved.
 
 from spa_sequencer.shot import (
+    autosave,
     core,
+    library,
+    memory,
     naming,
     ops,
     ui,
@@ -10,14 +13,20 @@ from spa_sequencer.shot import (
 
 
 def register():
+    autosave.register()
     core.register()
+    memory.register()
+    library.register()
     naming.register()
     ops.register()
     ui.register()
 
 
 def unregister():
+    autosave.unregister()
     core.unregister()
+    memory.unregister()
+    library.unregister()
     naming.unregister()
     ops.unregister()
     ui.unregister()
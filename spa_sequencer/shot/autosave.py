@@ -0,0 +1,202 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Incremental autosave of shot scenes.
+
+Shot scenes modified since the last save are tracked from depsgraph updates. When
+incremental autosave is enabled in the addon preferences, only those dirty shot
+scenes are periodically written in sidecar library files, next to the edit file.
+The whole file is only written on explicit save, which discards sidecar files.
+"""
+
+import os
+import re
+import shutil
+
+import bpy
+
+from spa_sequencer.preferences import get_addon_prefs
+from spa_sequencer.shared_folders.core import get_shared_folders_root_collection
+from spa_sequencer.shot.core import delete_orphan_datablocks, walk_collection_datablocks
+from spa_sequencer.shot.memory import (
+    walk_memory_datablocks,
+    walk_scene_removable_datablocks,
+)
+
+
+# Suffix of the directory storing sidecar files, next to the edit file.
+AUTOSAVE_DIRECTORY_SUFFIX = "_autosave"
+
+# Names of the scenes modified since the last (auto)save.
+_dirty_scenes: set[str] = set()
+
+
+def get_autosave_directory(filepath: str = "") -> str:
+    """
+    Get the directory storing the sidecar files of the edit file at `filepath`.
+
+    :param filepath: The path of the edit file (default: current file).
+    :return: The directory path.
+    """
+    filepath = filepath or bpy.data.filepath
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(
+        os.path.dirname(filepath), f"{stem}{AUTOSAVE_DIRECTORY_SUFFIX}"
+    )
+
+
+def get_shot_scenes_in_use() -> set[bpy.types.Scene]:
+    """Get the scenes used by scene strips in the current file."""
+    return {
+        s.scene
+        for scene in bpy.data.scenes
+        if scene.sequence_editor
+        for s in scene.sequence_editor.sequences_all
+        if isinstance(s, bpy.types.SceneSequence) and s.scene
+    }
+
+
+def get_dirty_shot_scenes() -> list[bpy.types.Scene]:
+    """Get the shot scenes modified since the last (auto)save."""
+    return [
+        scene
+        for scene in get_shot_scenes_in_use()
+        if scene.name in _dirty_scenes and not scene.library
+    ]
+
+
+def autosave_dirty_shots() -> list[str]:
+    """
+    Write each dirty shot scene in its sidecar library file.
+
+    :return: The names of the written shot scenes.
+    """
+    if not bpy.data.filepath:
+        return []
+
+    directory = get_autosave_directory()
+    written = []
+    for scene in get_dirty_shot_scenes():
+        os.makedirs(directory, exist_ok=True)
+        bpy.data.libraries.write(
+            os.path.join(directory, f"{scene.name}.blend"),
+            {scene},
+            path_remap="RELATIVE",
+            fake_user=True,
+        )
+        _dirty_scenes.discard(scene.name)
+        written.append(scene.name)
+    return written
+
+
+def get_recoverable_shots() -> dict[bpy.types.Scene, str]:
+    """
+    Get the shot scenes with a sidecar file more recent than the current file.
+
+    :return: The sidecar file path by scene.
+    """
+    directory = get_autosave_directory() if bpy.data.filepath else ""
+    if not os.path.isdir(directory):
+        return {}
+
+    file_mtime = os.path.getmtime(bpy.data.filepath)
+    recoverable = {}
+    for filename in os.listdir(directory):
+        name, ext = os.path.splitext(filename)
+        filepath = os.path.join(directory, filename)
+        if (
+            ext == ".blend"
+            and (scene := bpy.data.scenes.get(name))
+            and os.path.getmtime(filepath) > file_mtime
+        ):
+            recoverable[scene] = filepath
+    return recoverable
+
+
+def recover_autosaved_shot(scene: bpy.types.Scene, filepath: str) -> bpy.types.Scene:
+    """
+    Replace `scene` by its autosaved version from the sidecar file at `filepath`.
+    Shared folders are not recovered: the scene uses the existing ones.
+
+    :param scene: The shot scene to recover.
+    :param filepath: The sidecar file path.
+    :return: The recovered scene.
+    """
+    name = scene.name
+    # Datablocks of the replaced scene, deleted if no longer used.
+    datablocks = walk_scene_removable_datablocks(scene)
+    scene.name = f".recovering.{name}"
+    collections = set(bpy.data.collections)
+    with bpy.data.libraries.load(filepath) as (_, data_to):
+        data_to.scenes = [name]
+    recovered = data_to.scenes[0]
+
+    # Remap strips (and windows) using the scene to the recovered one.
+    scene.user_remap(recovered)
+    bpy.data.scenes.remove(scene)
+
+    # Use existing shared folders instead of the appended copies.
+    if root := get_shared_folders_root_collection():
+        for col in set(bpy.data.collections) - collections:
+            shared_folder = root.children.get(re.sub(r"\.\d{3,}$", "", col.name))
+            if shared_folder and shared_folder != col:
+                col.user_remap(shared_folder)
+                datablocks += walk_memory_datablocks(walk_collection_datablocks(col))
+
+    delete_orphan_datablocks(datablocks)
+    return recovered
+
+
+def autosave_timer() -> float:
+    """Timer callback performing incremental autosave."""
+    prefs = get_addon_prefs()
+    if not prefs.use_incremental_autosave:
+        return prefs.incremental_autosave_interval
+
+    # Postpone during playback to avoid any hitch.
+    if any(
+        window.screen and window.screen.is_animation_playing
+        for window in bpy.context.window_manager.windows
+    ):
+        return 1.0
+
+    autosave_dirty_shots()
+    return prefs.incremental_autosave_interval
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update_post(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    # Any update of the depsgraph of a scene marks it as modified.
+    if depsgraph.updates:
+        _dirty_scenes.add(scene.name)
+
+
+@bpy.app.handlers.persistent
+def on_save_post(filepath: str = "", *args):
+    # Saving a copy (e.g. a render snapshot) does not save the current file.
+    if filepath and bpy.path.abspath(filepath) != bpy.data.filepath:
+        return
+    _dirty_scenes.clear()
+    # Sidecar files are outdated by the full save.
+    shutil.rmtree(get_autosave_directory(), ignore_errors=True)
+
+
+@bpy.app.handlers.persistent
+def on_load_post(*args):
+    _dirty_scenes.clear()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.save_post.append(on_save_post)
+    bpy.app.handlers.load_post.append(on_load_post)
+    bpy.app.timers.register(autosave_timer, first_interval=10, persistent=True)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(autosave_timer):
+        bpy.app.timers.unregister(autosave_timer)
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update_post)
+    bpy.app.handlers.save_post.remove(on_save_post)
+    bpy.app.handlers.load_post.remove(on_load_post)
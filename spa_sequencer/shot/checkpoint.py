@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Checkpoint and restore of sequencer timing state.
+
+A checkpoint is a compact snapshot of the timing properties of all the strips of an
+edit and of the frame ranges of all the scenes, stored in NumPy arrays read and
+written in bulk with `foreach_get`/`foreach_set`. Restoring a checkpoint is a fast
+alternative to the undo stack to cancel interactive or batch timing edits.
+"""
+
+import logging
+from contextlib import contextmanager
+
+import bpy
+import numpy as np
+
+from spa_sequencer.shot.core import reload_strips
+
+
+log = logging.getLogger(__name__)
+
+# Timing properties stored for each strip.
+STRIP_TIMING_PROPERTIES = {
+    "frame_start": np.float32,
+    "frame_offset_start": np.float32,
+    "frame_offset_end": np.float32,
+    "channel": np.int32,
+}
+
+# Frame range properties stored for each scene.
+# NOTE: Frame start is restored first, as setting it may push the frame end.
+SCENE_RANGE_PROPERTIES = {
+    "frame_start": np.int32,
+    "frame_end": np.int32,
+}
+
+# Maximum number of bulk writes to restore strips timing.
+# Transient overlaps while writing make Blender shuffle some strips to another
+# channel, which is fixed by the next write.
+MAX_RESTORE_PASSES = 3
+
+
+def read_properties(
+    collection: bpy.types.bpy_prop_collection, properties: dict[str, type]
+) -> dict[str, np.ndarray]:
+    """
+    Read `properties` of all the items of `collection`.
+
+    :param collection: The collection to read.
+    :param properties: The data type by property name.
+    :return: The values of each property.
+    """
+    values = {}
+    for name, dtype in properties.items():
+        values[name] = np.empty(len(collection), dtype=dtype)
+        collection.foreach_get(name, values[name])
+    return values
+
+
+def write_properties(
+    collection: bpy.types.bpy_prop_collection,
+    values: dict[str, np.ndarray],
+    current: dict[str, np.ndarray],
+):
+    """
+    Write `values` to all the items of `collection`, skipping properties whose
+    `current` values are identical.
+
+    :param collection: The collection to write.
+    :param values: The values of each property.
+    :param current: The current values of each property.
+    """
+    for name, array in values.items():
+        if not np.array_equal(array, current[name]):
+            collection.foreach_set(name, array)
+
+
+def get_changed_items(
+    values: dict[str, np.ndarray], current: dict[str, np.ndarray]
+) -> np.ndarray:
+    """Get the indices of the items whose `values` differ from `current` ones."""
+    changed = np.zeros(len(next(iter(values.values()))), dtype=bool)
+    for name, array in values.items():
+        changed |= array != current[name]
+    return np.flatnonzero(changed)
+
+
+class TimingCheckpoint:
+    """
+    Snapshot of the timing of the strips of an edit scene and of the frame ranges
+    of all the scenes.
+    """
+
+    def __init__(self, scene: bpy.types.Scene):
+        """
+        :param scene: The edit scene.
+        """
+        self.scene = scene
+        strips = scene.sequence_editor.sequences_all
+        self.strip_names = [strip.name for strip in strips]
+        self.strips_timing = read_properties(strips, STRIP_TIMING_PROPERTIES)
+        self.scene_names = [scene.name for scene in bpy.data.scenes]
+        self.scenes_range = read_properties(bpy.data.scenes, SCENE_RANGE_PROPERTIES)
+
+    @staticmethod
+    def _get_target_values(
+        names: list[str],
+        values: dict[str, np.ndarray],
+        current_names: list[str],
+        current: dict[str, np.ndarray],
+    ) -> dict[str, np.ndarray]:
+        """
+        Get the values to write to the current items of a collection: the saved
+        values for items existing at checkpoint time, the current ones otherwise.
+        """
+        if names == current_names:
+            return values
+        saved_indices = {name: idx for idx, name in enumerate(names)}
+        mapping = [
+            (idx, saved_indices[name])
+            for idx, name in enumerate(current_names)
+            if name in saved_indices
+        ]
+        if not mapping:
+            return current
+        current_idx, saved_idx = np.array(mapping).T
+        target = {name: array.copy() for name, array in current.items()}
+        for name, array in target.items():
+            array[current_idx] = values[name][saved_idx]
+        return target
+
+    def restore(self, reload: bool = True):
+        """
+        Restore the checkpoint state. Strips and scenes created after the
+        checkpoint are left untouched.
+
+        :param reload: Whether to reload the strips whose scene range changed since
+            the checkpoint, to re-evaluate their content length.
+        """
+        # Restore scenes ranges first, for strips to be reloaded accordingly.
+        scenes = bpy.data.scenes
+        scene_names = [scene.name for scene in scenes]
+        current = read_properties(scenes, SCENE_RANGE_PROPERTIES)
+        target = self._get_target_values(
+            self.scene_names, self.scenes_range, scene_names, current
+        )
+        changed_scenes = {
+            scene_names[idx] for idx in get_changed_items(target, current)
+        }
+        write_properties(scenes, target, current)
+
+        strips = self.scene.sequence_editor.sequences_all
+        if reload and changed_scenes:
+            reload_strips(
+                [
+                    strip
+                    for strip in strips
+                    if isinstance(strip, bpy.types.SceneSequence)
+                    and strip.scene
+                    and strip.scene.name in changed_scenes
+                ]
+            )
+
+        strip_names = [strip.name for strip in strips]
+        for _ in range(MAX_RESTORE_PASSES):
+            current = read_properties(strips, STRIP_TIMING_PROPERTIES)
+            target = self._get_target_values(
+                self.strip_names, self.strips_timing, strip_names, current
+            )
+            if not len(get_changed_items(target, current)):
+                return
+            write_properties(strips, target, current)
+
+        current = read_properties(strips, STRIP_TIMING_PROPERTIES)
+        if len(changed := get_changed_items(target, current)):
+            log.warning(
+                "Timing of %d strip(s) could not be restored: %s",
+                len(changed),
+                ", ".join(strip_names[idx] for idx in changed),
+            )
+
+
+@contextmanager
+def timing_checkpoint(scene: bpy.types.Scene):
+    """
+    A context manager restoring the timing state of `scene`'s edit if an exception
+    is raised within its scope.
+
+    :param scene: The edit scene.
+    """
+    checkpoint = TimingCheckpoint(scene)
+    try:
+        yield checkpoint
+    except Exception:
+        checkpoint.restore()
+        raise
@@ -1,7 +1,8 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright (C) 2023, The SPA Studios. All rights reserved.
 
-from typing import Callable
+from contextlib import contextmanager
+from typing import Callable, Iterable, NamedTuple, Optional
 
 import bpy
 
@@ -235,15 +236,106 @@ def remap_relations(manifest: DuplicationManifest):
         _remap_drivers(new_datablock)
 
 
+# Scene settings structures transferred to duplicated scenes.
+SCENE_SETTINGS_STRUCTS = (
+    "render",
+    "unit_settings",
+    "display_settings",
+    "view_settings",
+    "sequencer_colorspace_settings",
+    "display",
+    "eevee",
+    "grease_pencil_settings",
+)
+
+# Scene properties not transferred to duplicated scenes.
+SCENE_SETTINGS_EXCLUDED = {"name", "use_nodes"} | {
+    prop.identifier for prop in bpy.types.ID.bl_rna.properties
+}
+
+
+def copy_struct_properties(
+    src: bpy.types.bpy_struct,
+    dst: bpy.types.bpy_struct,
+    exclude: Optional[set[str]] = None,
+):
+    """Recursively copy editable properties of `src` to `dst`.
+    Nested structures are copied recursively, pointers to datablocks are shared and
+    collections are ignored.
+
+    :param src: The source structure
+    :param dst: The destination structure, of the same type as `src`
+    :param exclude: Identifiers of the properties to ignore
+    """
+    exclude = exclude or set()
+    for prop in src.bl_rna.properties:
+        if prop.identifier == "rna_type" or prop.identifier in exclude:
+            continue
+        if prop.type == "COLLECTION":
+            continue
+        value = getattr(src, prop.identifier)
+        if (
+            prop.type == "POINTER"
+            and prop.is_readonly
+            and value is not None
+            and not isinstance(value, bpy.types.ID)
+        ):
+            if (dst_value := getattr(dst, prop.identifier)) is not None:
+                copy_struct_properties(value, dst_value)
+            continue
+        if prop.is_readonly:
+            continue
+        try:
+            setattr(dst, prop.identifier, value)
+        except (AttributeError, TypeError, ValueError, RuntimeError):
+            # Some properties can't be set in every state (e.g. invalid enum items).
+            pass
+
+
+def copy_scene_settings(src: bpy.types.Scene, dst: bpy.types.Scene):
+    """Copy the settings of `src` to `dst`, without content (collections, objects,
+    sequencer), similarly to the "Copy Settings" new scene operator.
+
+    :param src: The source scene
+    :param dst: The destination scene
+    """
+
+    def _get_nested_properties(struct: bpy.types.bpy_struct) -> set[str]:
+        return {
+            prop.identifier
+            for prop in struct.bl_rna.properties
+            if prop.type in {"POINTER", "COLLECTION"}
+        }
+
+    copy_struct_properties(
+        src, dst, exclude=SCENE_SETTINGS_EXCLUDED | _get_nested_properties(src)
+    )
+    # Frame range end may have been clamped while setting frame start.
+    dst.frame_end = src.frame_end
+    for attr in SCENE_SETTINGS_STRUCTS:
+        copy_struct_properties(getattr(src, attr), getattr(dst, attr))
+    # Paint modes settings are created on demand: only copy top-level tool settings.
+    copy_struct_properties(
+        src.tool_settings,
+        dst.tool_settings,
+        exclude=_get_nested_properties(src.tool_settings),
+    )
+    # Custom and add-ons properties (e.g. Cycles settings).
+    for key, value in src.items():
+        dst[key] = value.to_dict() if hasattr(value, "to_dict") else value
+
+
 def duplicate_scene(
-    context: bpy.types.Context,
+    context: Optional[bpy.types.Context],
     scene: bpy.types.Scene,
     name: str,
     manifest: DuplicationManifest = None,
 ) -> bpy.types.Scene:
     """Duplicates `scene` as a new scene named `name`.
+    Only relies on the data API, so it can be used without a window (e.g. in
+    background mode or timers).
 
-    :param context: The context
+    :param context: Unused, kept for backward compatibility (can be None)
     :param scene: The Scene to duplicate
     :param name: The name of the new scene
     :param manifest: The duplication manifest mapping source-to-duplicated datablocks
@@ -252,24 +344,9 @@ def duplicate_scene(
     if name in bpy.data.scenes:
         raise ValueError(f"Scene '{scene}' already exists")
 
-    # Creating a new empty scene leads to no camera being available.
-    # This makes all 3D viewports switch to user perspective mode.
-    # To avoid such changes in the UI and restore them properly,
-    # save 3D views view_perspective modes before the operation.
-    region3D_view_mode: dict[bpy.types.RegionView3D, str] = {}
-    for area in bpy.context.screen.areas:
-        if area.type == "VIEW_3D":
-            region = area.spaces.active.region_3d
-            region3D_view_mode[region] = region.view_perspective
-
     # Create a new scene based on the source scene's settings
-    # Note: context override is not enough here - we need to make the scene to duplicate
-    #       the active scene, as the operator uses that internally.
-    initial_window_scene = context.window.scene
-    context.window.scene = scene
-    bpy.ops.scene.new(type="EMPTY")
-    # This operator makes the newly created scene active
-    new_scene = context.window.scene
+    new_scene = bpy.data.scenes.new(scene.name)
+    copy_scene_settings(scene, new_scene)
 
     if manifest is None:
         manifest = DuplicationManifest()
@@ -309,44 +386,149 @@ def duplicate_scene(
 
     new_scene.name = name
 
-    # Restore active window to initial scene
-    context.window.scene = initial_window_scene
+    return new_scene
 
-    # Restore 3D views perspective mode
-    for region3D, view_mode in region3D_view_mode.items():
-        region3D.view_perspective = view_mode
 
-    return new_scene
+# Data structure to map datablocks to their new name
+RenamingPlan = dict[bpy.types.ID, str]
 
+# Prefix of the temporary names used while applying a renaming plan
+RENAMING_TMP_PREFIX = ".tmp.rename."
 
-def rename_all_datablocks_from_collection(
-    col: bpy.types.Collection, old_substr: str, new_substr: str
-):
-    """Recursively rename all local single-users datablocks starting from `col`,
-    by replacing occurences of `old_substr` by `new_substr`.
-
-    :param col: The root collection to start the renaming from
-    :param old_substr: the substring to replace
-    :param new_substr: the new substring to use
-    """
-    # Rename the collection itself
-    replace_in_datablock_name(col, old_substr, new_substr)
-
-    # Rename collection content
-    for obj in col.objects:
-        # Rename object, data and any attached action
-        for datablock in (obj, obj.data):
-            if not datablock:
-                continue
-            replace_in_datablock_name(datablock, old_substr, new_substr)
-            if datablock.animation_data and datablock.animation_data.action:
-                replace_in_datablock_name(
-                    datablock.animation_data.action, old_substr, new_substr
-                )
 
-    # Recursively rename children collections
-    for child_col in col.children:
-        rename_all_datablocks_from_collection(child_col, old_substr, new_substr)
+def walk_scene_datablocks(scene: bpy.types.Scene) -> list[bpy.types.ID]:
+    """
+    Get all datablocks within `scene`, i.e. the collections, objects, object data
+    and attached actions reachable from its master collection.
+
+    :param scene: The scene to consider
+    :return: The datablocks, without duplicates
+    """
+    return walk_collection_datablocks(scene.collection)
+
+
+def walk_collection_datablocks(collection: bpy.types.Collection) -> list[bpy.types.ID]:
+    """
+    Get all datablocks within `collection`, i.e. the collection itself and the
+    collections, objects, object data and attached actions reachable from it.
+
+    :param collection: The collection to consider
+    :return: The datablocks, without duplicates
+    """
+    datablocks: dict[bpy.types.ID, None] = {}
+    visited_collections: set[bpy.types.Collection] = set()
+
+    def add_datablock(datablock: bpy.types.ID):
+        """Add `datablock` and its attached action if any."""
+        if not datablock or datablock in datablocks:
+            return
+        datablocks[datablock] = None
+        anim_data = getattr(datablock, "animation_data", None)
+        if anim_data and anim_data.action:
+            datablocks.setdefault(anim_data.action, None)
+
+    def add_collection(col: bpy.types.Collection):
+        """Add `col` and its content, recursively."""
+        if col in visited_collections:
+            return
+        visited_collections.add(col)
+        datablocks.setdefault(col, None)
+        for obj in col.objects:
+            add_datablock(obj)
+            add_datablock(obj.data)
+        for child_col in col.children:
+            add_collection(child_col)
+
+    add_collection(collection)
+
+    return list(datablocks)
+
+
+def get_scene_datablocks(scene: bpy.types.Scene) -> list[bpy.types.ID]:
+    """
+    Get all local single-user datablocks within `scene` (see `walk_scene_datablocks`).
+
+    :param scene: The scene to consider
+    :return: The datablocks, without duplicates
+    """
+    return [db for db in walk_scene_datablocks(scene) if is_local_single_user(db)]
+
+
+def build_scenes_datablocks_index(
+    scenes: list[bpy.types.Scene],
+) -> dict[bpy.types.Scene, list[bpy.types.ID]]:
+    """
+    Build the index of datablocks owned by each scene in `scenes`.
+    A datablock reachable from several scenes (e.g. through a shared collection)
+    is owned by the first one.
+
+    :param scenes: The scenes to consider
+    :return: The owned datablocks (see `get_scene_datablocks`), by scene
+    """
+    index: dict[bpy.types.Scene, list[bpy.types.ID]] = {}
+    owned: set[bpy.types.ID] = set()
+    for scene in scenes:
+        datablocks = [db for db in get_scene_datablocks(scene) if db not in owned]
+        owned.update(datablocks)
+        index[scene] = datablocks
+    return index
+
+
+def plan_scenes_renaming(renames: dict[bpy.types.Scene, str]) -> RenamingPlan:
+    """
+    Plan the renaming of several scenes at once: each scene is renamed and
+    occurences of its original name are replaced by its new name in all the local
+    single-user datablocks it owns.
+    Scenes can swap names, as long as new scene names do not conflict with the
+    scenes that are not renamed.
+
+    :param renames: The new name of each scene to rename
+    :return: The renaming plan
+    """
+    # Discard scenes that are already named correctly
+    renames = {scene: name for scene, name in renames.items() if scene.name != name}
+
+    new_names = list(renames.values())
+    if len(set(new_names)) != len(new_names):
+        raise ValueError("Several scenes cannot use the same name")
+    # Avoid clashing names with scenes that are not renamed
+    for new_name in new_names:
+        if (scene := bpy.data.scenes.get(new_name)) and scene not in renames:
+            raise ValueError(f"Scene '{new_name}' already exists")
+
+    plan = RenamingPlan()
+    index = build_scenes_datablocks_index(list(renames.keys()))
+    for scene, datablocks in index.items():
+        old_name, new_name = scene.name, renames[scene]
+        for datablock in datablocks:
+            if old_name in datablock.name:
+                plan[datablock] = datablock.name.replace(old_name, new_name)
+        plan[scene] = new_name
+
+    return plan
+
+
+def apply_renaming_plan(plan: RenamingPlan):
+    """Rename the datablocks of `plan`.
+
+    :param plan: The renaming plan
+    """
+    # Use temporary names first to avoid clashes between datablocks to rename
+    # (e.g. when swapping names).
+    for idx, datablock in enumerate(plan):
+        datablock.name = f"{RENAMING_TMP_PREFIX}{idx}"
+    for datablock, new_name in plan.items():
+        datablock.name = new_name
+
+
+def rename_scenes(renames: dict[bpy.types.Scene, str]):
+    """
+    Rename several scenes at once and replace occurences of their original name by
+    their new name in all local single-user datablocks within them.
+
+    :param renames: The new name of each scene to rename
+    """
+    apply_renaming_plan(plan_scenes_renaming(renames))
 
 
 def rename_scene(scene: bpy.types.Scene, new_name: str):
@@ -356,17 +538,7 @@ def rename_scene(scene: bpy.types.Scene, new_name: str):
     :param scene: The scene to rename
     :param new_name: The new name of the scene
     """
-    # Early return if the scene is already name correctly
-    if scene.name == new_name:
-        return
-    # Avoid clashing names if a scene is already named `new_name`
-    if new_name in bpy.data.scenes:
-        raise ValueError(f"Scene '{new_name}' already exists")
-
-    # Rename scene content
-    rename_all_datablocks_from_collection(scene.collection, scene.name, new_name)
-    # Rename the scene itself
-    scene.name = scene.name.replace(scene.name, new_name)
+    rename_scenes({scene: new_name})
 
 
 def is_orphan(datablock: bpy.types.ID) -> bool:
@@ -457,31 +629,112 @@ def delete_scene(scene: bpy.types.Scene, purge_orphan_datablocks: bool) -> int:
     return del_count
 
 
+def delete_orphan_datablocks(datablocks: Iterable[bpy.types.ID]) -> int:
+    """
+    Delete the local datablocks of `datablocks` that are left without users, e.g.
+    after deleting the scene using them, as a scoped alternative to purging the
+    orphan datablocks of the whole file.
+    Datablocks only used by deleted datablocks are deleted as well.
+
+    :param datablocks: The datablocks to consider, which must not be embedded in
+        deleted datablocks (e.g. the master collection of a deleted scene)
+    :returns: The number of deleted datablocks
+    """
+    datablocks = [db for db in dict.fromkeys(datablocks) if not db.library]
+    del_count = 0
+    while True:
+        orphans = [db for db in datablocks if db.users == 0]
+        if not orphans:
+            return del_count
+        datablocks = [db for db in datablocks if db.users > 0]
+        bpy.data.batch_remove(orphans)
+        del_count += len(orphans)
+
+
+# Strips waiting to be reloaded, per sequencer scene, as pointers mapped to names.
+# See `batch_strip_reload`.
+_strips_reload_queue: dict[bpy.types.Scene, dict[int, str]] = {}
+# Depth of nested `batch_strip_reload` scopes.
+_strips_reload_batch_depth: int = 0
+
+
+def reload_strips(strips: Iterable[bpy.types.Sequence]):
+    """
+    Re-evaluate content length and update `strips` display in the sequencer.
+    Strips are reloaded with a single operator call per sequencer scene.
+
+    :param strips: The strips to reload.
+    """
+    strips_by_scene: dict[bpy.types.Scene, list[bpy.types.Sequence]] = {}
+    for strip in strips:
+        strips_by_scene.setdefault(strip.id_data, []).append(strip)
+
+    for scene, scene_strips in strips_by_scene.items():
+        # For strips to re-evaluate their internal scene duration, we need
+        # to call the sequencer.reload operator, which runs on selected strips.
+        # Adjust sequence editor selection for this to work properly.
+        # Store sequence editor selection
+        selected_strips = [
+            (s, s.select_left_handle, s.select_right_handle)
+            for s in scene.sequence_editor.sequences
+            if s.select
+        ]
+
+        with bpy.context.temp_override(scene=scene):
+            # Deselect everything but our strips
+            bpy.ops.sequencer.select_all(action="DESELECT")
+            for strip in scene_strips:
+                strip.select = True
+            # Force re-evaluation of strip scene's internal range and update strip
+            # display
+            bpy.ops.sequencer.reload()
+            # Restore sequence editor selection
+            bpy.ops.sequencer.select_all(action="DESELECT")
+            for strip, left, right in selected_strips:
+                strip.select = True
+                strip.select_left_handle = left
+                strip.select_right_handle = right
+
+
 def reload_strip(strip: bpy.types.Sequence):
-    """Re-evaluate content length and update `strip` display in the sequencer."""
-    # For the strip to re-evaluate its internal scene duration, we need
-    # to call the sequencer.reload operator, which runs on selected strips.
-    # Adjust sequence editor selection for this to work properly.
-    scene = strip.id_data
-    # Store sequence editor selection
-    selected_strips = [
-        (s, s.select_left_handle, s.select_right_handle)
-        for s in scene.sequence_editor.sequences
-        if s.select
-    ]
-
-    with bpy.context.temp_override(scene=scene):
-        # Deselect everything but our strip
-        bpy.ops.sequencer.select_all(action="DESELECT")
-        strip.select = True
-        # Force re-evaluation of strip scene's internal range and update strip display
-        bpy.ops.sequencer.reload()
-        # Restore sequence editor selection
-        bpy.ops.sequencer.select_all(action="DESELECT")
-        for strip, left, right in selected_strips:
-            strip.select = True
-            strip.select_left_handle = left
-            strip.select_right_handle = right
+    """
+    Re-evaluate content length and update `strip` display in the sequencer.
+    Within a `batch_strip_reload` scope, the reload is deferred until the outermost
+    scope exits.
+    """
+    if _strips_reload_batch_depth > 0:
+        _strips_reload_queue.setdefault(strip.id_data, {})[
+            strip.as_pointer()
+        ] = strip.name
+        return
+    reload_strips([strip])
+
+
+@contextmanager
+def batch_strip_reload():
+    """
+    A context manager batching the strip reloads requested by `reload_strip`.
+    Strips are gathered and reloaded all at once when the outermost scope exits.
+    """
+    global _strips_reload_batch_depth
+    _strips_reload_batch_depth += 1
+    try:
+        yield
+    finally:
+        _strips_reload_batch_depth -= 1
+        if _strips_reload_batch_depth == 0 and _strips_reload_queue:
+            # Resolve strips from their pointers, so that strips renamed meanwhile
+            # are still found, falling back to their names. Strips removed meanwhile
+            # are ignored.
+            strips = []
+            for scene, queued in _strips_reload_queue.items():
+                sequences = scene.sequence_editor.sequences_all
+                strips_by_pointer = {s.as_pointer(): s for s in sequences}
+                for pointer, name in queued.items():
+                    if strip := strips_by_pointer.get(pointer) or sequences.get(name):
+                        strips.append(strip)
+            _strips_reload_queue.clear()
+            reload_strips(strips)
 
 
 def adapt_scene_range(strip: bpy.types.SceneSequence):
@@ -495,28 +748,21 @@ def adapt_scene_range(strip: bpy.types.SceneSequence):
     reload_strip(strip)
 
 
-def adjust_shot_duration(
+def clamp_shot_duration_offset(
     strip: bpy.types.SceneSequence,
     frame_offset: int,
     from_frame_start: bool = False,
-) -> bool:
+) -> int:
     """
-    Adjust the duration of `strip` and its underlying scene by offsetting either its end
-    or start frame (`from_frame_start` set to True) by `frame_offset`.
-    All strips on the same channel after `strip` are shifted accordingly.
-
-    Note that `frame_offset` is automatically clamped to:
+    Clamp `frame_offset` to a valid duration offset for `strip`, i.e:
     - ensure a minimum strip duration of 1
     - from frame start: stay in strip's scene range
 
-    :param strip: The strip to adjust the duration of.
-    :param frame_offset: The frame offset to apply.
-    :param from_frame_start: Whether to offset shot's inner start frame rather than its end frame.
-    :return: Whether the function modified the duration of `strip`.
+    :param strip: The strip to consider.
+    :param frame_offset: The frame offset to clamp.
+    :param from_frame_start: Whether the offset applies to shot's inner start frame.
+    :return: The clamped frame offset.
     """
-    if not strip.scene:
-        raise ValueError(f"Invalid shot: no scene set for '{strip.name}'")
-
     # Ensure the shot lasts at least 1 frame and compute effective offset
     new_duration = max(strip.frame_final_duration + frame_offset, 1)
     new_frame_offset = new_duration - strip.frame_final_duration
@@ -532,15 +778,21 @@ def adjust_shot_duration(
             strip.frame_final_start, strip
         )
 
-    if new_frame_offset == 0:
-        return False
+    return new_frame_offset
 
-    # Get sequence editor and scene from strip
-    sed_scene: bpy.types.Scene = strip.id_data
-    sed: bpy.types.SequenceEditor = sed_scene.sequence_editor
 
-    # Identify the other strips that must be shifted to adjust to this duration change
-    impacted_strips = sorted(
+def get_ripple_impacted_strips(
+    strip: bpy.types.Sequence,
+) -> list[bpy.types.Sequence]:
+    """
+    Get the strips on the same channel as `strip` that start after it, sorted by
+    start frame. Those are the strips to shift when `strip`'s duration changes.
+
+    :param strip: The strip to consider.
+    :return: The sorted list of impacted strips.
+    """
+    sed: bpy.types.SequenceEditor = strip.id_data.sequence_editor
+    return sorted(
         (
             s
             for s in sed.sequences
@@ -549,6 +801,24 @@ def adjust_shot_duration(
         ),
         key=lambda s: s.frame_final_start,
     )
+
+
+def apply_shot_duration_offset(
+    strip: bpy.types.SceneSequence,
+    impacted_strips: list[bpy.types.Sequence],
+    frame_offset: int,
+    from_frame_start: bool = False,
+):
+    """
+    Offset the duration of `strip` by `frame_offset` and shift `impacted_strips`
+    accordingly. `frame_offset` is expected to be valid (see
+    `clamp_shot_duration_offset`) and strip's scene range is not adapted.
+
+    :param strip: The strip to adjust the duration of.
+    :param impacted_strips: The strips to shift, sorted by start frame.
+    :param frame_offset: The frame offset to apply.
+    :param from_frame_start: Whether to offset shot's inner start frame rather than its end frame.
+    """
     # Shift all impacted strips by offset.
     # Note: we adjust order of execution based on offset's sign to avoid
     #       overlaps at all time and strips automatically changing channels.
@@ -557,43 +827,288 @@ def adjust_shot_duration(
     #              strip's frame final start.
     if from_frame_start:
         # Positive offset: increase frame start => decrease strip duration
-        if new_frame_offset > 0:
+        if frame_offset > 0:
             # 1. Adjust strip values
-            strip.frame_offset_start += new_frame_offset
-            strip.frame_start -= new_frame_offset
+            strip.frame_offset_start += frame_offset
+            strip.frame_start -= frame_offset
             # 2. Move impacted strips to the left
             for s in impacted_strips:
-                s.frame_start -= new_frame_offset
+                s.frame_start -= frame_offset
         # Negative offset: decrease frame start => increase strip duration
         else:
             # 1. Move impacted strips to the right (reversed order)
             for s in reversed(impacted_strips):
-                s.frame_start -= new_frame_offset
+                s.frame_start -= frame_offset
             # 2. Adjust strip values
-            strip.frame_start -= new_frame_offset
-            strip.frame_offset_start += new_frame_offset
+            strip.frame_start -= frame_offset
+            strip.frame_offset_start += frame_offset
 
     # Frame end: shift scene and strip's final frame by offset.
     else:
         # Positive offset: increase frame end => increase duration
-        if new_frame_offset > 0:
+        if frame_offset > 0:
             # 1. Move impacted strips to the right (reversed order)
             for s in reversed(impacted_strips):
-                s.frame_start += new_frame_offset
+                s.frame_start += frame_offset
             # 2. Adjust strip's duration
-            strip.frame_final_end += new_frame_offset
+            strip.frame_final_end += frame_offset
         # Negative offset: decrease frame end => decrease duration
         else:
             # 1. Adjust strip's duration
-            strip.frame_final_duration += new_frame_offset
+            strip.frame_final_duration += frame_offset
             # 2. Move impacted strips to the left
             for s in impacted_strips:
-                s.frame_start += new_frame_offset
+                s.frame_start += frame_offset
+
+
+def adjust_shot_duration(
+    strip: bpy.types.SceneSequence,
+    frame_offset: int,
+    from_frame_start: bool = False,
+) -> bool:
+    """
+    Adjust the duration of `strip` and its underlying scene by offsetting either its end
+    or start frame (`from_frame_start` set to True) by `frame_offset`.
+    All strips on the same channel after `strip` are shifted accordingly.
+
+    Note that `frame_offset` is automatically clamped to:
+    - ensure a minimum strip duration of 1
+    - from frame start: stay in strip's scene range
+
+    :param strip: The strip to adjust the duration of.
+    :param frame_offset: The frame offset to apply.
+    :param from_frame_start: Whether to offset shot's inner start frame rather than its end frame.
+    :return: Whether the function modified the duration of `strip`.
+    """
+    if not strip.scene:
+        raise ValueError(f"Invalid shot: no scene set for '{strip.name}'")
+
+    new_frame_offset = clamp_shot_duration_offset(strip, frame_offset, from_frame_start)
+
+    if new_frame_offset == 0:
+        return False
+
+    # Identify the other strips that must be shifted to adjust to this duration change
+    impacted_strips = get_ripple_impacted_strips(strip)
+    apply_shot_duration_offset(
+        strip, impacted_strips, new_frame_offset, from_frame_start
+    )
 
     adapt_scene_range(strip)
     return True
 
 
+class ShotRippleEdit:
+    """
+    Interactive ripple edit of a shot's duration.
+
+    The strips impacted by the edit are gathered once at creation time, and successive
+    calls to `apply` only shift them by the difference with the previously applied
+    offset. Scene ranges update (and the costly strip reload it implies) is deferred
+    until the edit is committed.
+    """
+
+    def __init__(self, strip: bpy.types.SceneSequence, from_frame_start: bool = False):
+        """
+        :param strip: The strip to adjust the duration of.
+        :param from_frame_start: Whether to offset shot's inner start frame rather than its end frame.
+        """
+        if not strip.scene:
+            raise ValueError(f"Invalid shot: no scene set for '{strip.name}'")
+
+        self.strip = strip
+        self.from_frame_start = from_frame_start
+        self.impacted_strips = get_ripple_impacted_strips(strip)
+        # Currently applied offset, relative to the original state.
+        # NOTE: Expressed as in `apply_shot_duration_offset`, i.e. as an inner start
+        #       frame offset when adjusting from frame start.
+        self.offset: int = 0
+        # Original values, used to evaluate offset clamping and scene range changes.
+        self.original_duration: int = strip.frame_final_duration
+        self.original_inner_start: int = remap_frame_value(
+            strip.frame_final_start, strip
+        )
+        self.original_scene_frame_end: int = strip.scene.frame_end
+        self.original_edit_frame_end: int = strip.id_data.frame_end
+
+    def clamp_offset(self, frame_offset: int) -> int:
+        """
+        Clamp the duration offset `frame_offset` (relative to the original state)
+        to a valid value (see `clamp_shot_duration_offset`).
+
+        :param frame_offset: The frame offset to clamp.
+        :return: The clamped frame offset, to use with `apply_shot_duration_offset`.
+        """
+        new_duration = max(self.original_duration + frame_offset, 1)
+        new_frame_offset = new_duration - self.original_duration
+        if self.from_frame_start:
+            new_start_frame = max(
+                self.original_inner_start - new_frame_offset,
+                self.strip.scene.frame_start,
+            )
+            new_frame_offset = new_start_frame - self.original_inner_start
+        return new_frame_offset
+
+    def apply(self, frame_offset: int) -> int:
+        """Set the duration offset of the edited shot to `frame_offset`.
+
+        :param frame_offset: The duration offset, relative to the original state.
+        :return: The effective duration offset, relative to the original state.
+        """
+        new_offset = self.clamp_offset(frame_offset)
+        if delta := new_offset - self.offset:
+            apply_shot_duration_offset(
+                self.strip, self.impacted_strips, delta, self.from_frame_start
+            )
+            self.offset = new_offset
+        return self.strip.frame_final_duration - self.original_duration
+
+    def revert(self):
+        """Restore the original timing of the edited strips."""
+        self.apply(0)
+
+    def commit(self):
+        """
+        Finalize the edit by ensuring strip's range is fully contained in its scene
+        and in the edit scene, and reloading the strip if scene's range has changed.
+        """
+        strip = self.strip
+        strip.id_data.frame_end = max(
+            strip.frame_final_end - 1, self.original_edit_frame_end
+        )
+        new_frame_end = remap_frame_value(strip.frame_final_end - 1, strip)
+        if new_frame_end > strip.scene.frame_end:
+            strip.scene.frame_end = new_frame_end
+        if strip.scene.frame_end != self.original_scene_frame_end:
+            reload_strip(strip)
+
+
+class ShotRetime(NamedTuple):
+    """Timing change of a shot, used for bulk retime (see `retime_shots`)."""
+
+    # New duration of the shot, None to keep the current one.
+    duration: Optional[int] = None
+    # Offset applied to the start frame of the shot.
+    offset: int = 0
+
+
+class StripLayout(NamedTuple):
+    """Final range of a strip."""
+
+    frame_start: int
+    duration: int
+
+    @property
+    def frame_end(self) -> int:
+        return self.frame_start + self.duration
+
+
+def plan_shots_retime(
+    sed: bpy.types.SequenceEditor,
+    retimes: dict[bpy.types.Sequence, ShotRetime],
+) -> dict[bpy.types.Sequence, StripLayout]:
+    """
+    Compute the new layout of the channels impacted by `retimes`.
+    On each channel, strips following a retimed strip are shifted to keep the gaps
+    between strips, and a strip never starts before the end of the previous one.
+
+    :param sed: The sequence editor.
+    :param retimes: The timing changes by strip.
+    :return: The new layout of the strips whose range changes.
+    """
+    layout: dict[bpy.types.Sequence, StripLayout] = {}
+    channels = {strip.channel for strip in retimes}
+    for channel in channels:
+        strips = sorted(
+            (s for s in sed.sequences if s.channel == channel),
+            key=lambda s: s.frame_final_start,
+        )
+        shift = 0
+        previous_end = None
+        for strip in strips:
+            retime = retimes.get(strip, ShotRetime())
+            start = strip.frame_final_start + shift + retime.offset
+            if previous_end is not None:
+                start = max(start, previous_end)
+            duration = (
+                strip.frame_final_duration
+                if retime.duration is None
+                else max(retime.duration, 1)
+            )
+            new_layout = StripLayout(start, duration)
+            # Following strips are shifted by the change of this strip's end frame.
+            shift = new_layout.frame_end - strip.frame_final_end
+            previous_end = new_layout.frame_end
+            if new_layout != (strip.frame_final_start, strip.frame_final_duration):
+                layout[strip] = new_layout
+    return layout
+
+
+def apply_strips_layout(layout: dict[bpy.types.Sequence, StripLayout]):
+    """
+    Apply `layout` to the strips, expected to be free of overlaps once applied.
+    Changes are ordered so that strips never overlap in between, which would make
+    them automatically change channel:
+    1. shrink strips
+    2. move strips to the left, from left to right
+    3. move strips to the right, from right to left
+    4. extend strips
+
+    :param layout: The new layout of the strips.
+    """
+    for strip, strip_layout in layout.items():
+        if strip_layout.duration < strip.frame_final_duration:
+            strip.frame_final_duration = strip_layout.duration
+
+    moves = sorted(
+        (
+            (strip, strip_layout.frame_start - strip.frame_final_start)
+            for strip, strip_layout in layout.items()
+            if strip_layout.frame_start != strip.frame_final_start
+        ),
+        key=lambda item: item[0].frame_final_start,
+    )
+    for strip, offset in moves:
+        if offset < 0:
+            strip.frame_start += offset
+    for strip, offset in reversed(moves):
+        if offset > 0:
+            strip.frame_start += offset
+
+    for strip, strip_layout in layout.items():
+        if strip_layout.duration > strip.frame_final_duration:
+            strip.frame_final_end = strip.frame_final_start + strip_layout.duration
+
+
+def retime_shots(
+    retimes: dict[bpy.types.SceneSequence, ShotRetime]
+) -> dict[bpy.types.Sequence, StripLayout]:
+    """
+    Change the duration and start frame of several shots at once, shifting the
+    following strips on their channels (see `plan_shots_retime`).
+    Shots' scene ranges are extended if needed and the impacted strips reloaded
+    in a single batch.
+
+    :param retimes: The timing changes by shot strip.
+    :return: The applied layout.
+    """
+    if not retimes:
+        return {}
+    if invalid := [s.name for s in retimes if not s.scene]:
+        raise ValueError(f"Invalid shots: no scene set for {', '.join(invalid)}")
+
+    sed = next(iter(retimes)).id_data.sequence_editor
+    layout = plan_shots_retime(sed, retimes)
+    apply_strips_layout(layout)
+
+    with batch_strip_reload():
+        for strip in layout:
+            if isinstance(strip, bpy.types.SceneSequence) and strip.scene:
+                adapt_scene_range(strip)
+
+    return layout
+
+
 def slip_shot_content(
     strip: bpy.types.SceneSequence, frame_offset: int, clamp_start: bool = False
 ):
@@ -632,21 +1147,86 @@ def slip_shot_content(
     adapt_scene_range(strip)
 
 
+class ShotScenesRegistry:
+    """
+    Cached registry of the scenes usable by shot strips and of the shot template
+    scenes.
+    The registry is rebuilt on demand when scenes are added, removed or renamed,
+    when objects are added or removed, when the content of scenes' master
+    collections changes, when the master scene or the template prefix change, and
+    after it has been invalidated (e.g. on collection membership changes).
+    """
+
+    def __init__(self):
+        # Key of the file's state the registry was built from.
+        self._key: Optional[tuple] = None
+        # Scenes usable by shot strips.
+        self.shot_scenes: list[bpy.types.Scene] = []
+        # Scenes matching the template naming rule defined in preferences.
+        self.template_scenes: list[bpy.types.Scene] = []
+
+    def invalidate(self):
+        """Invalidate the registry, forcing it to be rebuilt on next update."""
+        self._key = None
+
+    @staticmethod
+    def _build_key() -> tuple:
+        """Build the key identifying file's state regarding the classification."""
+        # NOTE: Counting scenes' objects would be as costly as a rebuild: use the
+        #       direct content of master collections and the number of objects as
+        #       cheap membership signals, the depsgraph handler catching the others.
+        return (
+            get_addon_prefs().shot_template_prefix,
+            get_sync_settings().master_scene,
+            len(bpy.data.objects),
+            tuple(
+                (
+                    scene,
+                    scene.name,
+                    len(scene.collection.objects),
+                    len(scene.collection.children),
+                )
+                for scene in bpy.data.scenes
+            ),
+        )
+
+    def update(self):
+        """Rebuild the registry if file's state has changed since last update."""
+        key = self._build_key()
+        if key == self._key:
+            return
+
+        prefix, master_scene, *_ = key
+        self.shot_scenes.clear()
+        self.template_scenes.clear()
+        for scene in bpy.data.scenes:
+            if scene.name.startswith(prefix):
+                self.template_scenes.append(scene)
+            elif (
+                # Discard master sync scene.
+                scene != master_scene
+                # Discard empty scenes.
+                and len(scene.collection.all_objects)
+            ):
+                self.shot_scenes.append(scene)
+
+        self._key = key
+
+
+# Global ShotScenesRegistry instance
+shot_scenes_registry = ShotScenesRegistry()
+
+
 def get_valid_shot_scenes() -> list[bpy.types.Scene]:
     """Return the list of scenes considered as usable by a shot strip."""
-    prefs = get_addon_prefs()
-    return [
-        scene
-        for scene in bpy.data.scenes
-        if (
-            # Discard template scenes.
-            not scene.name.startswith(prefs.shot_template_prefix)
-            # Discard master sync scene.
-            and scene != get_sync_settings().master_scene
-            # Discard empty scenes.
-            and len(scene.collection.all_objects)
-        )
-    ]
+    shot_scenes_registry.update()
+    return list(shot_scenes_registry.shot_scenes)
+
+
+def get_template_scenes() -> list[bpy.types.Scene]:
+    """Return the list of scenes matching the shot template naming rule."""
+    shot_scenes_registry.update()
+    return list(shot_scenes_registry.template_scenes)
 
 
 def get_scene_cameras(scene: bpy.types.Scene) -> list[bpy.types.Object]:
@@ -657,9 +1237,29 @@ def get_scene_cameras(scene: bpy.types.Scene) -> list[bpy.types.Object]:
     )
 
 
+@bpy.app.handlers.persistent
+def on_depsgraph_update_post(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    # Collection membership changes may impact scenes usability.
+    if depsgraph.id_type_updated("COLLECTION"):
+        shot_scenes_registry.invalidate()
+
+
+@bpy.app.handlers.persistent
+def on_shot_scenes_registry_reset(*args):
+    """Invalidate the shot scenes registry, when its references may be obsolete."""
+    shot_scenes_registry.invalidate()
+
+
 def register():
-    pass
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.load_post.append(on_shot_scenes_registry_reset)
+    bpy.app.handlers.undo_post.append(on_shot_scenes_registry_reset)
+    bpy.app.handlers.redo_post.append(on_shot_scenes_registry_reset)
 
 
 def unregister():
-    pass
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update_post)
+    bpy.app.handlers.load_post.remove(on_shot_scenes_registry_reset)
+    bpy.app.handlers.undo_post.remove(on_shot_scenes_registry_reset)
+    bpy.app.handlers.redo_post.remove(on_shot_scenes_registry_reset)
+    shot_scenes_registry.invalidate()
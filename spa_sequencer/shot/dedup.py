@@ -0,0 +1,391 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Detection and merge of duplicated datablocks across shot scenes.
+
+Datablocks are compared by hashing their content (mesh buffers, keyframes, node
+trees...). Identical datablocks are grouped, and their users remapped to a single
+survivor before the duplicates are removed.
+"""
+
+import hashlib
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import bpy
+import numpy as np
+
+from spa_sequencer.shot.memory import estimate_datablock_footprint
+
+
+# Datablock types that can be deduplicated, by order of processing, with their
+# bpy.data collection name.
+# NOTE: Materials are processed before meshes so that meshes using duplicated
+#       materials are detected as identical.
+DEDUPLICABLE_TYPES = {
+    "MATERIAL": "materials",
+    "MESH": "meshes",
+    "ACTION": "actions",
+}
+
+# Mesh attribute data types: (foreach_get key, number of components, buffer dtype).
+MESH_ATTRIBUTE_BUFFERS = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT2": ("vector", 2, np.float32),
+    "INT32_2D": ("value", 2, np.int32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+    "QUATERNION": ("value", 4, np.float32),
+    "FLOAT4X4": ("value", 16, np.float32),
+}
+
+# Keyframe properties: (foreach_get key, number of components, buffer dtype).
+KEYFRAME_BUFFERS = (
+    ("co", 2, np.float32),
+    ("handle_left", 2, np.float32),
+    ("handle_right", 2, np.float32),
+    ("interpolation", 1, np.int32),
+    ("handle_left_type", 1, np.int32),
+    ("handle_right_type", 1, np.int32),
+    ("easing", 1, np.int32),
+    ("back", 1, np.float32),
+    ("amplitude", 1, np.float32),
+    ("period", 1, np.float32),
+)
+
+# ID properties that do not contribute to a datablock's content.
+ID_IGNORED_PROPERTIES = {
+    "name",
+    "use_fake_user",
+    "use_extra_user",
+    "tag",
+    "asset_data",
+    "paint_active_slot",
+    "paint_clone_slot",
+    "preview_render_type",
+    "use_preview_world",
+    "preview",
+    "library_weak_reference",
+    "override_library",
+}
+
+# Mesh properties hashed separately (buffers, shape keys), or only affecting
+# texture painting.
+MESH_IGNORED_PROPERTIES = ID_IGNORED_PROPERTIES | {
+    "vertices",
+    "edges",
+    "loops",
+    "polygons",
+    "vertex_normals",
+    "polygon_normals",
+    "corner_normals",
+    "loop_triangles",
+    "loop_triangle_polygons",
+    "uv_layers",
+    "uv_layer_clone",
+    "uv_layer_stencil",
+    "vertex_colors",
+    "skin_vertices",
+    "attributes",
+    "color_attributes",
+    "shape_keys",
+    "materials",
+}
+
+# Properties of nested structs that do not contribute to their content.
+STRUCT_IGNORED_PROPERTIES = {"rna_type", "select"}
+
+# Nested struct types not hashed with the struct pointing to them: node trees are
+# hashed node by node (see `hash_node_tree`).
+STRUCT_IGNORED_TYPES = (bpy.types.Node, bpy.types.NodeSocket, bpy.types.NodeLink)
+
+# Node properties that only affect the node editor display.
+NODE_IGNORED_PROPERTIES = {
+    "location",
+    "width",
+    "height",
+    "select",
+    "hide",
+    "label",
+    "use_custom_color",
+    "color",
+    "show_options",
+    "show_preview",
+    "show_texture",
+}
+
+
+class DuplicatesGroup(NamedTuple):
+    """Group of datablocks with identical content."""
+
+    # The datablock to keep.
+    survivor: bpy.types.ID
+    # The datablocks to merge into the survivor.
+    duplicates: list[bpy.types.ID]
+
+    @property
+    def size(self) -> int:
+        """Estimated size in bytes saved by merging this group."""
+        return sum(estimate_datablock_footprint(db).size for db in self.duplicates)
+
+
+def hash_buffer(hasher, collection, key: str, components: int, dtype):
+    """Feed `hasher` with the values of `key` for all items in `collection`."""
+    buffer = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(key, buffer)
+    hasher.update(buffer.tobytes())
+
+
+def hashable_value(value, remap: dict[bpy.types.ID, bpy.types.ID]):
+    """Get a stable representation of a property `value`."""
+    if isinstance(value, bpy.types.ID):
+        value = remap.get(value, value)
+        return f"{value.id_type}:{value.name_full}"
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    # Arrays (bpy_prop_array, mathutils types)
+    return np.asarray(value).tolist()
+
+
+def hash_properties(
+    hasher,
+    struct: bpy.types.bpy_struct,
+    remap: dict[bpy.types.ID, bpy.types.ID],
+    ignored: set[str] = frozenset(),
+    nested: bool = False,
+    visited: Optional[set[tuple[str, int]]] = None,
+):
+    """
+    Feed `hasher` with the editable properties of `struct`.
+    Datablock pointers are hashed by identity (type and full name), after applying
+    `remap`.
+
+    :param ignored: The properties of `struct` to ignore.
+    :param nested: Whether to also hash, recursively, the properties of the nested
+        structs and collections `struct` points to (e.g. a ColorRamp's elements).
+    :param visited: The structs already hashed, not to hash them twice when they are
+        referenced several times.
+    """
+    if visited is None:
+        visited = set()
+    visited.add((type(struct).__name__, struct.as_pointer()))
+    for prop in struct.bl_rna.properties:
+        if prop.identifier in ignored or prop.identifier in STRUCT_IGNORED_PROPERTIES:
+            continue
+        if prop.type == "COLLECTION" and not nested:
+            continue
+        if prop.type == "COLLECTION":
+            items = getattr(struct, prop.identifier)
+            hasher.update(f"{prop.identifier}:{len(items)};".encode())
+            for item in items:
+                hash_nested_struct(hasher, item, remap, visited)
+            continue
+        if prop.type == "POINTER":
+            value = getattr(struct, prop.identifier)
+            if not isinstance(value, (bpy.types.ID, type(None))):
+                if not nested:
+                    continue
+                hasher.update(f"{prop.identifier}:".encode())
+                hash_nested_struct(hasher, value, remap, visited)
+                continue
+        if prop.is_readonly:
+            continue
+        value = hashable_value(getattr(struct, prop.identifier), remap)
+        hasher.update(f"{prop.identifier}={value!r};".encode())
+
+
+def hash_nested_struct(
+    hasher,
+    struct: bpy.types.bpy_struct,
+    remap: dict[bpy.types.ID, bpy.types.ID],
+    visited: set[tuple[str, int]],
+):
+    """
+    Feed `hasher` with the properties of `struct`, nested in another struct.
+    Datablocks are owned by bpy.data and hashed on their own.
+    """
+    if struct is None or isinstance(struct, (bpy.types.ID, *STRUCT_IGNORED_TYPES)):
+        return
+    if (type(struct).__name__, struct.as_pointer()) in visited:
+        return
+    hasher.update(f"{{{type(struct).__name__}:".encode())
+    hash_properties(hasher, struct, remap, nested=True, visited=visited)
+    hasher.update(b"}")
+
+
+def hash_node_tree(hasher, node_tree: bpy.types.NodeTree, remap):
+    """Feed `hasher` with `node_tree`'s nodes and links."""
+    for node in sorted(node_tree.nodes, key=lambda n: n.name):
+        hasher.update(f"node:{node.name}:{node.bl_idname};".encode())
+        hash_properties(hasher, node, remap, NODE_IGNORED_PROPERTIES, nested=True)
+        for socket in node.inputs:
+            if hasattr(socket, "default_value"):
+                value = hashable_value(socket.default_value, remap)
+                hasher.update(f"{socket.identifier}={value!r};".encode())
+    links = sorted(
+        (
+            link.from_node.name,
+            link.from_socket.identifier,
+            link.to_node.name,
+            link.to_socket.identifier,
+        )
+        for link in node_tree.links
+    )
+    hasher.update(repr(links).encode())
+
+
+def hash_material(material: bpy.types.Material, remap) -> bytes:
+    """Hash `material`'s settings and node tree."""
+    hasher = hashlib.blake2b()
+    hash_properties(hasher, material, remap, ID_IGNORED_PROPERTIES, nested=True)
+    if material.node_tree:
+        hash_node_tree(hasher, material.node_tree, remap)
+    return hasher.digest()
+
+
+def hash_mesh(mesh: bpy.types.Mesh, remap) -> bytes:
+    """
+    Hash `mesh`'s geometry, custom normals, materials, shape keys, vertex weights
+    and settings.
+    """
+    hasher = hashlib.blake2b()
+    hash_properties(hasher, mesh, remap, MESH_IGNORED_PROPERTIES, nested=True)
+    materials = [hashable_value(mat, remap) for mat in mesh.materials]
+    hasher.update(repr(materials).encode())
+    # Topology.
+    hash_buffer(hasher, mesh.polygons, "loop_start", 1, np.int32)
+    # Attributes, ignoring selection state.
+    for attr in sorted(mesh.attributes, key=lambda a: a.name):
+        if attr.name.startswith(".select"):
+            continue
+        hasher.update(f"attr:{attr.name}:{attr.data_type}:{attr.domain};".encode())
+        key, components, dtype = MESH_ATTRIBUTE_BUFFERS.get(
+            attr.data_type, ("value", 1, np.float32)
+        )
+        hash_buffer(hasher, attr.data, key, components, dtype)
+    # Custom normals, which are not stored as an attribute.
+    hasher.update(f"custom_normals:{mesh.has_custom_normals};".encode())
+    if mesh.has_custom_normals:
+        hash_buffer(hasher, mesh.corner_normals, "vector", 3, np.float32)
+    # Shape keys, hashed from their settings and blocks, the Key datablock being
+    # specific to each mesh.
+    if mesh.shape_keys:
+        hash_properties(hasher, mesh.shape_keys, remap, ID_IGNORED_PROPERTIES)
+        for key_block in mesh.shape_keys.key_blocks:
+            hash_properties(hasher, key_block, remap)
+            hasher.update(f"relative_key:{key_block.relative_key.name};".encode())
+            hash_buffer(hasher, key_block.data, "co", 3, np.float32)
+    # Vertex weights, read with `foreach_get` from the groups of each weighted
+    # vertex, as Blender has no accessor for all vertices' groups.
+    counts = np.array([len(vertex.groups) for vertex in mesh.vertices], np.int32)
+    groups = np.empty(counts.sum(), dtype=np.int32)
+    weights = np.empty(counts.sum(), dtype=np.float32)
+    offset = 0
+    for vertex, count in zip(mesh.vertices, counts):
+        if count:
+            vertex.groups.foreach_get("group", groups[offset : offset + count])
+            vertex.groups.foreach_get("weight", weights[offset : offset + count])
+            offset += count
+    for buffer in (counts, groups, weights):
+        hasher.update(buffer.tobytes())
+    return hasher.digest()
+
+
+def hash_action(action: bpy.types.Action, remap) -> bytes:
+    """Hash `action`'s settings (e.g. manual frame range), fcurves and keyframes."""
+    hasher = hashlib.blake2b()
+    hash_properties(hasher, action, remap, ID_IGNORED_PROPERTIES)
+    for fcurve in sorted(action.fcurves, key=lambda f: (f.data_path, f.array_index)):
+        hasher.update(
+            f"fcurve:{fcurve.data_path}:{fcurve.array_index}:"
+            f"{fcurve.extrapolation}:{fcurve.mute};".encode()
+        )
+        for modifier in fcurve.modifiers:
+            hasher.update(f"modifier:{modifier.type};".encode())
+            hash_properties(hasher, modifier, remap, nested=True)
+        for key, components, dtype in KEYFRAME_BUFFERS:
+            hash_buffer(hasher, fcurve.keyframe_points, key, components, dtype)
+    return hasher.digest()
+
+
+DATABLOCK_HASHERS: dict[str, Callable[[bpy.types.ID, dict], bytes]] = {
+    "MATERIAL": hash_material,
+    "MESH": hash_mesh,
+    "ACTION": hash_action,
+}
+
+
+def find_duplicate_datablocks(
+    datablocks: Iterable[bpy.types.ID],
+    id_type: str,
+    remap: dict[bpy.types.ID, bpy.types.ID],
+) -> list[DuplicatesGroup]:
+    """
+    Group datablocks of type `id_type` with identical content.
+    Linked and overridden datablocks are ignored since they can't be merged.
+    The survivor of each group is the one with the shortest name (i.e. the
+    original datablock rather than one of its ".001" copies).
+
+    :param datablocks: The datablocks to consider.
+    :param id_type: The type of the datablocks (see DEDUPLICABLE_TYPES).
+    :param remap: Pending datablock remapping, used when hashing datablock pointers.
+    :return: The groups of duplicates.
+    """
+    hash_func = DATABLOCK_HASHERS[id_type]
+    buckets: dict[bytes, list[bpy.types.ID]] = {}
+    for datablock in datablocks:
+        if datablock.library or datablock.override_library:
+            continue
+        buckets.setdefault(hash_func(datablock, remap), []).append(datablock)
+
+    groups = []
+    for bucket in buckets.values():
+        if len(bucket) < 2:
+            continue
+        bucket.sort(key=lambda db: (len(db.name), db.name))
+        groups.append(DuplicatesGroup(bucket[0], bucket[1:]))
+    return groups
+
+
+def find_duplicates(id_types: Iterable[str]) -> list[DuplicatesGroup]:
+    """
+    Find all groups of identical datablocks in the current file.
+
+    :param id_types: The datablock types to consider (see DEDUPLICABLE_TYPES).
+    :return: The groups of duplicates, by order of processing.
+    """
+    remap: dict[bpy.types.ID, bpy.types.ID] = {}
+    groups = []
+    for id_type, data_name in DEDUPLICABLE_TYPES.items():
+        if id_type not in id_types:
+            continue
+        type_groups = find_duplicate_datablocks(
+            getattr(bpy.data, data_name), id_type, remap
+        )
+        for group in type_groups:
+            remap.update(dict.fromkeys(group.duplicates, group.survivor))
+        groups += type_groups
+    return groups
+
+
+def merge_duplicates(groups: Iterable[DuplicatesGroup]) -> int:
+    """
+    Remap the users of duplicated datablocks to their group's survivor and remove
+    the duplicates.
+
+    :param groups: The groups of duplicates to merge.
+    :return: The number of removed datablocks.
+    """
+    duplicates = []
+    for group in groups:
+        for datablock in group.duplicates:
+            datablock.user_remap(group.survivor)
+            duplicates.append(datablock)
+    bpy.data.batch_remove(duplicates)
+    return len(duplicates)
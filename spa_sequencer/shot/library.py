@@ -0,0 +1,417 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+On-demand shot libraries.
+
+Shot scenes can be externalized to their own .blend file. In the edit file, they
+are then replaced by lightweight placeholder scenes that keep the frame range of
+the original scene, so that the timing of the strips using them is preserved.
+When the timeline synchronization enters a strip using a placeholder, the shot
+scene is linked or appended from its library, and the least recently visited
+shot scenes are unloaded to stay within a memory budget.
+"""
+
+import logging
+import os
+from typing import Iterable, Optional
+
+import bpy
+
+from spa_sequencer.shot.core import delete_orphan_datablocks
+from spa_sequencer.shot.memory import (
+    compute_scenes_memory_footprint,
+    walk_scene_removable_datablocks,
+)
+from spa_sequencer.sync.core import master_strip_callbacks
+from spa_sequencer.utils import register_classes, unregister_classes
+
+
+log = logging.getLogger(__name__)
+
+# Scene custom property identifying placeholder scenes.
+SCENE_PROP_PLACEHOLDER = "shot_library_placeholder"
+# Strip custom properties storing the library of the strip's scene.
+STRIP_PROP_LIBRARY_PATH = "shot_library_path"
+STRIP_PROP_LIBRARY_SCENE = "shot_library_scene"
+STRIP_PROP_LIBRARY_CAMERA = "shot_library_camera"
+
+# Scene settings copied to placeholder scenes.
+PLACEHOLDER_SCENE_SETTINGS = ("frame_start", "frame_end")
+PLACEHOLDER_RENDER_SETTINGS = ("fps", "fps_base", "resolution_x", "resolution_y")
+
+# Library paths of the shots, ordered from the least to the most recently visited.
+_shots_visit_order: dict[str, None] = {}
+
+# Edit scenes whose memory budget must be enforced, by name, with the pointer of
+# their last loaded shot scene (see `enforce_memory_budget_timer`).
+_pending_memory_budgets: dict[str, int] = {}
+
+
+class ShotLibrarySettings(bpy.types.PropertyGroup):
+    """On-demand shot libraries settings of an edit scene."""
+
+    enabled: bpy.props.BoolProperty(
+        name="Load On Demand",
+        description=(
+            "Load externalized shot scenes when the Timeline Synchronization "
+            "enters them"
+        ),
+        default=True,
+    )
+
+    directory: bpy.props.StringProperty(
+        name="Directory",
+        description="Directory where shot scenes are externalized",
+        subtype="DIR_PATH",
+        default="//shots/",
+    )
+
+    load_mode: bpy.props.EnumProperty(
+        name="Load Mode",
+        description="How shot scenes are loaded from their library",
+        items=(
+            ("LINK", "Link", "Link shot scenes (read-only)"),
+            (
+                "APPEND",
+                "Append",
+                "Append shot scenes (editable, saved back to their library when "
+                "unloaded)",
+            ),
+        ),
+        default="LINK",
+    )
+
+    memory_budget: bpy.props.IntProperty(
+        name="Memory Budget (MB)",
+        description=(
+            "Estimated memory the loaded shot scenes can use before the least "
+            "recently visited ones get unloaded (0 for unlimited)"
+        ),
+        default=4096,
+        min=0,
+    )
+
+
+def is_shot_placeholder(scene: bpy.types.Scene) -> bool:
+    """Whether `scene` is a shot library placeholder."""
+    return bool(scene and scene.get(SCENE_PROP_PLACEHOLDER))
+
+
+def get_library_strips(
+    sed: bpy.types.SequenceEditor,
+    scene: bpy.types.Scene = None,
+) -> list[bpy.types.SceneSequence]:
+    """
+    Get the strips in `sed` that use an externalized shot scene.
+
+    :param sed: The sequence editor.
+    :param scene: If specified, only consider strips using this scene.
+    :return: The strips.
+    """
+    return [
+        s
+        for s in sed.sequences_all
+        if isinstance(s, bpy.types.SceneSequence)
+        and STRIP_PROP_LIBRARY_PATH in s
+        and (scene is None or s.scene == scene)
+    ]
+
+
+def get_scene_strips(
+    sed: bpy.types.SequenceEditor, scene: bpy.types.Scene
+) -> list[bpy.types.SceneSequence]:
+    """
+    Get the strips in `sed` using `scene`, with the strips storing library
+    information first.
+    """
+    strips = [
+        s
+        for s in sed.sequences_all
+        if isinstance(s, bpy.types.SceneSequence) and s.scene == scene
+    ]
+    return sorted(strips, key=lambda s: STRIP_PROP_LIBRARY_PATH not in s)
+
+
+def set_strips_library(
+    strips: Iterable[bpy.types.SceneSequence], library_path: str, scene_name: str
+):
+    """Store the library information of the strips' scene on `strips`."""
+    for strip in strips:
+        strip[STRIP_PROP_LIBRARY_PATH] = library_path
+        strip[STRIP_PROP_LIBRARY_SCENE] = scene_name
+
+
+def get_library_filepath(strip: bpy.types.SceneSequence) -> str:
+    """Get the absolute path of the library of `strip`'s scene."""
+    return bpy.path.abspath(strip[STRIP_PROP_LIBRARY_PATH])
+
+
+def create_shot_placeholder(scene: bpy.types.Scene, name: str) -> bpy.types.Scene:
+    """
+    Create a placeholder scene matching `scene`'s frame range.
+
+    :param scene: The shot scene to replace.
+    :param name: The name of the placeholder.
+    :return: The placeholder scene.
+    """
+    placeholder = bpy.data.scenes.new(name)
+    placeholder[SCENE_PROP_PLACEHOLDER] = True
+    for attr in PLACEHOLDER_SCENE_SETTINGS:
+        setattr(placeholder, attr, getattr(scene, attr))
+    for attr in PLACEHOLDER_RENDER_SETTINGS:
+        setattr(placeholder.render, attr, getattr(scene.render, attr))
+    return placeholder
+
+
+def write_shot_library(scene: bpy.types.Scene, filepath: str):
+    """
+    Write `scene` and its dependencies in the library at `filepath`.
+
+    :param scene: The shot scene.
+    :param filepath: The absolute path of the library.
+    """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    bpy.data.libraries.write(
+        filepath, {scene}, path_remap="RELATIVE_ALL", fake_user=True
+    )
+
+
+def unload_shot_scene(
+    scene: bpy.types.Scene,
+    sed: bpy.types.SequenceEditor,
+    save: bool = True,
+    purge: bool = True,
+) -> bpy.types.Scene:
+    """
+    Replace an externalized shot scene by a placeholder and free its data.
+
+    :param scene: The shot scene to unload.
+    :param sed: The sequence editor using the shot scene.
+    :param save: Whether to save the scene back to its library (appended scenes).
+    :param purge: Whether to delete the datablocks of the scene left without users,
+        only needed for local scenes.
+    :return: The placeholder scene.
+    """
+    strips = get_scene_strips(sed, scene)
+    if not strips or STRIP_PROP_LIBRARY_PATH not in strips[0]:
+        raise ValueError(f"Scene '{scene.name}' is not an externalized shot scene")
+    # Ensure all strips using the scene can load it back.
+    set_strips_library(
+        strips, strips[0][STRIP_PROP_LIBRARY_PATH], strips[0][STRIP_PROP_LIBRARY_SCENE]
+    )
+
+    if save and not scene.library:
+        write_shot_library(scene, get_library_filepath(strips[0]))
+
+    library = scene.library
+    # Only consider the scene's datablocks, not the orphans of the whole file.
+    datablocks = walk_scene_removable_datablocks(scene) if purge and not library else []
+    name = strips[0][STRIP_PROP_LIBRARY_SCENE]
+    # Free the name for the placeholder.
+    if not library:
+        scene.name = f".unloading.{name}"
+
+    placeholder = create_shot_placeholder(scene, name)
+    for strip in strips:
+        camera = strip.scene_camera
+        strip[STRIP_PROP_LIBRARY_CAMERA] = camera.name if camera else ""
+        strip.scene = placeholder
+
+    bpy.data.scenes.remove(scene)
+    if library:
+        # Remove all the data linked from this library.
+        if not any(s.library == library for s in bpy.data.scenes):
+            bpy.data.libraries.remove(library)
+    else:
+        delete_orphan_datablocks(datablocks)
+
+    return placeholder
+
+
+def load_shot_scene(
+    placeholder: bpy.types.Scene, sed: bpy.types.SequenceEditor, link: bool = True
+) -> bpy.types.Scene:
+    """
+    Load the shot scene replaced by `placeholder` from its library.
+
+    :param placeholder: The placeholder scene.
+    :param sed: The sequence editor using the placeholder.
+    :param link: Whether to link (read-only) or append the shot scene.
+    :return: The loaded shot scene.
+    """
+    strips = get_scene_strips(sed, placeholder)
+    if not strips or STRIP_PROP_LIBRARY_PATH not in strips[0]:
+        raise ValueError(f"Scene '{placeholder.name}' is not a shot placeholder")
+
+    name = strips[0][STRIP_PROP_LIBRARY_SCENE]
+    # Free the name for appended scenes.
+    placeholder.name = f".placeholder.{name}"
+    try:
+        with bpy.data.libraries.load(
+            get_library_filepath(strips[0]), link=link, relative=True
+        ) as (data_from, data_to):
+            if name not in data_from.scenes:
+                raise ValueError(f"Scene '{name}' not found in library")
+            data_to.scenes = [name]
+    except (OSError, ValueError):
+        placeholder.name = name
+        raise
+
+    scene = data_to.scenes[0]
+    for strip in strips:
+        strip.scene = scene
+        camera_name = strip.get(STRIP_PROP_LIBRARY_CAMERA, "")
+        strip.scene_camera = scene.objects.get(camera_name)
+
+    bpy.data.scenes.remove(placeholder)
+    return scene
+
+
+def externalize_shot_scene(
+    scene: bpy.types.Scene, sed: bpy.types.SequenceEditor, directory: str
+) -> bpy.types.Scene:
+    """
+    Write `scene` in its own library in `directory` and replace it by a placeholder.
+
+    :param scene: The shot scene to externalize.
+    :param sed: The sequence editor using the shot scene.
+    :param directory: The libraries directory.
+    :return: The placeholder scene.
+    """
+    strips = get_scene_strips(sed, scene)
+    if not strips:
+        raise ValueError(f"Scene '{scene.name}' is not used by any strip")
+
+    filepath = os.path.join(bpy.path.abspath(directory), f"{scene.name}.blend")
+    write_shot_library(scene, filepath)
+    # Store the library path relatively to the edit file, if saved.
+    library_path = bpy.path.relpath(filepath) if bpy.data.filepath else filepath
+    set_strips_library(strips, library_path, scene.name)
+
+    return unload_shot_scene(scene, sed, save=False)
+
+
+def mark_shot_visited(strip: bpy.types.SceneSequence):
+    """Mark the shot of `strip` as the most recently visited one."""
+    key = strip[STRIP_PROP_LIBRARY_PATH]
+    _shots_visit_order.pop(key, None)
+    _shots_visit_order[key] = None
+
+
+def enforce_memory_budget(
+    sed: bpy.types.SequenceEditor,
+    budget: int,
+    keep: Iterable[bpy.types.Scene] = (),
+) -> list[str]:
+    """
+    Unload the least recently visited shot scenes until the estimated memory
+    footprint of loaded shot scenes fits within `budget`.
+
+    :param sed: The sequence editor.
+    :param budget: The memory budget in bytes.
+    :param keep: Scenes that must not be unloaded.
+    :return: The names of the unloaded shot scenes.
+    """
+    scenes_keys: dict[bpy.types.Scene, str] = {
+        s.scene: s[STRIP_PROP_LIBRARY_PATH]
+        for s in get_library_strips(sed)
+        if s.scene and not is_shot_placeholder(s.scene)
+    }
+    footprints = compute_scenes_memory_footprint(list(scenes_keys))
+    total = sum(footprint.total for footprint in footprints.values())
+
+    visit_order = {key: idx for idx, key in enumerate(_shots_visit_order)}
+    # Never visited scenes come first.
+    candidates = sorted(scenes_keys, key=lambda s: visit_order.get(scenes_keys[s], -1))
+    keep = set(keep)
+    unloaded = []
+    for scene in candidates:
+        if total <= budget:
+            break
+        if scene in keep:
+            continue
+        total -= footprints[scene].total
+        unloaded.append(scene.name)
+        unload_shot_scene(scene, sed)
+    return unloaded
+
+
+def on_sync_master_strip(strip: bpy.types.SceneSequence):
+    """Timeline Synchronization callback loading shot scenes on demand."""
+    settings = strip.id_data.shot_library_settings
+    if not settings.enabled or STRIP_PROP_LIBRARY_PATH not in strip:
+        return
+
+    mark_shot_visited(strip)
+    if not is_shot_placeholder(strip.scene):
+        return
+
+    sed = strip.id_data.sequence_editor
+    try:
+        scene = load_shot_scene(strip.scene, sed, settings.load_mode == "LINK")
+    except (OSError, ValueError) as e:
+        log.error("Failed to load shot '%s': %s", strip.name, e)
+        return
+
+    if settings.memory_budget:
+        # Unloading shot scenes is slow: defer it out of the synchronization.
+        _pending_memory_budgets[strip.id_data.name] = scene.as_pointer()
+        if not bpy.app.timers.is_registered(enforce_memory_budget_timer):
+            bpy.app.timers.register(enforce_memory_budget_timer, first_interval=0)
+
+
+def enforce_memory_budget_timer() -> Optional[float]:
+    """Timer callback enforcing the memory budget of edit scenes."""
+    # Postpone during playback to avoid any hitch.
+    if any(
+        window.screen and window.screen.is_animation_playing
+        for window in bpy.context.window_manager.windows
+    ):
+        return 1.0
+
+    for name, scene_pointer in _pending_memory_budgets.items():
+        edit_scene = bpy.data.scenes.get(name)
+        if not edit_scene or not edit_scene.sequence_editor:
+            continue
+        settings = edit_scene.shot_library_settings
+        if not settings.memory_budget:
+            continue
+        # Keep the last loaded shot scene and the scenes displayed in windows.
+        keep = {s for s in bpy.data.scenes if s.as_pointer() == scene_pointer}
+        keep |= {w.scene for w in bpy.context.window_manager.windows}
+        enforce_memory_budget(
+            edit_scene.sequence_editor, settings.memory_budget * 1024**2, keep
+        )
+    _pending_memory_budgets.clear()
+    return None
+
+
+@bpy.app.handlers.persistent
+def on_load_post(*args):
+    _shots_visit_order.clear()
+    _pending_memory_budgets.clear()
+
+
+classes = (ShotLibrarySettings,)
+
+
+def register():
+    register_classes(classes)
+
+    bpy.types.Scene.shot_library_settings = bpy.props.PointerProperty(
+        type=ShotLibrarySettings
+    )
+
+    master_strip_callbacks.append(on_sync_master_strip)
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(enforce_memory_budget_timer):
+        bpy.app.timers.unregister(enforce_memory_budget_timer)
+    bpy.app.handlers.load_post.remove(on_load_post)
+    master_strip_callbacks.remove(on_sync_master_strip)
+
+    del bpy.types.Scene.shot_library_settings
+    unregister_classes(classes)
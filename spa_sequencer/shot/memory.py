@@ -0,0 +1,291 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Memory footprint estimation of shot scenes.
+
+Blender does not expose the memory used by each datablock: sizes are estimated
+from the content of the datablocks (mesh attributes, grease pencil points, image
+buffers and keyframes).
+"""
+
+from collections import Counter
+from typing import Iterable, NamedTuple
+
+import bpy
+
+from spa_sequencer.shot.core import walk_scene_datablocks
+from spa_sequencer.utils import register_classes, unregister_classes
+
+
+# Estimated size in bytes of a keyframe (BezTriple).
+KEYFRAME_SIZE = 72
+# Estimated size in bytes of a grease pencil point (bGPDspoint).
+GPENCIL_POINT_SIZE = 64
+# Estimated size in bytes of a grease pencil stroke (bGPDstroke), points excluded.
+GPENCIL_STROKE_SIZE = 256
+
+# Size in bytes of a mesh attribute item, by data type.
+MESH_ATTRIBUTE_SIZES = {
+    "FLOAT": 4,
+    "INT": 4,
+    "FLOAT_VECTOR": 12,
+    "FLOAT_COLOR": 16,
+    "BYTE_COLOR": 4,
+    "BOOLEAN": 1,
+    "FLOAT2": 8,
+    "INT8": 1,
+    "INT32_2D": 8,
+    "QUATERNION": 16,
+    "FLOAT4X4": 64,
+}
+
+
+class DatablockFootprint(NamedTuple):
+    """Estimated memory footprint of a datablock."""
+
+    # Footprint category: MESH, GPENCIL, IMAGE, ACTION or empty if not accounted.
+    category: str
+    # Estimated size in bytes.
+    size: int
+
+
+def estimate_mesh_size(mesh: bpy.types.Mesh) -> int:
+    """Estimate the size in bytes of `mesh`'s geometry."""
+    size = sum(
+        len(attr.data) * MESH_ATTRIBUTE_SIZES.get(attr.data_type, 4)
+        for attr in mesh.attributes
+    )
+    # Faces offsets
+    return size + len(mesh.polygons) * 4
+
+
+def estimate_gpencil_size(gpencil: bpy.types.GreasePencil) -> int:
+    """Estimate the size in bytes of `gpencil`'s strokes."""
+    size = 0
+    for layer in gpencil.layers:
+        for frame in layer.frames:
+            for stroke in frame.strokes:
+                size += GPENCIL_STROKE_SIZE + len(stroke.points) * GPENCIL_POINT_SIZE
+    return size
+
+
+def estimate_image_size(image: bpy.types.Image) -> int:
+    """Estimate the size in bytes of `image`'s loaded buffer."""
+    if not image.has_data:
+        return 0
+    width, height = image.size
+    return width * height * image.channels * (4 if image.is_float else 1)
+
+
+def estimate_action_size(action: bpy.types.Action) -> int:
+    """Estimate the size in bytes of `action`'s keyframes."""
+    return sum(len(fcurve.keyframe_points) for fcurve in action.fcurves) * KEYFRAME_SIZE
+
+
+def estimate_datablock_footprint(datablock: bpy.types.ID) -> DatablockFootprint:
+    """Estimate the memory footprint of `datablock`.
+
+    :param datablock: The datablock to consider.
+    :return: The estimated footprint.
+    """
+    if isinstance(datablock, bpy.types.Mesh):
+        return DatablockFootprint("MESH", estimate_mesh_size(datablock))
+    if isinstance(datablock, bpy.types.GreasePencil):
+        return DatablockFootprint("GPENCIL", estimate_gpencil_size(datablock))
+    if isinstance(datablock, bpy.types.Image):
+        return DatablockFootprint("IMAGE", estimate_image_size(datablock))
+    if isinstance(datablock, bpy.types.Action):
+        return DatablockFootprint("ACTION", estimate_action_size(datablock))
+    return DatablockFootprint("", 0)
+
+
+def get_material_images(material: bpy.types.Material) -> list[bpy.types.Image]:
+    """Get the images used by `material`'s node tree and grease pencil style."""
+    images = []
+    if material.node_tree:
+        images += [
+            image
+            for node in material.node_tree.nodes
+            if isinstance(image := getattr(node, "image", None), bpy.types.Image)
+        ]
+    if gp_style := material.grease_pencil:
+        images += [img for img in (gp_style.stroke_image, gp_style.fill_image) if img]
+    return images
+
+
+def walk_scene_memory_datablocks(scene: bpy.types.Scene) -> list[bpy.types.ID]:
+    """
+    Get all datablocks within `scene` that may hold memory, i.e. the datablocks
+    within the scene (see `walk_scene_datablocks`) as well as the materials and
+    images they use.
+
+    :param scene: The scene to consider.
+    :return: The datablocks, without duplicates.
+    """
+    return walk_memory_datablocks(walk_scene_datablocks(scene))
+
+
+def walk_memory_datablocks(datablocks: Iterable[bpy.types.ID]) -> list[bpy.types.ID]:
+    """
+    Get `datablocks` as well as the materials and images they use.
+
+    :param datablocks: The datablocks to consider.
+    :return: The datablocks, without duplicates.
+    """
+    datablocks = dict.fromkeys(datablocks)
+    materials = dict.fromkeys(
+        mat
+        for db in list(datablocks)
+        for mat in getattr(db, "materials", ())
+        if mat
+    )
+    datablocks.update(materials)
+    for material in materials:
+        datablocks.update(dict.fromkeys(get_material_images(material)))
+    return list(datablocks)
+
+
+class SceneMemoryFootprint(NamedTuple):
+    """Estimated memory footprint of a scene, in bytes."""
+
+    # Size of the datablocks only used by this scene.
+    exclusive: int
+    # Size of the datablocks used by this scene and other analyzed scenes.
+    shared: int
+    # Total size by category (see `DatablockFootprint`).
+    categories: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        return self.exclusive + self.shared
+
+
+def walk_scene_removable_datablocks(scene: bpy.types.Scene) -> list[bpy.types.ID]:
+    """
+    Get the datablocks that may be left without users once `scene` is deleted,
+    i.e. its memory datablocks (see `walk_scene_memory_datablocks`) and its world.
+    Its master collection, embedded data deleted along with the scene, is excluded.
+
+    :param scene: The scene to consider.
+    :return: The datablocks, without duplicates.
+    """
+    datablocks = [
+        db for db in walk_scene_memory_datablocks(scene) if not db.is_embedded_data
+    ]
+    if scene.world and scene.world not in datablocks:
+        datablocks.append(scene.world)
+    return datablocks
+
+
+def compute_scenes_memory_footprint(
+    scenes: list[bpy.types.Scene],
+) -> dict[bpy.types.Scene, SceneMemoryFootprint]:
+    """
+    Compute the estimated memory footprint of each scene in `scenes`.
+    Datablocks used by several of those scenes (e.g. through shared folders) are
+    accounted as shared in each of them.
+
+    :param scenes: The scenes to analyze.
+    :return: The memory footprint by scene.
+    """
+    scenes_datablocks = {scene: walk_scene_memory_datablocks(scene) for scene in scenes}
+    users_count = Counter(
+        db for datablocks in scenes_datablocks.values() for db in datablocks
+    )
+    # Estimate each datablock only once.
+    footprints = {db: estimate_datablock_footprint(db) for db in users_count}
+
+    result: dict[bpy.types.Scene, SceneMemoryFootprint] = {}
+    for scene, datablocks in scenes_datablocks.items():
+        exclusive = shared = 0
+        categories: Counter[str] = Counter()
+        for datablock in datablocks:
+            footprint = footprints[datablock]
+            if not footprint.size:
+                continue
+            categories[footprint.category] += footprint.size
+            if users_count[datablock] == 1:
+                exclusive += footprint.size
+            else:
+                shared += footprint.size
+        result[scene] = SceneMemoryFootprint(exclusive, shared, dict(categories))
+    return result
+
+
+def format_size(size: int) -> str:
+    """Format `size` in bytes as a human readable string."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+class ShotMemoryStats(bpy.types.PropertyGroup):
+    """Estimated memory footprint of a shot scene."""
+
+    scene: bpy.props.PointerProperty(type=bpy.types.Scene)
+    strips_count: bpy.props.IntProperty(name="Strips")
+    # NOTE: Sizes are stored in kilobytes to fit in IntProperty range.
+    exclusive_size: bpy.props.IntProperty(name="Exclusive (KB)")
+    shared_size: bpy.props.IntProperty(name="Shared (KB)")
+    mesh_size: bpy.props.IntProperty(name="Mesh (KB)")
+    gpencil_size: bpy.props.IntProperty(name="Grease Pencil (KB)")
+    image_size: bpy.props.IntProperty(name="Images (KB)")
+    action_size: bpy.props.IntProperty(name="Actions (KB)")
+
+    @property
+    def total_size(self) -> int:
+        return self.exclusive_size + self.shared_size
+
+
+def update_shot_memory_stats(
+    stats: bpy.types.CollectionProperty, sed: bpy.types.SequenceEditor
+):
+    """
+    Fill `stats` with the memory footprint of the scenes used by scene strips in `sed`.
+
+    :param stats: The collection of ShotMemoryStats to fill.
+    :param sed: The sequence editor.
+    """
+    strips_count = Counter(
+        s.scene
+        for s in sed.sequences_all
+        if isinstance(s, bpy.types.SceneSequence) and s.scene
+    )
+    footprints = compute_scenes_memory_footprint(list(strips_count))
+
+    stats.clear()
+    for scene, footprint in footprints.items():
+        item = stats.add()
+        item.name = scene.name
+        item.scene = scene
+        item.strips_count = strips_count[scene]
+        item.exclusive_size = footprint.exclusive // 1024
+        item.shared_size = footprint.shared // 1024
+        for category in ("MESH", "GPENCIL", "IMAGE", "ACTION"):
+            size = footprint.categories.get(category, 0) // 1024
+            setattr(item, f"{category.lower()}_size", size)
+
+
+classes = (ShotMemoryStats,)
+
+
+def register():
+    register_classes(classes)
+
+    # Runtime results of the memory analysis (not saved in file)
+    bpy.types.WindowManager.shot_memory_stats = bpy.props.CollectionProperty(
+        type=ShotMemoryStats,
+        options={"SKIP_SAVE"},
+    )
+    bpy.types.WindowManager.shot_memory_stats_index = bpy.props.IntProperty(
+        options={"SKIP_SAVE"},
+    )
+
+
+def unregister():
+    del bpy.types.WindowManager.shot_memory_stats
+    del bpy.types.WindowManager.shot_memory_stats_index
+    unregister_classes(classes)
@@ -1,10 +1,11 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright (C) 2023, The SPA Studios. All rights reserved.
 
+import bisect
 from enum import Enum
 import re
 import string
-from typing import NamedTuple, Optional, Union
+from typing import Iterable, NamedTuple, Optional, Union
 
 import bpy
 
@@ -26,6 +27,10 @@ class ShotNameData(NamedTuple):
     take: str
 
 
+# Compiled shot naming regexes, by naming configuration (see `ShotNaming.shot_pattern`)
+_shot_patterns_cache: dict[tuple, re.Pattern] = {}
+
+
 class ShotNaming:
     """
     ShotNaming centralizes the logic for shot naming convention.
@@ -108,6 +113,21 @@ class ShotNaming:
             rf"$"
         )
 
+    def shot_pattern(self) -> re.Pattern:
+        """
+        Returns the compiled regex defining the shot naming convention.
+        Compiled regexes are cached by naming configuration.
+        """
+        key = (
+            tuple(self.prefixes),
+            self.number_digits,
+            self.takes_count,
+            self.separator,
+        )
+        if (pattern := _shot_patterns_cache.get(key)) is None:
+            pattern = _shot_patterns_cache[key] = re.compile(self.shot_regex())
+        return pattern
+
     def build_shot_name(
         self, number: int, prefix: Optional[str] = None, take: Optional[str] = None
     ) -> str:
@@ -139,7 +159,7 @@ class ShotNaming:
         :param name: The name to consider.
         :return: The Match object on success, None otherwise.
         """
-        return re.fullmatch(self.shot_regex(), name)
+        return self.shot_pattern().fullmatch(name)
 
     def shot_data_from_name(self, name: str, strict: bool = True) -> ShotNameData:
         """Extract shot name data components from `name`.
@@ -184,7 +204,7 @@ class ShotNaming:
     ) -> str:
         """Get the next shot name from `shot_name`."""
         shot_data = self.shot_data_from_name(shot_name)
-        number = self.shot_data_from_name(shot_name).number
+        number = shot_data.number
         if custom_increment:
             number += custom_increment
         else:
@@ -206,10 +226,7 @@ class ShotNaming:
 
         :return: The next available shot name.
         """
-        shots = sorted([s.name for s in self.get_all_shot_scenes()])
-        if not shots:
-            return self.default_shot_name()
-        return self.next_shot_name_from_name(shots[-1], custom_increment)
+        return ShotNamesRegistry.from_scenes(self).next_name(custom_increment)
 
     def get_all_shot_strips(
         self, sed: bpy.types.SequenceEditor
@@ -236,10 +253,25 @@ class ShotNaming:
         :param custom_increment: Optional custom increment.
         :return: The next shot name.
         """
-        shots = sorted([s.name for s in self.get_all_shot_strips(sed)])
-        if not shots:
-            return self.default_shot_name()
-        return self.next_shot_name_from_name(shots[-1], custom_increment)
+        return ShotNamesRegistry.from_sequences(sed, self).next_name(custom_increment)
+
+    def next_shot_names_from_sequences(
+        self,
+        sed: bpy.types.SequenceEditor,
+        count: int,
+        custom_increment: Optional[int] = None,
+    ) -> list[str]:
+        """
+        Get the `count` next shot names from the sequences contained in the given
+        sequence editor, as if shots were created one after the other.
+
+        :param sed: The sequence editor.
+        :param count: The number of shot names to get.
+        :param custom_increment: Optional custom increment.
+        :return: The next shot names.
+        """
+        registry = ShotNamesRegistry.from_sequences(sed, self)
+        return registry.allocate(count, custom_increment)
 
     def next_take_name(self, shot_name: str) -> str:
         """
@@ -264,6 +296,85 @@ class ShotNaming:
         )
 
 
+class ShotNamesRegistry:
+    """
+    Sorted registry of used shot names, to get next available shot names without
+    having to evaluate all existing names again.
+    """
+
+    def __init__(self, naming: ShotNaming, names: Iterable[str] = ()):
+        """
+        :param naming: The shot naming convention to use.
+        :param names: The used names, only those matching the convention are kept.
+        """
+        self.naming = naming
+        self.names: list[str] = sorted(
+            name for name in names if naming.match_name(name)
+        )
+
+    @classmethod
+    def from_sequences(
+        cls, sed: bpy.types.SequenceEditor, naming: Optional[ShotNaming] = None
+    ) -> "ShotNamesRegistry":
+        """Build the registry of shot names used by `sed`'s scene strips.
+
+        :param sed: The sequence editor.
+        :param naming: The shot naming convention, defaults to global `shot_naming`.
+        """
+        return cls(
+            naming or shot_naming,
+            (s.name for s in sed.sequences if isinstance(s, bpy.types.SceneSequence)),
+        )
+
+    @classmethod
+    def from_scenes(cls, naming: Optional[ShotNaming] = None) -> "ShotNamesRegistry":
+        """Build the registry of shot names used by scenes.
+
+        :param naming: The shot naming convention, defaults to global `shot_naming`.
+        """
+        return cls(naming or shot_naming, (s.name for s in bpy.data.scenes))
+
+    def __contains__(self, name: str) -> bool:
+        idx = bisect.bisect_left(self.names, name)
+        return idx < len(self.names) and self.names[idx] == name
+
+    def add(self, name: str):
+        """Register `name` as used if it matches the shot naming convention."""
+        if name not in self and self.naming.match_name(name):
+            bisect.insort(self.names, name)
+
+    def discard(self, name: str):
+        """Unregister `name` if registered."""
+        if name in self:
+            self.names.remove(name)
+
+    def next_name(self, custom_increment: Optional[int] = None) -> str:
+        """Get the next available shot name.
+
+        :param custom_increment: Optional custom increment.
+        :return: The next shot name.
+        """
+        if not self.names:
+            return self.naming.default_shot_name()
+        return self.naming.next_shot_name_from_name(self.names[-1], custom_increment)
+
+    def allocate(
+        self, count: int = 1, custom_increment: Optional[int] = None
+    ) -> list[str]:
+        """Get and register as used the `count` next available shot names.
+
+        :param count: The number of shot names to allocate.
+        :param custom_increment: Optional custom increment.
+        :return: The allocated shot names.
+        """
+        names = []
+        for _ in range(count):
+            name = self.next_name(custom_increment)
+            self.add(name)
+            names.append(name)
+        return names
+
+
 # Global ShotNaming instance
 shot_naming = ShotNaming()
 
@@ -1,19 +1,43 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright (C) 2023, The SPA Studios. All rights reserved.
 
-from typing import Optional
+import logging
+import time
+from typing import NamedTuple, Optional
 
 import bpy
 
-from spa_sequencer.preferences import get_addon_prefs
+from spa_sequencer.shot.autosave import get_recoverable_shots, recover_autosaved_shot
+from spa_sequencer.shot.checkpoint import TimingCheckpoint
 from spa_sequencer.shot.core import (
     adjust_shot_duration,
+    apply_renaming_plan,
+    batch_strip_reload,
     delete_scene,
     duplicate_scene,
+    get_template_scenes,
     get_valid_shot_scenes,
+    plan_scenes_renaming,
     rename_scene,
+    retime_shots,
+    ShotRetime,
+    ShotRippleEdit,
     slip_shot_content,
 )
+from spa_sequencer.shot.dedup import (
+    DEDUPLICABLE_TYPES,
+    find_duplicates,
+    merge_duplicates,
+)
+from spa_sequencer.shot.library import (
+    externalize_shot_scene,
+    is_shot_placeholder,
+    load_shot_scene,
+    unload_shot_scene,
+    STRIP_PROP_LIBRARY_PATH,
+)
+from spa_sequencer.shot.memory import format_size, update_shot_memory_stats
+from spa_sequencer.shot.split import split_edit_file
 from spa_sequencer.shot.naming import shot_naming, ShotNamingProperty
 from spa_sequencer.sync.core import (
     get_sync_master_strip,
@@ -23,6 +47,9 @@ from spa_sequencer.sync.core import (
 from spa_sequencer.utils import register_classes, unregister_classes
 
 
+log = logging.getLogger(__name__)
+
+
 def get_last_sequence(
     sequences: list[bpy.types.Sequence],
 ) -> Optional[bpy.types.Sequence]:
@@ -48,6 +75,71 @@ def get_last_used_frame(
     return max(remap_frame_value(s.frame_final_end - 1, s) for s in scene_sequences)
 
 
+def get_last_used_frames(
+    sequences: list[bpy.types.Sequence],
+) -> dict[bpy.types.Scene, int]:
+    """
+    Get the last used internal frame of each scene used in the given list of
+    `sequences`, in a single pass (see `get_last_used_frame`).
+    """
+    last_used_frames: dict[bpy.types.Scene, int] = {}
+    for s in sequences:
+        if not isinstance(s, bpy.types.SceneSequence) or not s.scene:
+            continue
+        frame = remap_frame_value(s.frame_final_end - 1, s)
+        last_used_frames[s.scene] = max(frame, last_used_frames.get(s.scene, frame))
+    return last_used_frames
+
+
+class ShotDuplicationItem(NamedTuple):
+    """Planned duplication of a shot strip."""
+
+    # The strip to duplicate.
+    strip: bpy.types.SceneSequence
+    # The name of the new shot.
+    name: str
+    # The frame where to insert the new strip.
+    frame_start: int
+    # The content offset of the new strip, None if the scene is duplicated.
+    frame_offset: Optional[int]
+
+
+def plan_shots_duplication(
+    sed: bpy.types.SequenceEditor,
+    strips: list[bpy.types.SceneSequence],
+    names: list[str],
+    duplicate_scene: bool,
+) -> list[ShotDuplicationItem]:
+    """
+    Plan the duplication of `strips`: new strips are appended one after the other
+    at the end of the edit and, when sharing the scene of the original strips,
+    target the range following the last used frame of this scene.
+
+    :param sed: The sequence editor.
+    :param strips: The strips to duplicate.
+    :param names: The names of the new shots.
+    :param duplicate_scene: Whether scenes are duplicated.
+    :return: The duplication plan.
+    """
+    last_sequence = get_last_sequence(sed.sequences)
+    insert_frame = last_sequence.frame_final_end if last_sequence else 1
+    last_used_frames = {} if duplicate_scene else get_last_used_frames(sed.sequences)
+
+    plan = []
+    for strip, name in zip(strips, names):
+        frame_offset = None
+        if not duplicate_scene:
+            scene = strip.scene
+            frame_offset = last_used_frames.get(scene, scene.frame_start - 1)
+            # The new strip will use the range following the current last used frame.
+            last_used_frames[scene] = (
+                scene.frame_start + frame_offset + strip.frame_final_duration - 1
+            )
+        plan.append(ShotDuplicationItem(strip, name, insert_frame, frame_offset))
+        insert_frame += strip.frame_final_duration
+    return plan
+
+
 def get_selected_scene_sequences(
     sequences: list[bpy.types.Sequence],
 ) -> list[bpy.types.SceneSequence]:
@@ -85,27 +177,19 @@ class SEQUENCER_OT_shot_new(bpy.types.Operator):
 
     def get_template_scenes(self, context):
         """Get the scenes matching template naming rule defined in preferences."""
-        prefs = get_addon_prefs()
-        prefix = prefs.shot_template_prefix
-
-        shot_scenes = get_valid_shot_scenes()
-
-        def matches_mode(scene):
-            match self.scene_mode:
-                case "EXISTING":
-                    # Do not consider templates when using an existing scene.
-                    return scene in shot_scenes
-                case "TEMPLATE":
-                    # Only show template scenes in this case.
-                    return scene.name.startswith(prefix)
-                case _:
-                    return True
+        match self.scene_mode:
+            case "EXISTING":
+                # Do not consider templates when using an existing scene.
+                scenes = get_valid_shot_scenes()
+            case "TEMPLATE":
+                # Only show template scenes in this case.
+                scenes = get_template_scenes()
+            case _:
+                scenes = bpy.data.scenes
 
         # Keep this enum values list alive (see https://developer.blender.org/T97243).
         SEQUENCER_OT_shot_new.template_names = [
-            (s.name, s.name, "")
-            for s in bpy.data.scenes
-            if s != context.scene and matches_mode(s)
+            (s.name, s.name, "") for s in scenes if s != context.scene
         ]
 
         return SEQUENCER_OT_shot_new.template_names
@@ -267,31 +351,25 @@ class SEQUENCER_OT_shot_duplicate(bpy.types.Operator):
 
     @staticmethod
     def duplicate_shot(
-        context: bpy.types.Context,
-        strip: bpy.types.SceneSequence,
-        name: str,
-        duplicate_scene: bool,
+        context: bpy.types.Context, item: ShotDuplicationItem
     ) -> bpy.types.SceneSequence:
+        strip = item.strip
         sed = strip.id_data.sequence_editor
-        if duplicate_scene:
-            shot_scene = duplicate_scene(context, strip.scene, name)
+        if item.frame_offset is None:
+            shot_scene = duplicate_scene(context, strip.scene, item.name)
         else:
             shot_scene = strip.scene
 
-        # Find the frame where to insert the duplicated strip
-        insert_frame = get_last_sequence(sed.sequences).frame_final_end
-
         # Create new strip
         new_strip = sed.sequences.new_scene(
-            name, shot_scene, strip.channel, insert_frame
+            item.name, shot_scene, strip.channel, item.frame_start
         )
 
         new_strip.frame_final_duration = strip.frame_final_duration
 
-        if not duplicate_scene:
+        if item.frame_offset is not None:
             new_strip.scene_camera = strip.scene_camera
-            frame_offset = get_last_used_frame(sed.sequences, shot_scene)
-            slip_shot_content(new_strip, frame_offset)
+            slip_shot_content(new_strip, item.frame_offset)
         else:
             new_strip.scene_camera = strip.scene.camera
 
@@ -300,11 +378,14 @@ class SEQUENCER_OT_shot_duplicate(bpy.types.Operator):
     def execute(self, context: bpy.types.Context):
         sed = context.scene.sequence_editor
 
-        new_strips = []
-        for strip in get_selected_scene_sequences(sed.sequences):
-            name = shot_naming.next_shot_name_from_sequences(sed)
-            new_strip = self.duplicate_shot(context, strip, name, self.duplicate_scene)
-            new_strips.append(new_strip)
+        strips = get_selected_scene_sequences(sed.sequences)
+        # Allocate all new shot names at once.
+        names = shot_naming.next_shot_names_from_sequences(sed, len(strips))
+        # Compute insertion frames and content offsets of all new strips at once.
+        plan = plan_shots_duplication(sed, strips, names, self.duplicate_scene)
+        # Reload all the new strips at once.
+        with batch_strip_reload():
+            new_strips = [self.duplicate_shot(context, item) for item in plan]
 
         if not new_strips:
             return {"CANCELLED"}
@@ -481,6 +562,16 @@ class SEQUENCER_OT_shot_timing_adjust(bpy.types.Operator):
         self.original_strip_scene_end = self.strip.scene.frame_end
         self.original_strip_offset_start = self.strip.frame_offset_start
         self.original_edit_frame_end = get_sync_settings().master_scene.frame_end
+        self.original_frame = get_sync_settings().master_scene.frame_current
+        # Timing state restored on cancel.
+        self.checkpoint = TimingCheckpoint(self.strip.id_data)
+
+        # Interactive duration adjustments use a ripple edit, gathering impacted strips
+        # once and deferring strip reload until validation.
+        if self.mode == "DURATION":
+            self.ripple_edit = ShotRippleEdit(
+                self.strip, from_frame_start=self.strip_handle == "LEFT"
+            )
 
         context.window_manager.modal_handler_add(self)
         return {"RUNNING_MODAL"}
@@ -505,6 +596,8 @@ class SEQUENCER_OT_shot_timing_adjust(bpy.types.Operator):
             if self.offset == 0:
                 self.cancel(context)
                 return {"CANCELLED"}
+            if ripple_edit := getattr(self, "ripple_edit", None):
+                ripple_edit.commit()
             self.restore_ui(context)
             return {"FINISHED"}
         # Update
@@ -533,10 +626,13 @@ class SEQUENCER_OT_shot_timing_adjust(bpy.types.Operator):
         #  - SHRINKS the strip if using left handle (from frame start)
         #  - EXTENDS the strip otherwise (from frame end)
         offset = -self.offset if from_frame_start else self.offset
+        ripple_edit = getattr(self, "ripple_edit", None)
         # Compute current absolute offset from original duration
         if self.mode == "SLIP":
             delta = self.strip.frame_offset_start - self.original_strip_offset_start
             slip_shot_content(self.strip, offset - delta, clamp_start=True)
+        elif ripple_edit:
+            ripple_edit.apply(offset)
         else:
             delta = self.strip.frame_final_duration - self.original_strip_duration
             adjust_shot_duration(self.strip, offset - delta, from_frame_start)
@@ -554,13 +650,15 @@ class SEQUENCER_OT_shot_timing_adjust(bpy.types.Operator):
         # Set sequencer's frame to strip's new end frame
         edit_scene.frame_set(update_frame)
 
-        # Update both edit and internal scene's end frame if going past original ones
-        frame_end = self.strip.frame_final_end - 1
-        edit_scene.frame_end = max(frame_end, self.original_edit_frame_end)
-        self.strip.scene.frame_end = max(
-            remap_frame_value(frame_end, self.strip),
-            self.original_strip_scene_end,
-        )
+        # Update both edit and internal scene's end frame if going past original ones.
+        # Ripple edits defer this update until they are committed.
+        if not ripple_edit:
+            frame_end = self.strip.frame_final_end - 1
+            edit_scene.frame_end = max(frame_end, self.original_edit_frame_end)
+            self.strip.scene.frame_end = max(
+                remap_frame_value(frame_end, self.strip),
+                self.original_strip_scene_end,
+            )
 
         return {"FINISHED"}
 
@@ -571,13 +669,67 @@ class SEQUENCER_OT_shot_timing_adjust(bpy.types.Operator):
     def cancel(self, context: bpy.types.Context):
         if self.offset:
             self.offset = 0
-            self.execute(context)
-        # Restore scenes' original end frames
-        context.scene.frame_end = self.original_edit_frame_end
-        self.strip.scene.frame_end = self.original_strip_scene_end
+            # Strips are only reloaded while slipping content (see `adapt_scene_range`).
+            self.checkpoint.restore(reload=self.mode == "SLIP")
+            get_sync_settings().master_scene.frame_set(self.original_frame)
         self.restore_ui(context)
 
 
+class SEQUENCER_OT_shot_bulk_retime(bpy.types.Operator):
+    bl_idname = "sequencer.shot_bulk_retime"
+    bl_label = "Bulk Retime"
+    bl_description = (
+        "Scale and offset the timing of selected shots at once, shifting the "
+        "following strips on their channels"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    scale: bpy.props.FloatProperty(
+        name="Scale",
+        description="Factor applied to the duration of the shots",
+        default=1.0,
+        min=0.01,
+    )
+
+    duration_offset: bpy.props.IntProperty(
+        name="Duration Offset",
+        description="Number of frames added to the duration of the shots",
+        default=0,
+    )
+
+    start_offset: bpy.props.IntProperty(
+        name="Start Offset",
+        description="Number of frames added to the start frame of the shots",
+        default=0,
+    )
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return context.scene.sequence_editor and bool(
+            get_selected_scene_sequences(context.scene.sequence_editor.sequences)
+        )
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: bpy.types.Context):
+        sed = context.scene.sequence_editor
+        strips = [s for s in get_selected_scene_sequences(sed.sequences) if s.scene]
+        retimes = {
+            strip: ShotRetime(
+                duration=round(strip.frame_final_duration * self.scale)
+                + self.duration_offset,
+                offset=self.start_offset,
+            )
+            for strip in strips
+        }
+        layout = retime_shots(retimes)
+        self.report(
+            {"INFO"}, f"Retimed {len(strips)} shot(s), {len(layout)} strip(s) updated"
+        )
+        return {"FINISHED"}
+
+
 class SEQUENCER_OT_shot_rename(bpy.types.Operator):
     bl_idname = "sequencer.shot_rename"
     bl_label = "Rename"
@@ -741,8 +893,8 @@ class SEQUENCER_OT_shot_chronological_numbering(bpy.types.Operator):
 
         tmp_suffix = ".tmp.rename"
         current_name = ""
-        scenes_to_rename = set()
-        items_to_rename: dict[bpy.types.SceneSequence, tuple[str, bool]] = dict()
+        strips_to_rename: dict[bpy.types.SceneSequence, str] = dict()
+        scenes_to_rename: dict[bpy.types.Scene, str] = dict()
 
         # Go through the shots chronologically (sorted by the start frame)
         sorted_scene_strips = sorted(scene_strips, key=lambda x: x.frame_final_start)
@@ -755,45 +907,327 @@ class SEQUENCER_OT_shot_chronological_numbering(bpy.types.Operator):
                 current_name = shot_naming.next_shot_name_from_name(current_name)
 
             # Evaluate if scene has to be renamed.
-            do_rename_scene = False
             if self.rename_scenes == "ALL" or (
                 self.rename_scenes == "MATCHING" and strip.name == strip.scene.name
             ):
-                # Store scenes to rename in a set. If multiple strips
-                # uses the same scene, only consider the first renaming.
-                if strip.scene not in scenes_to_rename:
-                    scenes_to_rename.add(strip.scene)
-                    do_rename_scene = True
+                # If multiple strips uses the same scene, only consider the first
+                # renaming.
+                scenes_to_rename.setdefault(strip.scene, current_name)
             # Store renaming details for this strip.
-            items_to_rename[strip] = (current_name, do_rename_scene)
-
-        # 2nd pass: ensure new scene names won't conflict with existing ones.
-        for strip, (new_name, do_rename_scene) in items_to_rename.items():
-            if do_rename_scene and (scene := bpy.data.scenes.get(new_name, None)):
-                # Check that the name does not clash with another scene that won't get
-                # renamed.
-                if scene not in scenes_to_rename:
-                    # Stop the execution before renaming anything to avoid any partial
-                    # renaming.
-                    self.report(
-                        {"ERROR"}, f"Name conflict: Scene {new_name} already exists"
-                    )
-                    return {"CANCELLED"}
-
-        # 3rd pass: add temp suffix to avoid clashes between items to rename.
-        for strip, (_, do_rename_scene) in items_to_rename.items():
-            strip.name += tmp_suffix
-            if do_rename_scene:
-                rename_scene(strip.scene, strip.scene.name + tmp_suffix)
+            strips_to_rename[strip] = current_name
+
+        # 2nd pass: plan scenes renaming, ensuring new scene names won't conflict with
+        # existing ones.
+        try:
+            scenes_renaming_plan = plan_scenes_renaming(scenes_to_rename)
+        except ValueError as e:
+            # Stop the execution before renaming anything to avoid any partial
+            # renaming.
+            self.report({"ERROR"}, f"Name conflict: {e}")
+            return {"CANCELLED"}
 
-        # 4th pass: use final name.
-        for strip, (new_name, do_rename_scene) in items_to_rename.items():
+        # 3rd pass: rename strips, using a temp suffix first to avoid clashes between
+        # strips to rename.
+        for strip in strips_to_rename:
+            strip.name += tmp_suffix
+        for strip, new_name in strips_to_rename.items():
             strip.name = new_name
-            if do_rename_scene:
-                rename_scene(strip.scene, new_name)
+
+        # 4th pass: rename scenes and their datablocks.
+        apply_renaming_plan(scenes_renaming_plan)
 
         # NOTE: for sequencer override, force update area display.
-        context.area.tag_redraw()
+        if context.area:
+            context.area.tag_redraw()
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_memory_analyze(bpy.types.Operator):
+    bl_idname = "sequencer.shot_memory_analyze"
+    bl_label = "Analyze Shots Memory"
+    bl_description = (
+        "Estimate the memory footprint of the shot scenes used in the active sequence"
+    )
+    bl_options = {"REGISTER"}
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context: bpy.types.Context):
+        start = time.perf_counter()
+        stats = context.window_manager.shot_memory_stats
+        update_shot_memory_stats(stats, context.scene.sequence_editor)
+        self.report(
+            {"INFO"},
+            f"Analyzed {len(stats)} shot scenes in "
+            f"{time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_select(bpy.types.Operator):
+    bl_idname = "sequencer.shot_select"
+    bl_label = "Select Shots by Scene"
+    bl_description = "Select shots that use a scene"
+    bl_options = {"UNDO"}
+
+    scene_name: bpy.props.StringProperty(name="Scene")
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context: bpy.types.Context):
+        sed = context.scene.sequence_editor
+        scene = bpy.data.scenes.get(self.scene_name)
+        strips = sorted(
+            (
+                s
+                for s in sed.sequences_all
+                if isinstance(s, bpy.types.SceneSequence) and s.scene == scene
+            ),
+            key=lambda s: s.frame_final_start,
+        )
+        if not strips:
+            self.report({"WARNING"}, f"No shot uses scene '{self.scene_name}'")
+            return {"CANCELLED"}
+
+        bpy.ops.sequencer.select_all(action="DESELECT")
+        for strip in strips:
+            strip.select = True
+        sed.active_strip = strips[0]
+
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_deduplicate_data(bpy.types.Operator):
+    bl_idname = "sequencer.shot_deduplicate_data"
+    bl_label = "Merge Duplicated Data"
+    bl_description = (
+        "Find datablocks with identical content across shots and remap their users "
+        "onto a single one"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    id_types: bpy.props.EnumProperty(
+        name="Data Types",
+        description="Types of datablocks to deduplicate",
+        items=(
+            ("MATERIAL", "Materials", ""),
+            ("MESH", "Meshes", ""),
+            ("ACTION", "Actions", ""),
+        ),
+        options={"ENUM_FLAG"},
+        default=set(DEDUPLICABLE_TYPES),
+    )
+
+    dry_run: bpy.props.BoolProperty(
+        name="Dry Run",
+        description="Only report the duplicates without merging them",
+        default=True,
+    )
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: bpy.types.Context):
+        groups = find_duplicates(self.id_types)
+        duplicates_count = sum(len(group.duplicates) for group in groups)
+        if not groups:
+            self.report({"INFO"}, "No duplicated data found")
+            return {"FINISHED"}
+
+        size = format_size(sum(group.size for group in groups))
+        if self.dry_run:
+            for group in groups:
+                log.info(
+                    "%s: %s",
+                    group.survivor.name,
+                    ", ".join(db.name for db in group.duplicates),
+                )
+            self.report(
+                {"INFO"},
+                f"Found {duplicates_count} duplicates of {len(groups)} datablocks "
+                f"(~{size} to save, see log for details)",
+            )
+            return {"FINISHED"}
+
+        merge_duplicates(groups)
+        self.report(
+            {"INFO"},
+            f"Merged {duplicates_count} duplicates into {len(groups)} datablocks "
+            f"(~{size} saved)",
+        )
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_library_externalize(bpy.types.Operator):
+    bl_idname = "sequencer.shot_library_externalize"
+    bl_label = "Externalize Shot Scenes"
+    bl_description = (
+        "Write the scenes of selected shots in their own library and replace them "
+        "by placeholders loaded on demand"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return bool(context.selected_sequences)
+
+    def execute(self, context: bpy.types.Context):
+        sed = context.scene.sequence_editor
+        directory = context.scene.shot_library_settings.directory
+        if directory.startswith("//") and not bpy.data.filepath:
+            self.report({"ERROR"}, "Save the file first to use a relative directory")
+            return {"CANCELLED"}
+
+        scenes = {
+            s.scene: None
+            for s in get_selected_scene_sequences(sed.sequences)
+            if s.scene
+            and not is_shot_placeholder(s.scene)
+            and not s.scene.library
+            and s.scene != context.scene
+        }
+        for scene in scenes:
+            externalize_shot_scene(scene, sed, directory)
+
+        self.report({"INFO"}, f"Externalized {len(scenes)} shot scene(s)")
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_library_load(bpy.types.Operator):
+    bl_idname = "sequencer.shot_library_load"
+    bl_label = "Load Shot Scenes"
+    bl_description = "Load the scenes of selected shots from their library"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return bool(context.selected_sequences)
+
+    def execute(self, context: bpy.types.Context):
+        sed = context.scene.sequence_editor
+        link = context.scene.shot_library_settings.load_mode == "LINK"
+        placeholders = {
+            s.scene: None
+            for s in get_selected_scene_sequences(sed.sequences)
+            if is_shot_placeholder(s.scene)
+        }
+        for placeholder in placeholders:
+            try:
+                load_shot_scene(placeholder, sed, link)
+            except (OSError, ValueError) as e:
+                self.report({"ERROR"}, str(e))
+                return {"CANCELLED"}
+
+        self.report({"INFO"}, f"Loaded {len(placeholders)} shot scene(s)")
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_library_unload(bpy.types.Operator):
+    bl_idname = "sequencer.shot_library_unload"
+    bl_label = "Unload Shot Scenes"
+    bl_description = (
+        "Replace the scenes of selected shots by placeholders, saving appended "
+        "scenes back to their library"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return bool(context.selected_sequences)
+
+    def execute(self, context: bpy.types.Context):
+        sed = context.scene.sequence_editor
+        windows_scenes = {w.scene for w in context.window_manager.windows}
+        scenes = {
+            s.scene: None
+            for s in get_selected_scene_sequences(sed.sequences)
+            if STRIP_PROP_LIBRARY_PATH in s
+            and s.scene
+            and not is_shot_placeholder(s.scene)
+            and s.scene not in windows_scenes
+        }
+        for scene in scenes:
+            unload_shot_scene(scene, sed)
+
+        self.report({"INFO"}, f"Unloaded {len(scenes)} shot scene(s)")
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_library_split(bpy.types.Operator):
+    bl_idname = "sequencer.shot_library_split"
+    bl_label = "Split Into Shot Files"
+    bl_description = (
+        "Write every shot scene of the edit in its own library, shared folders in a "
+        "common library, and link them back in this file"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description=(
+            "Number of background Blender processes writing the shot files "
+            "(0 to write them from this process)"
+        ),
+        default=4,
+        min=0,
+    )
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return context.scene.sequence_editor is not None
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: bpy.types.Context):
+        if not bpy.data.filepath or bpy.data.is_dirty:
+            self.report({"ERROR"}, "Save the file first")
+            return {"CANCELLED"}
+
+        start = time.perf_counter()
+        try:
+            count = split_edit_file(
+                context.scene.sequence_editor,
+                context.scene.shot_library_settings.directory,
+                self.workers,
+            )
+        except (RuntimeError, ValueError, OSError) as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+
+        self.report(
+            {"INFO"},
+            f"Split {count} shot scene(s) in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_shot_autosave_recover(bpy.types.Operator):
+    bl_idname = "sequencer.shot_autosave_recover"
+    bl_label = "Recover Autosaved Shots"
+    bl_description = (
+        "Replace shot scenes by their incremental autosave, if more recent than "
+        "the current file"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return bool(bpy.data.filepath)
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event):
+        return context.window_manager.invoke_confirm(self, event)
+
+    def execute(self, context: bpy.types.Context):
+        recoverable = get_recoverable_shots()
+        for scene, filepath in recoverable.items():
+            recover_autosaved_shot(scene, filepath)
+
+        self.report({"INFO"}, f"Recovered {len(recoverable)} shot scene(s)")
         return {"FINISHED"}
 
 
@@ -802,8 +1236,17 @@ classes = (
     SEQUENCER_OT_shot_duplicate,
     SEQUENCER_OT_shot_delete,
     SEQUENCER_OT_shot_timing_adjust,
+    SEQUENCER_OT_shot_bulk_retime,
     SEQUENCER_OT_shot_rename,
     SEQUENCER_OT_shot_chronological_numbering,
+    SEQUENCER_OT_shot_memory_analyze,
+    SEQUENCER_OT_shot_select,
+    SEQUENCER_OT_shot_deduplicate_data,
+    SEQUENCER_OT_shot_library_externalize,
+    SEQUENCER_OT_shot_library_load,
+    SEQUENCER_OT_shot_library_unload,
+    SEQUENCER_OT_shot_library_split,
+    SEQUENCER_OT_shot_autosave_recover,
 )
 
 
@@ -0,0 +1,257 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+"""
+Split of an edit file into per-shot library files.
+
+Each shot scene used by the edit is written in its own library (see
+`spa_sequencer.shot.library`), and shared folders are written once in a dedicated
+library that shot libraries link to. The edit file is then rewired to link the
+shot scenes.
+
+Shot libraries can be written by a pool of background Blender processes, each one
+opening the saved edit file and writing a subset of the shots.
+
+This module can also be used as a background mode entry point:
+
+    blender -b edit.blend --python split.py -- --directory //shots/ --workers 8
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+import bpy
+
+from spa_sequencer.shared_folders.core import get_shared_folders_root_collection
+from spa_sequencer.shot.core import delete_orphan_datablocks
+from spa_sequencer.shot.library import (
+    is_shot_placeholder,
+    load_shot_scene,
+    set_strips_library,
+    unload_shot_scene,
+    write_shot_library,
+)
+from spa_sequencer.shot.memory import walk_scene_removable_datablocks
+from spa_sequencer.utils import get_background_blender_args
+
+
+# Name of the library holding shared folders, in the shot libraries directory.
+SHARED_FOLDERS_LIBRARY_NAME = "shared_folders.blend"
+
+
+def get_shots_scenes(sed: bpy.types.SequenceEditor) -> list[bpy.types.Scene]:
+    """
+    Get the local shot scenes used by scene strips in `sed`.
+
+    :param sed: The sequence editor.
+    :return: The scenes, without duplicates.
+    """
+    return list(
+        dict.fromkeys(
+            s.scene
+            for s in sed.sequences_all
+            if isinstance(s, bpy.types.SceneSequence)
+            and s.scene
+            and s.scene != sed.id_data
+            and not s.scene.library
+            and not is_shot_placeholder(s.scene)
+        )
+    )
+
+
+def get_shot_library_filepath(directory: str, scene_name: str) -> str:
+    """Get the absolute path of the library of the shot scene `scene_name`."""
+    return os.path.join(bpy.path.abspath(directory), f"{scene_name}.blend")
+
+
+def write_shared_folders_library(filepath: str) -> bool:
+    """
+    Write the shared folders of the current file in the library at `filepath`.
+
+    :param filepath: The absolute path of the library.
+    :return: Whether there were shared folders to write.
+    """
+    root = get_shared_folders_root_collection()
+    if not root or not root.children:
+        return False
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    bpy.data.libraries.write(
+        filepath, set(root.children), path_remap="RELATIVE_ALL", fake_user=True
+    )
+    return True
+
+
+def link_shared_folders(filepath: str):
+    """
+    Replace the local shared folders by the ones linked from the library at
+    `filepath`, so that libraries written afterwards link them instead of
+    embedding a copy. Local shared folders are left without users.
+
+    :param filepath: The absolute path of the shared folders library.
+    """
+    root = get_shared_folders_root_collection()
+    local_folders = {col.name: col for col in root.children if not col.library}
+    with bpy.data.libraries.load(filepath, link=True, relative=True) as (
+        data_from,
+        data_to,
+    ):
+        data_to.collections = [
+            name for name in data_from.collections if name in local_folders
+        ]
+
+    for linked_folder in data_to.collections:
+        local_folders[linked_folder.name].user_remap(linked_folder)
+
+
+def write_shots_libraries(scene_names: Iterable[str], directory: str):
+    """
+    Write the shot scenes named `scene_names` in their own library in `directory`.
+
+    :param scene_names: The names of the shot scenes.
+    :param directory: The shot libraries directory.
+    """
+    for name in scene_names:
+        scene = bpy.data.scenes[name]
+        write_shot_library(scene, get_shot_library_filepath(directory, name))
+
+
+def run_workers(
+    scene_names: list[str], directory: str, workers: int, link_shared: bool
+):
+    """
+    Write shot libraries using a pool of background Blender processes opening the
+    current (saved) file.
+
+    :param scene_names: The names of the shot scenes to write.
+    :param directory: The shot libraries directory.
+    :param workers: The number of worker processes.
+    :param link_shared: Whether workers should link the shared folders library.
+    :raise RuntimeError: If a worker failed.
+    """
+    directory = bpy.path.abspath(directory)
+
+    def run_worker(names: list[str]):
+        args = get_background_blender_args(
+            bpy.data.filepath,
+            "from spa_sequencer.shot.split import main; main()",
+            [
+                "--worker",
+                "--directory",
+                directory,
+                *(["--link-shared"] if link_shared else []),
+                "--scenes",
+                *names,
+            ],
+        )
+        return subprocess.run(args, capture_output=True, text=True)
+
+    # Distribute the shots evenly across workers, so that each worker opens the
+    # edit file only once.
+    chunks = [scene_names[idx::workers] for idx in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_worker, [chunk for chunk in chunks if chunk]))
+
+    if failed := [res for res in results if res.returncode != 0]:
+        raise RuntimeError(
+            f"{len(failed)} shot library worker(s) failed:\n{failed[0].stderr}"
+        )
+
+
+def split_edit_file(
+    sed: bpy.types.SequenceEditor, directory: str, workers: int = 0
+) -> int:
+    """
+    Write each shot scene used in `sed` in its own library and rewire the current
+    file to link them.
+
+    :param sed: The sequence editor of the edit.
+    :param directory: The shot libraries directory.
+    :param workers: The number of background Blender processes writing the shot
+        libraries. If 0, they are written by the current process, otherwise the
+        current file must be saved.
+    :return: The number of shot scenes split.
+    """
+    scenes = get_shots_scenes(sed)
+    if workers and (not bpy.data.filepath or bpy.data.is_dirty):
+        raise RuntimeError("The file must be saved to use worker processes")
+
+    # Datablocks of the shot scenes, including local shared folders, deleted once
+    # replaced by linked ones.
+    datablocks = [
+        db for scene in scenes for db in walk_scene_removable_datablocks(scene)
+    ]
+
+    shared_library = os.path.join(
+        bpy.path.abspath(directory), SHARED_FOLDERS_LIBRARY_NAME
+    )
+    has_shared_folders = write_shared_folders_library(shared_library)
+
+    scene_names = [scene.name for scene in scenes]
+    if workers:
+        run_workers(scene_names, directory, workers, has_shared_folders)
+        if has_shared_folders:
+            link_shared_folders(shared_library)
+    else:
+        if has_shared_folders:
+            link_shared_folders(shared_library)
+        write_shots_libraries(scene_names, directory)
+
+    # Rewire strips to linked shot scenes.
+    for scene in scenes:
+        filepath = get_shot_library_filepath(directory, scene.name)
+        library_path = bpy.path.relpath(filepath) if bpy.data.filepath else filepath
+        set_strips_library(
+            [
+                s
+                for s in sed.sequences_all
+                if isinstance(s, bpy.types.SceneSequence) and s.scene == scene
+            ],
+            library_path,
+            scene.name,
+        )
+        placeholder = unload_shot_scene(scene, sed, save=False, purge=False)
+        load_shot_scene(placeholder, sed, link=True)
+
+    delete_orphan_datablocks(datablocks)
+    return len(scenes)
+
+
+def main():
+    """Background mode entry point."""
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(
+        description="Split an edit file into per-shot library files"
+    )
+    parser.add_argument("--directory", default="//shots/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--scene", help="The edit scene (default: active scene)")
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't save the rewired edit file"
+    )
+    # Worker mode arguments
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--link-shared", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scenes", nargs="*", default=[], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        if args.link_shared:
+            link_shared_folders(
+                os.path.join(args.directory, SHARED_FOLDERS_LIBRARY_NAME)
+            )
+        write_shots_libraries(args.scenes, args.directory)
+        return
+
+    scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+    count = split_edit_file(scene.sequence_editor, args.directory, args.workers)
+    print(f"Split {count} shot scenes in {bpy.path.abspath(args.directory)}")
+    if not args.no_save:
+        bpy.ops.wm.save_mainfile()
+
+
+if __name__ == "__main__":
+    main()
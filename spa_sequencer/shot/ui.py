@@ -3,6 +3,7 @@
 
 import bpy
 
+from spa_sequencer.shot.memory import format_size
 from spa_sequencer.utils import register_classes, unregister_classes
 
 
@@ -16,6 +17,9 @@ class SEQUENCER_MT_shot_clean_up(bpy.types.Menu):
         layout = self.layout
 
         layout.operator("sequencer.shot_chronological_numbering")
+        layout.operator(
+            "sequencer.shot_deduplicate_data", text="Merge Duplicated Data..."
+        )
 
 
 class SEQUENCER_MT_shot(bpy.types.Menu):
@@ -33,8 +37,10 @@ class SEQUENCER_MT_shot(bpy.types.Menu):
         layout.separator()
         layout.operator("sequencer.shot_rename", text="Rename...")
         layout.operator("sequencer.shot_timing_adjust")
+        layout.operator("sequencer.shot_bulk_retime", text="Bulk Retime...")
         layout.separator()
         layout.menu("SEQUENCER_MT_shot_clean_up")
+        layout.operator("sequencer.shot_autosave_recover", text="Recover Autosave...")
 
 
 def draw_MT_shot(self, context):
@@ -42,9 +48,144 @@ def draw_MT_shot(self, context):
     layout.menu(SEQUENCER_MT_shot.bl_idname)
 
 
+class SEQUENCER_UL_shot_memory_stats(bpy.types.UIList):
+    """Display the estimated memory footprint of shot scenes."""
+
+    bl_idname = "SEQUENCER_UL_shot_memory_stats"
+
+    sort_key: bpy.props.EnumProperty(
+        name="Sort By",
+        items=(
+            ("NAME", "Name", "Sort by scene name"),
+            ("TOTAL", "Total", "Sort by total size"),
+            ("EXCLUSIVE", "Exclusive", "Sort by size of data only used by the shot"),
+            ("SHARED", "Shared", "Sort by size of data shared with other shots"),
+        ),
+        default="TOTAL",
+    )
+
+    def draw_item(
+        self, context, layout, data, item, icon, active_data, active_propname
+    ):
+        row = layout.row()
+        row.label(text=item.name, icon="SCENE_DATA")
+        row = row.row()
+        row.alignment = "RIGHT"
+        row.label(text=format_size(item.total_size * 1024))
+        sub = row.row()
+        sub.active = False
+        sub.label(text=f"({format_size(item.shared_size * 1024)} shared)")
+        props = row.operator(
+            "sequencer.shot_select", text="", icon="RESTRICT_SELECT_OFF", emboss=False
+        )
+        props.scene_name = item.name
+
+    def draw_filter(self, context, layout):
+        row = layout.row()
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "sort_key", text="")
+        row.prop(self, "use_filter_sort_reverse", text="", icon="SORT_DESC")
+
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        helpers = bpy.types.UI_UL_list
+        flags = helpers.filter_items_by_name(
+            self.filter_name, self.bitflag_filter_item, items, "name"
+        )
+        if self.sort_key == "NAME":
+            order = helpers.sort_items_by_name(items, "name")
+        else:
+            attr = {
+                "TOTAL": "total_size",
+                "EXCLUSIVE": "exclusive_size",
+                "SHARED": "shared_size",
+            }[self.sort_key]
+            # Biggest first.
+            order = helpers.sort_items_helper(
+                [(idx, -getattr(item, attr)) for idx, item in enumerate(items)],
+                key=lambda x: x[1],
+            )
+        return flags, order
+
+
+class SEQUENCER_PT_shot_memory(bpy.types.Panel):
+    """Panel that displays the estimated memory footprint of shots."""
+
+    bl_label = "Shots Memory"
+    bl_space_type = "SEQUENCE_EDITOR"
+    bl_region_type = "UI"
+    bl_category = "SPA.Sequencer"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context: bpy.types.Context):
+        wm = context.window_manager
+        self.layout.operator("sequencer.shot_memory_analyze", icon="FILE_REFRESH")
+        if not wm.shot_memory_stats:
+            return
+
+        self.layout.template_list(
+            SEQUENCER_UL_shot_memory_stats.bl_idname,
+            "",
+            wm,
+            "shot_memory_stats",
+            wm,
+            "shot_memory_stats_index",
+            rows=5,
+        )
+
+        if not 0 <= wm.shot_memory_stats_index < len(wm.shot_memory_stats):
+            return
+
+        item = wm.shot_memory_stats[wm.shot_memory_stats_index]
+        col = self.layout.column(align=True)
+        for label, size in (
+            ("Exclusive", item.exclusive_size),
+            ("Shared", item.shared_size),
+            ("Meshes", item.mesh_size),
+            ("Grease Pencil", item.gpencil_size),
+            ("Images", item.image_size),
+            ("Actions", item.action_size),
+        ):
+            row = col.row()
+            row.label(text=label)
+            row.label(text=format_size(size * 1024))
+        col.label(text=f"Used by {item.strips_count} strip(s)")
+
+
+class SEQUENCER_PT_shot_library(bpy.types.Panel):
+    """Panel that exposes on-demand shot libraries settings and operators."""
+
+    bl_label = "Shot Libraries"
+    bl_space_type = "SEQUENCE_EDITOR"
+    bl_region_type = "UI"
+    bl_category = "SPA.Sequencer"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context: bpy.types.Context):
+        self.layout.use_property_split = True
+        self.layout.use_property_decorate = False
+        settings = context.scene.shot_library_settings
+        self.layout.prop(settings, "directory")
+        self.layout.prop(settings, "enabled")
+        col = self.layout.column()
+        col.active = settings.enabled
+        col.prop(settings, "load_mode")
+        col.prop(settings, "memory_budget")
+
+        col = self.layout.column(align=True)
+        col.operator("sequencer.shot_library_externalize", icon="EXPORT")
+        row = col.row(align=True)
+        row.operator("sequencer.shot_library_load", text="Load", icon="IMPORT")
+        row.operator("sequencer.shot_library_unload", text="Unload", icon="X")
+        col.operator("sequencer.shot_library_split", icon="FILE_BLEND")
+
+
 classes = (
     SEQUENCER_MT_shot,
     SEQUENCER_MT_shot_clean_up,
+    SEQUENCER_UL_shot_memory_stats,
+    SEQUENCER_PT_shot_memory,
+    SEQUENCER_PT_shot_library,
 )
 
 
@@ -124,6 +124,11 @@ scene_frame_set: Optional[
 ] = None
 
 
+# Callbacks invoked with the strip driving the synchronization, before its scene
+# gets activated. Callbacks may modify the strip (e.g. to load its scene on demand).
+master_strip_callbacks: list[Callable[[bpy.types.SceneSequence], None]] = []
+
+
 def _scene_frame_set_default(
     context: bpy.types.Context, scene: bpy.types.Scene, frame: int
 ):
@@ -510,6 +515,9 @@ def sync_system_update(context: bpy.types.Context, force: bool = False):
         sync_settings.last_strip_scene_frame = -1
         return
 
+    for callback in master_strip_callbacks:
+        callback(strip)
+
     # Update cached values
     sync_settings.last_master_strip = strip.name
     sync_settings.last_master_strip_idx = master_scene.sequence_editor.sequences.find(
@@ -8,7 +8,8 @@ Addon level utility functions.
 import logging
 import os
 import re
-from typing import Type
+import sys
+from typing import Optional, Type
 
 import bpy
 
@@ -105,3 +106,44 @@ def remove_auto_numbering_suffix(name: str) -> str:
 
 def get_addon_directory() -> str:
     return os.path.dirname(spa_sequencer.__file__)
+
+
+def get_background_blender_args(
+    filepath: str,
+    python_expr: str,
+    script_args: list[str],
+    blender_args: Optional[list[str]] = None,
+) -> list[str]:
+    """
+    Get the command line of a background Blender process opening `filepath` and
+    running `python_expr`, with this add-on importable.
+    The process loads the user preferences, so that it uses the same add-ons (e.g.
+    providing drivers or nodes used by the file) and render devices as this
+    instance.
+
+    :param filepath: The Blender file to open.
+    :param python_expr: The Python code to run once the file is opened.
+    :param script_args: The arguments passed to the Python code (after "--").
+    :param blender_args: Extra Blender arguments, ignored when running Blender as a
+        Python module.
+    :return: The command line arguments.
+    """
+    addon_root = os.path.dirname(get_addon_directory())
+    python_expr = f"import sys; sys.path.insert(0, {addon_root!r}); {python_expr}"
+    if not bpy.app.binary_path:
+        # Blender as a Python module: open the file from Python.
+        python_expr = (
+            f"import bpy; bpy.ops.wm.open_mainfile(filepath={filepath!r}); "
+            f"{python_expr}"
+        )
+        return [sys.executable, "-c", python_expr, "--", *script_args]
+    return [
+        bpy.app.binary_path,
+        "--background",
+        *(blender_args or []),
+        filepath,
+        "--python-expr",
+        python_expr,
+        "--",
+        *script_args,
+    ]
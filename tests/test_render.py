@@ -0,0 +1,452 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+import csv
+import json
+import os
+import shutil
+import time
+
+import bpy
+import pytest
+
+from spa_sequencer.preferences import get_addon_prefs
+from spa_sequencer.render.media import (
+    MovieSegment,
+    concatenate_movies_stream_copy,
+    is_image_complete,
+    probe_movie,
+    split_frame_range,
+)
+from spa_sequencer.render.parallel import (
+    RenderWorker,
+    RenderWorkerPool,
+    get_render_worker_pool,
+)
+from spa_sequencer.render.scheduler import get_dependent_tasks, get_ready_task
+from spa_sequencer.render.tasks import (
+    STRIP_PROP_SOURCE_FRAME_END,
+    STRIP_PROP_SOURCE_FRAME_START,
+    STRIP_PROP_SOURCE_STRIP,
+    BaseTask,
+    StripRenderTask,
+    TaskStatus,
+)
+
+from utils import create_shot_scene
+
+
+def setup_batch_render(tmp_path, shots_count: int) -> list[bpy.types.SceneSequence]:
+    """Create `shots_count` short shots and setup a fast batch render of images."""
+    edit_scene = bpy.context.scene
+    edit_scene.sequence_editor_create()
+    strips = [create_shot_scene(edit_scene, 1, 1)]
+    for _ in range(shots_count - 1):
+        strips.append(create_shot_scene(edit_scene, 1, strips[-1].frame_final_end))
+    for strip in strips:
+        strip.frame_final_duration = 2
+        camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+        strip.scene.collection.objects.link(camera)
+        strip.scene_camera = camera
+
+    options = edit_scene.batch_render_options
+    options.media_type = "IMAGES"
+    options.render_engine = "BLENDER_WORKBENCH"
+    options.resolution = "12"
+    options.filepath_pattern = str(tmp_path / "{strip}")
+    options.output_scene = bpy.data.scenes.new("OUTPUT")
+    return strips
+
+
+def wait_workers_ready(workers: list[RenderWorker], timeout: float = 30.0):
+    start = time.monotonic()
+    while not all(worker.is_idle for worker in workers):
+        assert time.monotonic() - start < timeout
+        time.sleep(0.05)
+
+
+def test_render_worker_pool_reuse(tmp_path):
+    filepath = str(tmp_path / "edit.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True)
+    pool = RenderWorkerPool()
+    try:
+        workers = pool.acquire(filepath, [None, None])
+        wait_workers_ready(workers)
+
+        # Unchanged file: workers are reused as is.
+        assert pool.acquire(filepath, [None]) == workers[:1]
+        assert workers[0].is_idle
+        assert not workers[1].is_running
+
+        # Changed file: workers are reused and reload it.
+        os.utime(filepath, ns=(0, 0))
+        assert pool.acquire(filepath, [None]) == workers[:1]
+        assert not workers[0].ready
+        wait_workers_ready(workers[:1])
+    finally:
+        pool.shutdown()
+    assert not workers[0].is_running
+
+
+def test_parallel_batch_render(tmp_path):
+    strips = setup_batch_render(tmp_path, 3)
+    bpy.context.scene.batch_render_options.use_parallel_render = True
+
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+
+    # Each strip has been rendered by the workers.
+    for strip in strips:
+        assert os.path.exists(tmp_path / f"{strip.name}.0001.jpg")
+        assert os.path.exists(tmp_path / f"{strip.name}.0002.jpg")
+    # Output strips have been created by the main instance.
+    output_sed = bpy.data.scenes["OUTPUT"].sequence_editor
+    assert len(output_sed.sequences) == 3
+    # Workers are kept for next renders.
+    assert all(worker.is_idle for worker in get_render_worker_pool().workers)
+    # Render settings overrides have been reverted.
+    assert strips[0].scene.render.engine != "BLENDER_WORKBENCH"
+
+
+def test_render_fingerprint(tmp_path):
+    strips = setup_batch_render(tmp_path, 1)
+    task = StripRenderTask(strip=strips[0])
+    strip_name = strips[0].name
+    fingerprint = task.compute_fingerprint(bpy.context.scene.batch_render_options)
+
+    # Fingerprint is stable across sessions and ignores selection.
+    filepath = str(tmp_path / "edit.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=filepath)
+    bpy.ops.wm.open_mainfile(filepath=filepath)
+    options = bpy.context.scene.batch_render_options
+    task.strip = bpy.context.scene.sequence_editor.sequences_all[strip_name]
+    camera = task.strip.scene_camera
+    camera.select_set(True, view_layer=task.scene.view_layers[0])
+    assert task.compute_fingerprint(options) == fingerprint
+
+    # Frame range is not part of the fingerprint.
+    task.strip.frame_offset_end += 1
+    assert task.compute_fingerprint(options) == fingerprint
+
+    # Scene content and render options changes are detected.
+    camera.location.x += 1
+    assert task.compute_fingerprint(options) != fingerprint
+    camera.location.x -= 1
+    options.resolution = "25"
+    assert task.compute_fingerprint(options) != fingerprint
+
+    # Nested settings changes are detected.
+    fingerprint = task.compute_fingerprint(options)
+    camera.data.dof.aperture_fstop += 1
+    assert task.compute_fingerprint(options) != fingerprint
+    world = task.scene.world = bpy.data.worlds.new("World")
+    world.use_nodes = True
+    ramp = world.node_tree.nodes.new("ShaderNodeValToRGB")
+    fingerprint = task.compute_fingerprint(options)
+    ramp.color_ramp.elements[0].position = 0.5
+    assert task.compute_fingerprint(options) != fingerprint
+
+    # Changes of used datablocks outside of the scene content are detected:
+    # materials linked to objects and node groups used by materials.
+    obj = bpy.data.objects.new("Cube", bpy.data.meshes.new("Cube"))
+    task.scene.collection.objects.link(obj)
+    obj.data.materials.append(None)
+    obj.material_slots[0].link = "OBJECT"
+    material = obj.material_slots[0].material = bpy.data.materials.new("Material")
+    material.use_nodes = True
+    group = bpy.data.node_groups.new("Group", "ShaderNodeTree")
+    group_ramp = group.nodes.new("ShaderNodeValToRGB")
+    material.node_tree.nodes.new("ShaderNodeGroup").node_tree = group
+    fingerprint = task.compute_fingerprint(options)
+    group_ramp.color_ramp.elements[0].position = 0.5
+    assert task.compute_fingerprint(options) != fingerprint
+    fingerprint = task.compute_fingerprint(options)
+    material.diffuse_color[0] = 0.5
+    assert task.compute_fingerprint(options) != fingerprint
+
+
+def test_batch_render_skip_unchanged(tmp_path):
+    strips = setup_batch_render(tmp_path, 2)
+    bpy.context.scene.batch_render_options.skip_unchanged = True
+    outputs = [tmp_path / f"{strip.name}.0001.jpg" for strip in strips]
+
+    def get_outputs_mtime() -> list[int]:
+        return [os.stat(output).st_mtime_ns for output in outputs]
+
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    mtimes = get_outputs_mtime()
+
+    # Nothing changed: no render, output strips are still created.
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    assert get_outputs_mtime() == mtimes
+    assert len(bpy.data.scenes["OUTPUT"].sequence_editor.sequences) == 4
+
+    # Only the modified shot is rendered again.
+    strips[0].scene_camera.location.x += 1
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    new_mtimes = get_outputs_mtime()
+    assert new_mtimes[0] != mtimes[0]
+    assert new_mtimes[1] == mtimes[1]
+
+
+def test_batch_render_trimmed_images(tmp_path):
+    strip = setup_batch_render(tmp_path, 1)[0]
+    bpy.context.scene.batch_render_options.skip_unchanged = True
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    mtime = os.stat(tmp_path / "SHOT.0002.jpg").st_mtime_ns
+
+    # Only new frames are rendered.
+    strip.frame_offset_start += 1
+    strip.frame_final_duration = 3
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    assert os.stat(tmp_path / "SHOT.0002.jpg").st_mtime_ns == mtime
+    assert os.path.exists(tmp_path / "SHOT.0004.jpg")
+    assert len(bpy.data.scenes["OUTPUT"].sequence_editor.sequences) == 2
+
+
+def test_batch_render_trimmed_movie(tmp_path):
+    strip = setup_batch_render(tmp_path, 1)[0]
+    options = bpy.context.scene.batch_render_options
+    options.skip_unchanged = True
+    options.media_type = "MOVIE"
+    options.output_scene = None
+    options.resolution = "100"
+    strip.scene.render.resolution_x, strip.scene.render.resolution_y = 64, 36
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+
+    # Movie is spliced with the new frames.
+    strip.frame_offset_start += 1
+    strip.frame_final_duration = 4
+    task = StripRenderTask(strip=strip)
+    plan = task.plan_render(options)
+    assert plan.render_ranges == [(3, 5)]
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    assert sorted(os.listdir(tmp_path)) == ["SHOT.fingerprint", "SHOT.mov"]
+    movie = bpy.data.movieclips.load(str(tmp_path / "SHOT.mov"))
+    assert movie.frame_duration == 4
+
+    # Nothing left to render.
+    assert task.is_output_up_to_date(options)
+
+
+@pytest.mark.skipif(
+    not shutil.which("ffmpeg") or not shutil.which("ffprobe"),
+    reason="ffmpeg is not available",
+)
+def test_concatenate_movies_stream_copy(tmp_path):
+    scene = bpy.context.scene
+    scene.render.engine = "BLENDER_WORKBENCH"
+    scene.render.resolution_x, scene.render.resolution_y = 64, 36
+    scene.render.resolution_percentage = 100
+    scene.render.image_settings.file_format = "FFMPEG"
+    scene.render.ffmpeg.format = "QUICKTIME"
+    segments = []
+    for idx, frame_count in enumerate((2, 3)):
+        filepath = str(tmp_path / f"segment_{idx}.mov")
+        scene.render.filepath = filepath
+        scene.frame_start, scene.frame_end = 1, frame_count
+        bpy.ops.render.render(animation=True)
+        segments.append(MovieSegment(filepath, 0, frame_count))
+
+    # Whole movies sharing their encoding are concatenated without re-encoding.
+    filepath = str(tmp_path / "concatenated.mov")
+    assert concatenate_movies_stream_copy(segments, filepath)
+    assert probe_movie(filepath).frame_count == 5
+
+    # Movies can only be cut on keyframes: partial movies are not concatenated.
+    segments[1] = MovieSegment(segments[1].filepath, 1, 2)
+    assert not concatenate_movies_stream_copy(segments, filepath)
+
+
+def test_split_frame_range():
+    assert split_frame_range((1, 10), 4) == [(1, 3), (4, 6), (7, 10)]
+    assert split_frame_range((5, 6), 4) == [(5, 6)]
+
+
+def test_parallel_batch_render_strip_failure(tmp_path):
+    strips = setup_batch_render(tmp_path, 2)
+    bpy.context.scene.batch_render_options.use_parallel_render = True
+    # A strip without camera can't be rendered.
+    bpy.data.objects.remove(strips[0].scene_camera)
+
+    with pytest.raises(RuntimeError, match="1 strip render\\(s\\) failed"):
+        bpy.ops.sequencer.batch_render()
+
+    # Other strips are still rendered and post-processed.
+    assert os.path.exists(tmp_path / f"{strips[1].name}.0002.jpg")
+    assert not os.path.exists(tmp_path / f"{strips[0].name}.0001.jpg")
+    output_sed = bpy.data.scenes["OUTPUT"].sequence_editor
+    assert len(output_sed.sequences) == 1
+
+
+def test_parallel_batch_render_chunks(tmp_path):
+    strip = setup_batch_render(tmp_path, 1)[0]
+    strip.frame_final_duration = 5
+    options = bpy.context.scene.batch_render_options
+    options.use_parallel_render = True
+    options.media_type = "MOVIE"
+    options.resolution = "100"
+    strip.scene.render.resolution_x, strip.scene.render.resolution_y = 64, 36
+
+    prefs = get_addon_prefs()
+    chunk_duration = prefs.render_chunk_duration
+    # Chunks of 2 frames.
+    prefs.render_chunk_duration = 2 / strip.scene.render.fps
+    try:
+        assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+    finally:
+        prefs.render_chunk_duration = chunk_duration
+
+    # Chunks have been rendered and assembled.
+    assert sorted(os.listdir(tmp_path)) == ["SHOT.fingerprint", "SHOT.mov"]
+    movie = bpy.data.movieclips.load(str(tmp_path / "SHOT.mov"))
+    assert movie.frame_duration == 5
+    options.skip_unchanged = True
+    assert StripRenderTask(strip=strip).is_output_up_to_date(options)
+
+
+def test_batch_render_report(tmp_path):
+    strips = setup_batch_render(tmp_path, 2)
+    options = bpy.context.scene.batch_render_options
+    options.write_report = True
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+
+    # Each rendered frame has been timed.
+    with open(tmp_path / "Scene.render_report.json") as f:
+        report = json.load(f)
+    strip_tasks = [
+        task for task in report["tasks"] if task["type"] == "StripRenderTask"
+    ]
+    assert [task["name"] for task in strip_tasks] == [strip.name for strip in strips]
+    assert [len(task["frames"]) for task in strip_tasks] == [2, 2]
+    assert report["frame_count"] == 4
+    # The gap between the two strips renders is measured.
+    assert strip_tasks[0]["gap"] is None
+    assert 0 < strip_tasks[1]["gap"] == report["gaps_duration"]
+    with open(tmp_path / "Scene.render_report.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["frame"] for row in rows] == ["1", "2", "1", "2"]
+
+    props = bpy.context.window_manager.batch_render
+    assert props.frames_done == props.frame_count == 4
+
+
+def test_parallel_batch_render_report(tmp_path):
+    setup_batch_render(tmp_path, 2)
+    options = bpy.context.scene.batch_render_options
+    options.use_parallel_render = True
+    options.write_report = True
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+
+    # Workers' frames timings are reported.
+    with open(tmp_path / "Scene.render_report.json") as f:
+        report = json.load(f)
+    jobs = [task for task in report["tasks"] if task["type"] == "RenderJob"]
+    assert sorted(len(job["frames"]) for job in jobs) == [2, 2]
+    assert report["frame_count"] == 4
+
+
+def test_render_tasks_scheduling():
+    render, sound = BaseTask(), BaseTask()
+    fit = BaseTask(dependencies=[render])
+    output = BaseTask(dependencies=[render, sound, fit])
+    tasks = [render, output, fit, sound]
+
+    assert get_ready_task(tasks) is render
+    assert get_ready_task([output, fit, sound]) is sound
+    render.status = TaskStatus.FINISHED
+    assert get_ready_task([output, fit]) is fit
+    assert get_dependent_tasks(tasks, render) == [output, fit]
+    assert get_dependent_tasks(tasks, sound) == [output]
+
+
+def test_batch_render_failure_propagation(tmp_path):
+    strips = setup_batch_render(tmp_path, 2)
+    # Rendering the first strip fails.
+    strips[0].scene_camera = None
+    output_scene = bpy.data.scenes["OUTPUT"]
+    output_scene.render.resolution_x = 100
+
+    with pytest.raises(RuntimeError, match="2 task\\(s\\) not done"):
+        bpy.ops.sequencer.batch_render()
+
+    # Other strips are still rendered, dependent tasks are skipped.
+    assert not os.path.exists(tmp_path / f"{strips[0].name}.0001.jpg")
+    assert os.path.exists(tmp_path / f"{strips[1].name}.0001.jpg")
+    assert len(output_scene.sequence_editor.sequences) == 1
+    assert output_scene.render.resolution_x == 100
+    assert bpy.context.window_manager.batch_render.status == "CANCELLED"
+
+
+def test_batch_render_cancel(tmp_path, monkeypatch):
+    strips = setup_batch_render(tmp_path, 2)
+    run = StripRenderTask.run
+
+    def run_or_cancel(task, context, render_options):
+        # The user cancels the render of the first strip.
+        if task.strip == strips[0]:
+            task.status = TaskStatus.CANCELLED
+        else:
+            run(task, context, render_options)
+
+    monkeypatch.setattr(StripRenderTask, "run", run_or_cancel)
+    assert bpy.ops.sequencer.batch_render() == {"CANCELLED"}
+
+    # The remaining tasks are not run, and can be resumed.
+    assert os.listdir(tmp_path) == ["Scene.render_manifest.json"]
+    assert not bpy.data.scenes["OUTPUT"].sequence_editor.sequences
+    assert bpy.context.window_manager.batch_render.status == "CANCELLED"
+
+
+def test_batch_render_output_image_sequence(tmp_path):
+    strip = setup_batch_render(tmp_path, 1)[0]
+    strip.frame_final_duration = 3
+    assert bpy.ops.sequencer.batch_render() == {"FINISHED"}
+
+    # A single image sequence strip is created, with the source metadata.
+    (output_strip,) = bpy.data.scenes["OUTPUT"].sequence_editor.sequences
+    assert [elem.filename for elem in output_strip.elements] == [
+        "SHOT.0001.jpg",
+        "SHOT.0002.jpg",
+        "SHOT.0003.jpg",
+    ]
+    assert output_strip.frame_final_start == strip.frame_final_start
+    assert output_strip.frame_final_duration == 3
+    assert output_strip[STRIP_PROP_SOURCE_STRIP] == strip.name
+    assert output_strip[STRIP_PROP_SOURCE_FRAME_START] == 1
+    assert output_strip[STRIP_PROP_SOURCE_FRAME_END] == 3
+
+
+@pytest.mark.parametrize("parallel", (False, True))
+def test_batch_render_resume(tmp_path, parallel):
+    strips = setup_batch_render(tmp_path, 2)
+    bpy.context.scene.batch_render_options.use_parallel_render = parallel
+    camera = strips[1].scene_camera
+    # Rendering the second strip fails: the manifest is kept.
+    strips[1].scene_camera = None
+    with pytest.raises(RuntimeError):
+        bpy.ops.sequencer.batch_render()
+    manifest = tmp_path / "Scene.render_manifest.json"
+    with open(manifest) as f:
+        statuses = [task["status"] for task in json.load(f)["tasks"]]
+    # Parallel render tasks fail as a whole.
+    if not parallel:
+        assert statuses == ["FINISHED", "FAILED", "SKIPPED"]
+
+    # Simulate a crash while writing the second image of the first strip.
+    os.remove(tmp_path / "SHOT.fingerprint")
+    with open(tmp_path / "SHOT.0002.jpg", "r+b") as f:
+        f.truncate(100)
+    mtime = os.stat(tmp_path / "SHOT.0001.jpg").st_mtime_ns
+
+    strips[1].scene_camera = camera
+    assert bpy.ops.sequencer.batch_render(resume=True) == {"FINISHED"}
+
+    # Only incomplete images are rendered again.
+    assert os.stat(tmp_path / "SHOT.0001.jpg").st_mtime_ns == mtime
+    assert is_image_complete(str(tmp_path / "SHOT.0002.jpg"))
+    assert os.path.exists(tmp_path / f"{strips[1].name}.0002.jpg")
+    # The fingerprint of the completed render has been written.
+    assert os.path.exists(tmp_path / "SHOT.fingerprint")
+    # Nothing left to resume.
+    assert not os.path.exists(manifest)
+    assert bpy.ops.sequencer.batch_render(resume=True) == {"CANCELLED"}
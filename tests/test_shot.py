@@ -5,14 +5,31 @@ import pytest
 
 import bpy
 
+from spa_sequencer.shot.checkpoint import TimingCheckpoint
 from spa_sequencer.shot.core import (
     adjust_shot_duration,
+    batch_strip_reload,
     delete_scene,
     duplicate_scene,
     DuplicationManifest,
+    get_template_scenes,
+    get_valid_shot_scenes,
+    plan_shots_retime,
+    reload_strip,
     rename_scene,
+    rename_scenes,
+    retime_shots,
+    ShotRetime,
+    ShotRippleEdit,
     slip_shot_content,
 )
+from spa_sequencer.shot.dedup import find_duplicates, merge_duplicates
+from spa_sequencer.shot.memory import (
+    compute_scenes_memory_footprint,
+    estimate_datablock_footprint,
+)
+from spa_sequencer.shot.ops import plan_shots_duplication, SEQUENCER_OT_shot_duplicate
+from spa_sequencer.sync.core import remap_frame_value
 
 
 from utils import create_shot_scene
@@ -50,6 +67,28 @@ def test_scene_duplication():
     assert obj_name.format(new_scene2.name) in new_scene2.objects
 
 
+def test_scene_duplication_settings():
+    ref_scene = bpy.context.scene
+    ref_scene.frame_start = 300
+    ref_scene.frame_end = 400
+    ref_scene.render.resolution_x = 1234
+    ref_scene.render.image_settings.file_format = "JPEG"
+    ref_scene.view_settings.view_transform = "Standard"
+    ref_scene["custom"] = {"value": 1}
+    initial_window_scene = bpy.context.window.scene
+
+    new_scene = duplicate_scene(bpy.context, ref_scene, "SceneCopy")
+
+    # Scene settings are transferred
+    assert (new_scene.frame_start, new_scene.frame_end) == (300, 400)
+    assert new_scene.render.resolution_x == 1234
+    assert new_scene.render.image_settings.file_format == "JPEG"
+    assert new_scene.view_settings.view_transform == "Standard"
+    assert new_scene["custom"].to_dict() == {"value": 1}
+    # Active window scene is left untouched
+    assert bpy.context.window.scene == initial_window_scene
+
+
 def test_scene_duplication_animation_data():
     ref_scene = bpy.context.scene
 
@@ -225,6 +264,39 @@ def test_scene_rename_invalid_name():
         rename_scene(bpy.context.scene, ref_scene_name)
 
 
+def test_scene_rename_multiple_scenes_swap_names():
+    # Add scene's name to the camera's name
+    bpy.context.scene.camera.name += f".{bpy.context.scene.name}"
+    sceneA = duplicate_scene(bpy.context, bpy.context.scene, "SceneA")
+    sceneB = duplicate_scene(bpy.context, bpy.context.scene, "SceneB")
+    objA = sceneA.camera
+    objB = sceneB.camera
+    assert objA.name.endswith("SceneA") and objB.name.endswith("SceneB")
+
+    # Swap scenes names
+    rename_scenes({sceneA: "SceneB", sceneB: "SceneA"})
+
+    assert sceneA.name == "SceneB" and sceneB.name == "SceneA"
+    # Ensure datablocks have been renamed without auto numbering suffix
+    assert objA.name.endswith("SceneB") and objB.name.endswith("SceneA")
+
+
+def test_scene_rename_multiple_scenes_conflicts():
+    ref_scene_name = bpy.context.scene.name
+    sceneA = bpy.data.scenes.new("SceneA")
+    sceneB = bpy.data.scenes.new("SceneB")
+
+    # Using the name of a scene that is not renamed fails
+    with pytest.raises(ValueError):
+        rename_scenes({sceneA: "SceneC", sceneB: ref_scene_name})
+    # Using the same name for several scenes fails
+    with pytest.raises(ValueError):
+        rename_scenes({sceneA: "SceneC", sceneB: "SceneC"})
+
+    # Nothing has been renamed
+    assert sceneA.name == "SceneA" and sceneB.name == "SceneB"
+
+
 def test_scene_delete_scene_duplicate():
     # Duplicate the default scene
     manifest = DuplicationManifest()
@@ -378,6 +450,163 @@ def test_shot_duration_adjust_with_multiple_shots():
     assert sh3.frame_final_start == sh2.frame_final_end
 
 
+def test_shot_ripple_edit_with_multiple_shots():
+    # Create a sequence with 3 shots following each others
+    sh1 = create_shot_scene(bpy.context.scene, 1, bpy.context.scene.frame_start)
+    sh2 = create_shot_scene(bpy.context.scene, 1, sh1.frame_final_end)
+    sh3 = create_shot_scene(bpy.context.scene, 1, sh2.frame_final_end)
+
+    sh2_original_duration = sh2.frame_final_duration
+    sh2_original_scene_end = sh2.scene.frame_end
+    sh3_original_start = sh3.frame_final_start
+    edit_frame_end = bpy.context.scene.frame_end = sh2.frame_final_end - 1
+
+    ripple_edit = ShotRippleEdit(sh2)
+    # Successive offsets are relative to the original state
+    for offset in (5, 20, -10, 10):
+        assert ripple_edit.apply(offset) == offset
+        assert sh2.frame_final_duration == sh2_original_duration + offset
+        assert sh3.frame_final_start == sh2.frame_final_end
+    # Scene ranges update is deferred until commit
+    assert sh2.scene.frame_end == sh2_original_scene_end
+    assert bpy.context.scene.frame_end == edit_frame_end
+    ripple_edit.commit()
+    assert sh2.scene.frame_end == sh2_original_scene_end + 10
+    assert bpy.context.scene.frame_end == edit_frame_end + 10
+
+    # 1st shot should not have been impacted
+    assert sh1.frame_final_start == bpy.context.scene.frame_start
+    assert sh3.frame_final_start == sh3_original_start + 10
+
+
+def test_shot_ripple_edit_from_start_revert():
+    sh1 = create_shot_scene(bpy.context.scene, 1, bpy.context.scene.frame_start)
+    sh2 = create_shot_scene(bpy.context.scene, 1, sh1.frame_final_end)
+    duration = sh1.frame_final_duration
+    sh2_original_start = sh2.frame_final_start
+
+    ripple_edit = ShotRippleEdit(sh1, from_frame_start=True)
+    # Shrink the shot from its start
+    assert ripple_edit.apply(-10) == -10
+    assert sh1.frame_offset_start == 10
+    assert sh2.frame_final_start == sh2_original_start - 10
+    # Extending the shot beyond its scene's start frame is clamped
+    assert ripple_edit.apply(10) == 0
+    assert sh1.frame_offset_start == 0
+
+    ripple_edit.apply(-20)
+    ripple_edit.revert()
+    assert sh1.frame_final_duration == duration
+    assert sh1.frame_offset_start == 0
+    assert sh2.frame_final_start == sh2_original_start
+
+
+def test_shots_bulk_retime():
+    # Create a sequence with 4 shots following each others
+    shots = [create_shot_scene(bpy.context.scene, 1, bpy.context.scene.frame_start)]
+    for _ in range(3):
+        shots.append(create_shot_scene(bpy.context.scene, 1, shots[-1].frame_final_end))
+    sh1, sh2, sh3, sh4 = shots
+    duration = sh1.frame_final_duration
+    sh1_start = sh1.frame_final_start
+    sh2_scene_end = sh2.scene.frame_end
+
+    # Extend the 2nd shot, shrink the 3rd one and move it to the right
+    retime_shots(
+        {
+            sh2: ShotRetime(duration=duration + 20),
+            sh3: ShotRetime(duration=duration - 10, offset=5),
+        }
+    )
+
+    # Shots stayed on their channel, in the same order
+    assert all(s.channel == 1 for s in shots)
+    assert sh1.frame_final_start == sh1_start
+    assert sh2.frame_final_duration == duration + 20
+    assert sh3.frame_final_start == sh2.frame_final_end + 5
+    assert sh3.frame_final_duration == duration - 10
+    assert sh4.frame_final_start == sh3.frame_final_end
+    assert sh4.frame_final_duration == duration
+    # Scene range has been extended
+    assert sh2.scene.frame_end == sh2_scene_end + 20
+
+    # Moving a shot before the end of the previous one is clamped
+    retime_shots({sh3: ShotRetime(offset=-50)})
+    assert sh3.frame_final_start == sh2.frame_final_end
+    assert sh4.frame_final_start == sh3.frame_final_end
+
+
+def test_shots_retime_null_duration():
+    sh1 = create_shot_scene(bpy.context.scene, 1, bpy.context.scene.frame_start)
+    sh2 = create_shot_scene(bpy.context.scene, 1, sh1.frame_final_end)
+    sed = bpy.context.scene.sequence_editor
+
+    # A null duration is clamped to a single frame, not ignored.
+    layout = plan_shots_retime(sed, {sh1: ShotRetime(duration=0)})
+    assert layout[sh1] == (sh1.frame_final_start, 1)
+    assert layout[sh2].frame_start == sh1.frame_final_start + 1
+
+
+def test_shots_timing_checkpoint():
+    shots = [create_shot_scene(bpy.context.scene, 1, bpy.context.scene.frame_start)]
+    for _ in range(3):
+        shots.append(create_shot_scene(bpy.context.scene, 1, shots[-1].frame_final_end))
+
+    def get_timing():
+        return [
+            (s.channel, s.frame_final_start, s.frame_final_end, s.scene.frame_end)
+            for s in shots
+        ]
+
+    original_timing = get_timing()
+    checkpoint = TimingCheckpoint(bpy.context.scene)
+
+    # Extend the shots in reverse order, moving the following ones
+    for strip in reversed(shots):
+        adjust_shot_duration(strip, 20)
+    slip_shot_content(shots[0], 10)
+    assert get_timing() != original_timing
+
+    # All strips timing and scene ranges are restored, despite transient overlaps
+    checkpoint.restore()
+    assert get_timing() == original_timing
+    assert shots[0].frame_offset_start == 0
+
+
+def test_batch_strip_reload():
+    sh1 = create_shot_scene(bpy.context.scene, 1, 1)
+    sh2 = create_shot_scene(bpy.context.scene, 2, 1)
+    original_duration = sh1.frame_duration
+    # Selection should be preserved
+    sh1.select = False
+    sh2.select = True
+
+    with batch_strip_reload():
+        for strip in (sh1, sh2):
+            strip.scene.frame_end += 10
+            with batch_strip_reload():
+                reload_strip(strip)
+            # Reload is deferred until the outermost scope exits
+            assert strip.frame_duration == original_duration
+
+    # Strips content has been re-evaluated
+    assert sh1.frame_duration == sh2.frame_duration == original_duration + 10
+    assert not sh1.select and sh2.select
+
+
+def test_batch_strip_reload_renamed_strip():
+    sh1 = create_shot_scene(bpy.context.scene, 1, 1)
+    original_duration = sh1.frame_duration
+
+    with batch_strip_reload():
+        sh1.scene.frame_end += 10
+        reload_strip(sh1)
+        sh1.name = "renamed"
+
+    # Renamed strip is still reloaded
+    assert sh1.frame_duration == original_duration + 10
+
+
 def test_shot_slip_content_positive_offset():
     # Test strip
     sh1 = create_shot_scene(bpy.context.scene, 1, bpy.context.scene.frame_start)
@@ -413,3 +642,143 @@ def test_shot_slip_content_negative_offset():
     assert sh2.frame_offset_start == sh1.frame_offset_start + offset
     assert sh2.frame_start == sh1.frame_start - offset
     assert sh2.frame_final_start == sh1.frame_final_start
+
+
+def test_valid_shot_scenes_registry():
+    scene = bpy.data.scenes.new("SceneA")
+    # Empty scenes are not valid shot scenes
+    assert scene not in get_valid_shot_scenes()
+
+    # Adding an object to the scene makes it valid
+    obj = bpy.data.objects.new("Empty", None)
+    scene.collection.objects.link(obj)
+    assert scene in get_valid_shot_scenes()
+
+    # Moving the object to a child collection keeps it valid
+    collection = bpy.data.collections.new("Content")
+    scene.collection.children.link(collection)
+    collection.objects.link(obj)
+    scene.collection.objects.unlink(obj)
+    assert scene in get_valid_shot_scenes()
+
+    # Removing the object makes it empty again
+    bpy.data.objects.remove(obj)
+    assert scene not in get_valid_shot_scenes()
+
+    # Renaming the scene as a template makes it a template scene
+    scene.name = "TEMPLATE_SHOT_A"
+    assert scene not in get_valid_shot_scenes()
+    assert scene in get_template_scenes()
+
+    # Removed scenes are discarded
+    bpy.data.scenes.remove(scene)
+    assert not get_template_scenes()
+
+
+def test_shots_memory_footprint():
+    cube = bpy.data.objects["Cube"]
+    mesh_size = estimate_datablock_footprint(cube.data).size
+    assert mesh_size > 0
+
+    # Each scene has its own copy of the cube, and they share a collection.
+    shared_col = bpy.data.collections.new("Shared")
+    shared_col.objects.link(bpy.data.objects.new("SharedCube", cube.data.copy()))
+    scenes = []
+    for name in ("SH0010", "SH0020"):
+        scene = bpy.data.scenes.new(name)
+        scene.collection.objects.link(bpy.data.objects.new(name, cube.data.copy()))
+        scene.collection.children.link(shared_col)
+        scenes.append(scene)
+
+    footprints = compute_scenes_memory_footprint(scenes)
+    for scene in scenes:
+        assert footprints[scene].exclusive == mesh_size
+        assert footprints[scene].shared == mesh_size
+        assert footprints[scene].categories == {"MESH": 2 * mesh_size}
+
+
+def test_duplicated_data_merge():
+    cube = bpy.data.objects["Cube"]
+    material = cube.data.materials[0]
+    # Create copies of the cube, with copies of its mesh and material.
+    copies = []
+    for _ in range(2):
+        obj = cube.copy()
+        obj.data = cube.data.copy()
+        obj.data.materials[0] = material.copy()
+        bpy.context.scene.collection.objects.link(obj)
+        copies.append(obj)
+    # Make one mesh different from the others.
+    copies[1].data.vertices[0].co.x += 1
+
+    groups = find_duplicates({"MATERIAL", "MESH"})
+    survivors = {group.survivor: group.duplicates for group in groups}
+    assert set(survivors[material]) == {obj.data.materials[0] for obj in copies}
+    assert survivors[cube.data] == [copies[0].data]
+
+    assert merge_duplicates(groups) == 3
+    assert copies[0].data == cube.data
+    assert copies[1].data != cube.data
+    assert copies[1].data.materials[0] == material
+
+
+def test_duplicated_data_nested_structs():
+    material = bpy.data.materials.new("Ramp")
+    material.use_nodes = True
+    ramp = material.node_tree.nodes.new("ShaderNodeValToRGB")
+    copies = [material.copy() for _ in range(2)]
+    # Make one material differ only by its color ramp.
+    copies[1].node_tree.nodes[ramp.name].color_ramp.elements[0].position = 0.5
+
+    groups = find_duplicates({"MATERIAL"})
+    survivors = {group.survivor: group.duplicates for group in groups}
+    assert survivors[material] == [copies[0]]
+
+
+def test_duplicated_data_shape_keys_and_weights():
+    cube = bpy.data.objects["Cube"]
+    cube.shape_key_add(name="Basis")
+    cube.shape_key_add(name="Key").value = 0.5
+    cube.vertex_groups.new(name="Group").add([0, 1], 0.5, "REPLACE")
+    cube.data.materials.append(None)
+    copies = [cube.data.copy() for _ in range(3)]
+    # Make copies differ only by a shape key setting or a vertex weight.
+    copies[1].shape_keys.key_blocks["Key"].slider_max = 2.0
+    copies[2].vertices[1].groups[0].weight = 1.0
+
+    groups = find_duplicates({"MESH"})
+    survivors = {group.survivor: group.duplicates for group in groups}
+    assert survivors[cube.data] == [copies[0]]
+
+
+def test_duplicated_data_actions():
+    action = bpy.data.actions.new("Action")
+    fcurve = action.fcurves.new("location", index=0)
+    fcurve.keyframe_points.insert(1, 0.0)
+    fcurve.keyframe_points.insert(10, 1.0)
+    copies = [action.copy() for _ in range(3)]
+    # Make copies differ only by their frame range or a keyframe easing setting.
+    copies[1].use_frame_range = True
+    copies[2].fcurves[0].keyframe_points[0].back = 2.0
+
+    groups = find_duplicates({"ACTION"})
+    survivors = {group.survivor: group.duplicates for group in groups}
+    assert survivors[action] == [copies[0]]
+
+
+def test_shots_duplication_plan():
+    sed = bpy.context.scene.sequence_editor
+    strip = create_shot_scene(bpy.context.scene, 1, 1)
+    strip.frame_final_duration = 10
+
+    plan = plan_shots_duplication(sed, [strip, strip], ["SH0020", "SH0030"], False)
+    assert [item.frame_start for item in plan] == [11, 21]
+
+    new_strips = [
+        SEQUENCER_OT_shot_duplicate.duplicate_shot(bpy.context, item) for item in plan
+    ]
+    # New strips use consecutive ranges of the shared scene.
+    for new_strip, start in zip(new_strips, (11, 21)):
+        assert new_strip.frame_final_start == start
+        assert remap_frame_value(new_strip.frame_final_start, new_strip) == start
+        assert new_strip.frame_final_duration == 10
@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+import os
+
+import bpy
+
+from spa_sequencer.preferences import get_addon_prefs
+from spa_sequencer.shot.autosave import (
+    autosave_dirty_shots,
+    get_autosave_directory,
+    get_dirty_shot_scenes,
+    get_recoverable_shots,
+    recover_autosaved_shot,
+)
+
+from utils import create_shot_scene
+
+
+def test_incremental_autosave(tmp_path):
+    # Use the active scene as a shot of a new edit scene.
+    scene = bpy.context.scene
+    edit_scene = bpy.data.scenes.new("EDIT")
+    edit_scene.sequence_editor_create()
+    strips = [
+        edit_scene.sequence_editor.sequences.new_scene("SH0010", scene, 1, 1),
+        create_shot_scene(edit_scene, 2, 1),
+    ]
+    bpy.ops.wm.save_as_mainfile(filepath=str(tmp_path / "edit.blend"))
+    assert not get_dirty_shot_scenes()
+
+    # Modify a single shot scene.
+    scene.collection.objects.link(bpy.data.objects.new("Empty", None))
+    bpy.context.evaluated_depsgraph_get().update()
+    assert get_dirty_shot_scenes() == [scene]
+
+    # Only the modified shot is written.
+    assert autosave_dirty_shots() == [scene.name]
+    assert os.listdir(get_autosave_directory()) == [f"{scene.name}.blend"]
+    assert not get_dirty_shot_scenes()
+
+    # Recover the shot from its sidecar file.
+    os.utime(bpy.data.filepath, (0, 0))
+    bpy.data.objects.remove(bpy.data.objects["Empty"])
+    recoverable = get_recoverable_shots()
+    assert list(recoverable) == [scene]
+    recovered = recover_autosaved_shot(scene, recoverable[scene])
+    assert strips[0].scene == recovered
+    assert "Empty" in recovered.collection.objects
+
+    # Sidecar files are discarded on save.
+    bpy.ops.wm.save_mainfile()
+    assert not os.path.exists(get_autosave_directory())
+
+
+def test_incremental_autosave_preference():
+    filepaths = bpy.context.preferences.filepaths
+    prefs = get_addon_prefs()
+    for use_auto_save in (True, False):
+        filepaths.use_auto_save_temporary_files = use_auto_save
+        # Blender's autosave is disabled while incremental autosave is enabled...
+        prefs.use_incremental_autosave = True
+        assert not filepaths.use_auto_save_temporary_files
+        # ...and restored to its original state afterwards.
+        prefs.use_incremental_autosave = False
+        assert filepaths.use_auto_save_temporary_files == use_auto_save
+
+
+def test_recover_autosaved_shot_keeps_unrelated_orphans(tmp_path):
+    scene = bpy.context.scene
+    edit_scene = bpy.data.scenes.new("EDIT")
+    edit_scene.sequence_editor_create()
+    strip = edit_scene.sequence_editor.sequences.new_scene("SH0010", scene, 1, 1)
+    bpy.ops.wm.save_as_mainfile(filepath=str(tmp_path / "edit.blend"))
+    scene.collection.objects.link(bpy.data.objects.new("Empty", None))
+    bpy.context.evaluated_depsgraph_get().update()
+    assert autosave_dirty_shots() == [scene.name]
+    os.utime(bpy.data.filepath, (0, 0))
+
+    # An orphan mesh unrelated to the recovered shot.
+    orphan = bpy.data.meshes.new("Orphan")
+    recovered = recover_autosaved_shot(scene, get_recoverable_shots()[scene])
+    assert strip.scene == recovered
+    # The replaced shot's datablocks are removed, unrelated orphans are kept.
+    assert set(bpy.data.meshes) == {
+        orphan,
+        *(obj.data for obj in recovered.collection.all_objects if obj.type == "MESH"),
+    }
@@ -0,0 +1,167 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright (C) 2023, The SPA Studios. All rights reserved.
+
+import os
+
+import bpy
+
+from spa_sequencer.shared_folders.core import create_and_link_shared_folder
+from spa_sequencer.shot.library import (
+    enforce_memory_budget,
+    enforce_memory_budget_timer,
+    externalize_shot_scene,
+    is_shot_placeholder,
+    load_shot_scene,
+    mark_shot_visited,
+    on_sync_master_strip,
+    unload_shot_scene,
+)
+from spa_sequencer.shot.memory import estimate_datablock_footprint
+from spa_sequencer.shot.split import (
+    SHARED_FOLDERS_LIBRARY_NAME,
+    run_workers,
+    split_edit_file,
+)
+
+from utils import create_shot_scene
+
+
+def create_shot(frame_start: int) -> bpy.types.SceneSequence:
+    """Create a shot strip whose scene contains a camera and a mesh."""
+    strip = create_shot_scene(bpy.context.scene, 1, frame_start)
+    scene = strip.scene
+    scene.frame_end = 50
+    camera = bpy.data.objects.new(f"CAM.{scene.name}", bpy.data.cameras.new("CAM"))
+    scene.collection.objects.link(camera)
+    mesh = bpy.data.objects["Cube"].data.copy()
+    scene.collection.objects.link(bpy.data.objects.new(f"OBJ.{scene.name}", mesh))
+    scene.camera = camera
+    strip.scene_camera = camera
+    return strip
+
+
+def test_shot_library_externalize_and_load(tmp_path):
+    sed = bpy.context.scene.sequence_editor
+    strip = create_shot(1)
+    strip.frame_final_duration = 20
+    scene_name = strip.scene.name
+    camera_name = strip.scene_camera.name
+
+    placeholder = externalize_shot_scene(strip.scene, sed, str(tmp_path))
+    assert (tmp_path / f"{scene_name}.blend").exists()
+    # The placeholder replaces the scene and keeps the strip's timing.
+    assert strip.scene == placeholder and is_shot_placeholder(placeholder)
+    assert placeholder.name == scene_name
+    assert camera_name not in bpy.data.objects
+    assert strip.frame_final_duration == 20
+
+    # Link the scene back.
+    scene = load_shot_scene(placeholder, sed, link=True)
+    assert strip.scene == scene and scene.library
+    assert strip.scene_camera.name == camera_name
+    assert strip.frame_final_duration == 20
+
+    # Unload it again.
+    placeholder = unload_shot_scene(scene, sed)
+    assert strip.scene == placeholder
+    assert not bpy.data.libraries
+
+
+def test_shot_library_memory_budget(tmp_path):
+    sed = bpy.context.scene.sequence_editor
+    strips = [create_shot(1), create_shot(51), create_shot(101)]
+    for strip in strips:
+        externalize_shot_scene(strip.scene, sed, str(tmp_path))
+
+    # Load and visit the shots in reverse order.
+    for strip in reversed(strips):
+        load_shot_scene(strip.scene, sed, link=False)
+        mark_shot_visited(strip)
+
+    # Least recently visited shots are unloaded first.
+    shot_size = estimate_datablock_footprint(bpy.data.objects["Cube"].data).size
+    unloaded = enforce_memory_budget(sed, 2 * shot_size)
+    assert [is_shot_placeholder(s.scene) for s in strips] == [False, False, True]
+    assert len(unloaded) == 1
+
+    # Kept scenes are never unloaded.
+    enforce_memory_budget(sed, 0, keep={strips[1].scene})
+    assert [is_shot_placeholder(s.scene) for s in strips] == [True, False, True]
+
+
+def test_shot_library_deferred_memory_budget(tmp_path):
+    sed = bpy.context.scene.sequence_editor
+    strips = [create_shot(1), create_shot(51)]
+    # Make the first shot exceed the memory budget.
+    strips[0].scene.objects[f"OBJ.{strips[0].scene.name}"].data.vertices.add(200000)
+    for strip in strips:
+        externalize_shot_scene(strip.scene, sed, str(tmp_path))
+    bpy.context.scene.shot_library_settings.memory_budget = 1
+
+    # Shots are loaded when entered, but not unloaded during synchronization.
+    for strip in strips:
+        on_sync_master_strip(strip)
+    assert not any(is_shot_placeholder(s.scene) for s in strips)
+
+    # Memory budget is enforced from a timer, keeping the last loaded shot.
+    assert enforce_memory_budget_timer() is None
+    assert [is_shot_placeholder(s.scene) for s in strips] == [True, False]
+
+
+def test_unload_shot_scene_keeps_unrelated_orphans(tmp_path):
+    sed = bpy.context.scene.sequence_editor
+    strip = create_shot(1)
+    externalize_shot_scene(strip.scene, sed, str(tmp_path))
+    scene = load_shot_scene(strip.scene, sed, link=False)
+    mesh_name = scene.objects[f"OBJ.{scene.name}"].data.name
+    bpy.data.meshes.new("Orphan")
+
+    # Only the shot's datablocks are deleted.
+    unload_shot_scene(scene, sed)
+    assert mesh_name not in bpy.data.meshes
+    assert "Orphan" in bpy.data.meshes
+
+
+def test_split_edit_file(tmp_path):
+    sed = bpy.context.scene.sequence_editor
+    strips = [create_shot(1), create_shot(51)]
+    # Share a folder between the shots.
+    shared_folder, _ = create_and_link_shared_folder(
+        "SharedFolder", [s.scene for s in strips]
+    )
+    shared_folder.objects.link(bpy.data.objects.new("SharedEmpty", None))
+    bpy.data.meshes.new("Orphan")
+
+    assert split_edit_file(sed, str(tmp_path)) == 2
+    assert (tmp_path / SHARED_FOLDERS_LIBRARY_NAME).exists()
+
+    for strip in strips:
+        # Strips use linked shot scenes.
+        assert strip.scene.library
+        assert strip.scene_camera.library
+        # Shared folders are linked from a single library.
+        shared_folders = [
+            col
+            for col in strip.scene.collection.children
+            if col.name.startswith("SharedFolder")
+        ]
+        assert len(shared_folders) == 1
+        assert shared_folders[0].library.filepath.endswith(SHARED_FOLDERS_LIBRARY_NAME)
+    scenes_children = [s.scene.collection.children for s in strips]
+    assert scenes_children[0]["SharedFolder"] == scenes_children[1]["SharedFolder"]
+    # Only the datablocks of the split shot scenes are deleted.
+    local_objects = [obj.name for obj in bpy.data.objects if not obj.library]
+    assert "SharedEmpty" not in local_objects
+    assert "Orphan" in bpy.data.meshes
+
+
+def test_split_workers(tmp_path):
+    strips = [create_shot(1), create_shot(51), create_shot(101)]
+    scene_names = [strip.scene.name for strip in strips]
+    bpy.ops.wm.save_as_mainfile(filepath=str(tmp_path / "edit.blend"))
+
+    # Shots are distributed across workers, each writing its own shot libraries.
+    run_workers(scene_names, str(tmp_path / "shots"), 2, False)
+    assert sorted(os.listdir(tmp_path / "shots")) == sorted(
+        f"{name}.blend" for name in scene_names
+    )
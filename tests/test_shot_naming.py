@@ -5,7 +5,7 @@ import pytest
 
 import bpy
 
-from spa_sequencer.shot.naming import ShotNaming, ShotPrefix
+from spa_sequencer.shot.naming import ShotNamesRegistry, ShotNaming, ShotPrefix
 from spa_sequencer.shot.core import duplicate_scene
 
 
@@ -125,3 +125,46 @@ def test_get_new_shot_name_increment_highest_shot_number():
     new_shot_name = shot_naming.next_shot_name_from_scenes()
     # Next shot should add spacing.
     assert new_shot_name == "SH0030"
+
+
+def test_shot_pattern_cached_by_configuration():
+    naming = ShotNaming()
+    naming.prefixes = ["SHOT"]
+    naming.separator = "_"
+    pattern = naming.shot_pattern()
+    # Same configuration uses the same compiled pattern
+    assert naming.shot_pattern() is pattern
+    assert naming.match_name("SHOT_0010")
+
+    # Changing the configuration uses another pattern
+    naming.separator = "-"
+    assert naming.shot_pattern() is not pattern
+    assert naming.match_name("SHOT-0010")
+    assert not naming.match_name("SHOT_0010")
+
+
+def test_get_next_shot_names_from_sequences():
+    edit_scene = bpy.context.scene
+    edit_scene.sequence_editor_create()
+    sequences = edit_scene.sequence_editor.sequences
+    shot_scene = bpy.data.scenes.new(name="SHOT")
+    for idx, name in enumerate(("SH0010", "SH0035", "NotAShot")):
+        sequences.new_scene(name, shot_scene, 1, idx * 100 + 1)
+
+    names = shot_naming.next_shot_names_from_sequences(edit_scene.sequence_editor, 3)
+    assert names == ["SH0040", "SH0050", "SH0060"]
+
+
+def test_shot_names_registry():
+    registry = ShotNamesRegistry(shot_naming, ["SH0020", "SH0010", "NotAShot"])
+    # Only names matching the naming convention are registered
+    assert registry.names == ["SH0010", "SH0020"]
+    assert registry.next_name() == "SH0030"
+
+    # Registry is updated incrementally
+    registry.add("SH0050")
+    assert registry.next_name() == "SH0060"
+    registry.discard("SH0050")
+    assert "SH0050" not in registry
+    assert registry.allocate(2) == ["SH0030", "SH0040"]
+    assert registry.names == ["SH0010", "SH0020", "SH0030", "SH0040"]